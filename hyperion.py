@@ -51,6 +51,7 @@ JAWCAM = {
 
 config["modules"] = [TAILCAM, JAWCAM]
 config["trigger"] = ZMQTrigger("tcp://192.168.236.101:5555")
+config["frame_alignment"] = {"reference": "tailcam", "sources": ["jawcam"], "tolerance": 0.005}
 
 
 if __name__ == "__main__":
@@ -1,2 +1,9 @@
-from .pydra import Pydra
 from .configuration import config, ports
+
+
+def __getattr__(name):
+    # Pydra depends on PyQt5, so it is only imported when requested (allows headless use without Qt)
+    if name == "Pydra":
+        from .pydra import Pydra
+        return Pydra
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -26,6 +26,8 @@ config = {
 
     "modules": [],
 
-    "trigger": None
+    "trigger": None,
+
+    "frame_alignment": None
 
 }
@@ -1,4 +1,15 @@
 from .base import PydraObject
 from .workers import Worker, Acquisition
+from .pool import WorkerPool
 from .saving import PydraSaver
-from .protocol import Protocol, Trigger
+
+
+def __getattr__(name):
+    # Protocols and triggers depend on PyQt5, so they are only imported when requested
+    if name == "Protocol":
+        from .protocol import Protocol
+        return Protocol
+    elif name == "Trigger":
+        from .trigger import Trigger
+        return Trigger
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
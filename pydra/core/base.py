@@ -1,4 +1,5 @@
 from .messaging import *
+import numpy as np
 import zmq
 import time
 
@@ -87,6 +88,7 @@ class PydraObject:
             "message": self.handle_message,
             "event": self.handle_event,
             "data": self.handle_data,
+            "stream": self.handle_stream,
             "trigger": self.handle_trigger
         }
         # Create events
@@ -127,13 +129,16 @@ class PydraObject:
         """Destroys the 0MQ context."""
         self.zmq_context.destroy(200)
 
-    def poll(self):
-        """Checks for poller for new messages from all subscriptions and passes them to appropriate handlers."""
+    def poll(self) -> bool:
+        """Checks for poller for new messages from all subscriptions and passes them to appropriate handlers. Returns
+        whether any messages were received."""
         sockets = dict(self.zmq_poller.poll(0))
         for name, sock in self.zmq_subscriptions.items():
             if sock in sockets:
                 msg, source, timestamp, flags, args = PydraMessage.recv(sock)
-                self.msg_handlers[msg](*args, msg=msg, source=source, timestamp=timestamp, flags=flags)
+                handler = self.msg_handlers.get(msg) or self.msg_handlers[msg.split("/", 1)[0]]  # e.g. stream/<name>/
+                handler(*args, msg=msg, source=source, timestamp=timestamp, flags=flags)
+        return len(sockets) > 0
 
     def exit(self, *args, **kwargs):
         """Called when the EXIT message type is received. May be re-implemented in subclasses."""
@@ -245,6 +250,23 @@ class PydraObject:
         """
         return t, i, a
 
+    @BATCHED
+    def send_batched(self, t, i, data, a):
+        """Sends a batch of indexed data (and optionally arrays) between objects in a single message.
+
+        Parameters
+        ----------
+        t : np.ndarray
+            Timestamps of each item in the batch.
+        i : np.ndarray
+            Indices of each item in the batch.
+        data : dict
+            Dictionary of lists of json-serializable values, with one value for each item in the batch.
+        a : np.ndarray
+            Array whose first dimension is the batch (e.g. stacked arrays for each item). May be empty.
+        """
+        return np.asarray(t, dtype="float64"), np.asarray(i, dtype="int64"), data, np.asarray(a)
+
     @FRAME
     def send_frame(self, t, i, frame):
         """Sends frama data between objects.
@@ -257,11 +279,17 @@ class PydraObject:
             The index of the frame.
         frame : np.ndarray
             A numpy array containing data.
+
+        Other Parameters
+        ----------------
+        track : bool
+            If True, the frame is sent without copying and a zmq.MessageTracker is returned. The frame must not be
+            modified until the tracker is done.
         """
         return t, i, frame
 
     def handle_data(self, *data, **kwargs):
-        """Handles data messages (TIMESTAMPED, INDEXED, or FRAME) received from other objects."""
+        """Handles data messages (TIMESTAMPED, INDEXED, ARRAY, FRAME or BATCHED) received from other objects."""
         flags = kwargs["flags"]
         if "t" in flags:
             data = TIMESTAMPED.decode(*data)
@@ -275,6 +303,44 @@ class PydraObject:
         elif "f" in flags:
             data = FRAME.decode(*data)
             self.recv_frame(*data, **kwargs)
+        elif "b" in flags:
+            data = BATCHED.decode(*data)
+            self.recv_batched(*data, **kwargs)
+
+    def recv_batched(self, t, i, data, a, **kwargs):
+        """Method for handling batched data received from other objects. By default, the batch is unpacked and each
+        item is passed to recv_indexed (and recv_array if the batch contains arrays), so objects that do not implement
+        this method handle batches in the same way as data sent item by item. May be re-implemented in subclasses.
+
+        Parameters
+        ----------
+        t : np.ndarray
+        i : np.ndarray
+        data : dict
+        a : np.ndarray
+
+        Other Parameters
+        ----------------
+        msg : str
+            Message type flag.
+        source : str
+            Name of the source of the message.
+        timestamp : float
+            Time at which the message was sent.
+        flags : str
+            Additional flags received along with the message.
+        """
+        has_arrays = (a.ndim > 0) and (len(a) == len(t))
+        for k, (t_k, i_k) in enumerate(zip(t, i)):
+            if has_arrays:
+                self.recv_array(float(t_k), int(i_k), a[k], **kwargs)
+            self.recv_indexed(float(t_k), int(i_k), dict([(key, vals[k]) for key, vals in data.items()]), **kwargs)
+
+    def handle_stream(self, *data, **kwargs):
+        """Handles STREAM messages (cropped or binned frames) received from cameras. Stream frames are passed to
+        recv_frame with a roi keyword argument containing the offset and binning of the stream."""
+        t, i, frame, roi = STREAM.decode(*data)
+        self.recv_frame(t, i, frame, roi=roi, **kwargs)
 
     def recv_timestamped(self, t, data, **kwargs):
         """Method for handling serialized timestamped data received from other objects. May be re-implemented in
@@ -361,5 +427,7 @@ class PydraObject:
             Time at which the message was sent.
         flags : str
             Additional flags received along with the message.
+        roi : dict
+            Offset and binning of the frame (only for frames received from a STREAM, see handle_stream).
         """
         pass
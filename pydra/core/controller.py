@@ -0,0 +1,307 @@
+from pydra.core.base import PydraObject
+from pydra.core.saving import PydraSaver
+from pydra.core.messaging import *
+from pydra.utilities.string_formatting import format_zmq_connections
+from pydra.utilities.clock import clock
+
+import time
+from pathlib import Path
+import os
+
+
+class PydraController(PydraObject):
+    """Base class for the main pydra object that controls the network. Does not depend on Qt.
+
+    Starts the saver and all worker processes, tests connections, and implements methods for broadcasting recording
+    events and querying the saver. Subclassed by the main Pydra class (with a Qt GUI or command line) and by
+    HeadlessPydra (without Qt).
+
+    Parameters
+    ----------
+    connections : dict
+        A pre-configured dictionary containing information about 0MQ ports to be used used by pydra objects in the
+        network. Should be contained in the config file.
+    modules : list
+        A list of modules to launch with pydra. Should be contained in the config file.
+    frame_alignment : dict (optional)
+        Passed to the saver to match frames from multiple cameras by timestamp (see pydra.core.saving.alignment).
+        Should be contained in the config file.
+
+    Attributes
+    ----------
+    saver : Saver
+        Process containing the saver object.
+    working_dir : Path
+        Path to the working directory where data are saved.
+    filename : str
+        Basename for naming files.
+    """
+
+    name = "pydra"
+
+    def __init__(self, connections: dict, modules: list = None, *args, **kwargs):
+        self.connections = connections
+        self.modules = modules or []
+        super().__init__(connections=connections, *args, **kwargs)
+        # Start saver and wait for it to respond
+        self.saver = PydraSaver.start(self.pipelines, frame_alignment=kwargs.get("frame_alignment", None),
+                                      connections=connections)
+        self.zmq_receiver.recv_multipart()
+        # Start module workers
+        print("Saver ready. Starting modules...", end=" ")
+        self._workers = []
+        self._event_log = {}
+        self._worker_events = {}  # registry of events implemented by each worker
+        for module in self.modules:
+            self._event_log[module["worker"].name] = []  # create an event log for worker
+            process = module["worker"].start(connections=connections, **module.get("params", dict()))
+            self._workers.append(process)
+        print("done.")
+        # Test connections to workers
+        self.test_connections()
+        # Set working directory and filename
+        working_dir = kwargs.get("working_dir", os.getcwd())
+        self.working_dir = Path(working_dir)
+        filename = kwargs.get("filename", "default_filename")
+        self.filename = filename
+
+    def __str__(self):
+        return format_zmq_connections(self.connections)
+
+    @property
+    def pipelines(self):
+        """Returns a dictionary that maps pipeline names to a list of workers."""
+        pipelines = {}
+        for module in self.modules:
+            worker = module["worker"]
+            pipeline = module["worker"].pipeline
+            if pipeline in pipelines:
+                pipelines[pipeline].append(worker)
+            else:
+                pipelines[pipeline] = [worker]
+        return pipelines
+
+    @EXIT
+    def exit(self):
+        """Broadcasts an exit signal."""
+        return ()
+
+    def shutdown(self):
+        """Ends and joins worker process for proper exiting."""
+        print("Exiting...")
+        self.exit()
+        print("Cleaning up connections...")
+        for process in self._workers:
+            process.join()
+            print(f"Module {process.worker_type.name} joined")
+        self.saver.join()
+        print("Saver joined.")
+
+    @EVENT
+    def start_recording(self):
+        """Broadcasts a start_recording event. The current timebase of the network clock is sent with the event, so the
+        wall-clock epoch of the recording can be saved."""
+        return "start_recording", dict(directory=str(self.working_dir), filename=str(self.filename),
+                                       timebase=clock.timebase())
+
+    @EVENT
+    def stop_recording(self):
+        """Broadcasts a start_recording event."""
+        return "stop_recording", {}
+
+    @LOGGED
+    def protocol_step(self, entry: dict):
+        """Logs the planned and actual time of a protocol step (see pydra.core.scheduler.Timeline). Logged steps are
+        saved by the saver along with the time each broadcast event was received by workers."""
+        return entry
+
+    def set_working_directory(self, directory):
+        """Sets the working directory and broadcasts a set_working_directory event."""
+        self.working_dir = Path(directory)
+        if not self.working_dir.exists():
+            self.working_dir.mkdir(parents=True)
+        self.send_event("set_working_directory", directory=str(self.working_dir))
+
+    def set_filename(self, filename):
+        """Sets the filename and broadcasts a set_filename event."""
+        self.filename = filename
+        self.send_event("set_filename", filename=str(self.filename))
+
+    def _query(self, query_type: str):
+        """General method for sending any request to the saver.
+
+        Parameters
+        ----------
+        query_type : str
+            A specific query that can be fulfilled by the saver.
+
+        See Also
+        --------
+        pydra.core.saving.Saver
+        """
+        self.send_event("query", query_type=query_type)
+        result = self.zmq_receiver.recv_multipart()
+        return result[:-1]
+
+    @staticmethod
+    def decode_message(msg, msg_type):
+        """Decode INFO messages from saver."""
+        if msg_type is EVENT_INFO:
+            return [EVENT_INFO.decode(*msg[(4 * i):(4 * i) + 4]) for i in range(len(msg) // 4)]
+        elif msg_type is DATA_INFO:
+            return [DATA_INFO.decode(*msg[(3 * i):(3 * i) + 3]) for i in range(len(msg) // 3)]
+        else:
+            return msg
+
+    def request_events(self):
+        """Request info from saver about worker events."""
+        events = self._query("events")
+        if len(events):
+            log = self.decode_message(events, EVENT_INFO)
+            for (t, worker, event_name, event_kw) in log:
+                if event_name not in PydraSaver.periodic_logs:  # periodic stats are not replayed
+                    self._event_log[worker].append((t, event_name, event_kw))
+                if event_name == "connected":
+                    self.register_events(worker, event_kw.get("events", []))
+            return True, log
+        return False, events
+
+    def request_data(self):
+        """Request data from saver."""
+        data = self._query("data")
+        worker_data = self.decode_message(data, DATA_INFO)
+        for (name, data, frame) in worker_data:
+            yield name, data, frame
+
+    def request_messages(self):
+        """Request messages from saver."""
+        messages = self._query("messages")
+        if len(messages):
+            message_data = self.decode_message(messages, EVENT_INFO)
+            message_data = [message[:3] for message in message_data]
+            return True, message_data
+        return False, messages
+
+    def test_connections(self, timeout=10.):
+        """Checks that all workers in the network are receiving messages from pydra.
+
+        Parameters
+        ----------
+        timeout : float
+            Maximum time to wait for workers to respond (seconds).
+        """
+        print("Testing connections...")
+        # Get the current time and timeout time
+        t0 = clock.now()
+        t_timeout = t0 + timeout
+        # Create a dictionary with the connection status of each worker
+        connected = dict([(module["worker"].name, False) for module in self.modules])
+        # loop as long as workers are not connected or until the timeout has passed
+        while (clock.now() < t_timeout) and (not all(connected.values())):
+            time.sleep(0.1)
+            self.send_event("_test_connection")  # send a test_connection event
+            ret, events = self.request_events()  # receive logged events
+            if ret:
+                # check for "connected" events from unconnected workers
+                for module in filter(lambda x: not connected[x], connected):
+                    module_events = list(filter(lambda x: x[1] == module, events))
+                    if len(module_events):
+                        event_times, event_names = zip(*[(item[0], item[2]) for item in module_events])
+                        if "connected" in event_names:
+                            idx = event_names.index("connected")
+                            event_time = event_times[idx]
+                            print(f"Module {module} responded after {event_time - t0} seconds.")
+                            connected[module] = True
+        if all(connected.values()):
+            print("All modules connected!")
+        else:
+            for module in filter(lambda x: not connected[x], connected):  # provide diagnostic info for user
+                print(f"Module {module} did not respond within {timeout} seconds. Check connections in config.")
+
+    def register_events(self, worker, events) -> bool:
+        """Adds the events advertised by a worker to the registry. Returns True the first time a worker is
+        registered."""
+        if worker not in self._worker_events:
+            self._worker_events[worker] = list(events)
+            return True
+        return False
+
+    def check_connections(self):
+        """Sends a test_connection event if any workers have not yet registered, allowing workers that were slow to
+        start to register late."""
+        if any([module["worker"].name not in self._worker_events for module in self.modules]):
+            self.send_event("_test_connection")
+
+    @property
+    def worker_events(self):
+        """Returns a dictionary of events implemented by workers in the network that have registered so far."""
+        events = {}
+        for worker, worker_events in self._worker_events.items():
+            for event in worker_events:
+                if event in events:
+                    events[event].append(worker)
+                else:
+                    events[event] = [worker]
+        return events
+
+    @staticmethod
+    def configure(config, ports):
+        """Assigns ports and subscriptions to all modules in the config.
+
+        A module may contain a "streams" dictionary, mapping the names of cameras that it subscribes to onto a stream
+        specification (a dictionary with roi and binning keys, see pydra.modules.cameras.worker.FrameStream). The
+        module then receives cropped or binned frames from the camera instead of its data, and the specification is
+        added to the streams parameter of the camera.
+
+        Parameters
+        ----------
+        config : dict
+            The config dictionary (see pydra.configuration). Updated in place.
+        ports : list
+            List of (publisher, port) tuples available for workers. Ports are removed from the list as they are
+            assigned.
+
+        Returns
+        -------
+        dict
+            The updated config.
+        """
+        # Add modules
+        modules = config["modules"]
+        # Connect saver to pydra
+        pydra_port = config["connections"]["pydra"]["port"]
+        config["connections"]["saver"]["subscriptions"].append(("pydra", pydra_port, (EXIT, EVENT, LOGGED)))
+        # Assign ports to workers
+        for module in modules:
+            worker = module["worker"]
+            worker_config = {}
+            pub, sub = ports.pop(0)
+            worker_config["publisher"] = pub
+            worker_config["port"] = sub
+            config["connections"][worker.name] = worker_config
+            # Add saver subscription
+            config["connections"]["saver"]["subscriptions"].append((worker.name,
+                                                                    worker_config["port"],
+                                                                    (MESSAGE, LOGGED, DATA)))
+        # Add connections for subscriptions
+        sources = dict([(module["worker"].name, module) for module in modules])
+        for module in modules:
+            worker = module["worker"]
+            streams = module.get("streams", {})
+            # Add subscription to pydra
+            config["connections"][worker.name]["subscriptions"] = [("pydra",
+                                                                    pydra_port,
+                                                                    (EXIT, EVENT))]
+            # Add subscriptions to other workers
+            for sub in worker.subscriptions:
+                port = config["connections"][sub]["port"]
+                if sub in streams:
+                    # Receive a cropped or binned stream of frames instead of data
+                    messages = (EVENT, STREAM(worker.name), TRIGGER)
+                    source_params = sources[sub].setdefault("params", {})
+                    source_params.setdefault("streams", {})[worker.name] = streams[sub]
+                else:
+                    messages = (EVENT, DATA, TRIGGER)
+                config["connections"][worker.name]["subscriptions"].append((sub, port, messages))
+        # Return configuration
+        return config
@@ -0,0 +1,139 @@
+from pydra.utilities.clock import clock
+import socket
+import zmq
+import os
+
+
+class TriggerListener:
+    """Base class for blocking on an external trigger without Qt.
+
+    Waits directly on a trigger source with a zmq.Poller, so a trigger is detected as soon as it arrives rather than at
+    the next tick of a polling timer. The source may be a 0MQ socket or any object that can be polled for reading (an
+    integer file descriptor or an object with a fileno method, e.g. a serial port or GPIO value file). The time at which
+    each trigger is received is recorded with the network clock.
+
+    Parameters
+    ----------
+    source : optional
+        The trigger source. Subclasses may instead create the source by overriding the open method.
+
+    Attributes
+    ----------
+    t_received : float
+        Time at which the last trigger was received (network clock).
+    message : bytes
+        Data read from the source when the last trigger was received.
+
+    Notes
+    -----
+    The receive method blocks the calling thread and should be called from the thread that opened the listener (0MQ
+    sockets are not thread safe). The interrupt method may be called from any thread, and is implemented by writing to a
+    socket pair that is polled alongside the trigger source.
+    """
+
+    def __init__(self, source=None):
+        self.source = source
+        self.t_received = None
+        self.message = None
+        self._poller = None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+
+    def __del__(self):
+        for sock in (self._wake_r, self._wake_w):
+            sock.close()
+
+    def open(self):
+        """Opens the trigger source (if required) and returns it. May be overridden in subclasses."""
+        return self.source
+
+    def close(self):
+        """Closes the trigger source (if required). May be overridden in subclasses."""
+        self._poller = None
+
+    def read(self, source):
+        """Reads a trigger from the source. Returns the received data, or None if nothing was read. May be overridden in
+        subclasses."""
+        if isinstance(source, zmq.Socket):
+            return source.recv()
+        fd = source if isinstance(source, int) else source.fileno()
+        return os.read(fd, 4096)
+
+    def reset(self):
+        """Discards any pending interrupts."""
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def interrupt(self):
+        """Wakes the receive method, which returns False. Safe to call from any thread."""
+        try:
+            self._wake_w.send(b"x")
+        except OSError:
+            pass
+
+    def receive(self, timeout=None) -> bool:
+        """Blocks until a trigger is received, the timeout elapses or the listener is interrupted.
+
+        Parameters
+        ----------
+        timeout : float
+            Maximum time to wait (seconds), or None to wait indefinitely.
+
+        Returns
+        -------
+        bool
+            True if a trigger was received, otherwise False.
+        """
+        if self._poller is None:
+            self._source = self.open()
+            self._poller = zmq.Poller()
+            self._poller.register(self._source, zmq.POLLIN)
+            self._poller.register(self._wake_r, zmq.POLLIN)
+        t_timeout = None if timeout is None else clock.now() + timeout
+        while True:
+            remaining = None if t_timeout is None else max(0, int(1000 * (t_timeout - clock.now())))
+            events = dict(self._poller.poll(remaining))
+            t = clock.now()
+            if self._wake_r in events:
+                self.reset()
+                return False
+            if self._source in events:
+                try:
+                    message = self.read(self._source)
+                except (zmq.error.ZMQError, OSError):
+                    message = None
+                if message:
+                    self.t_received = t
+                    self.message = message
+                    return True
+            if (t_timeout is not None) and (clock.now() >= t_timeout):
+                return False
+
+
+class ZMQListener(TriggerListener):
+    """Class for blocking on triggers received over 0MQ.
+
+    Parameters
+    ----------
+    port : str
+        The port over which to listen for triggers in a PUB/SUB pattern.
+    """
+
+    def __init__(self, port):
+        super().__init__()
+        self.port = port
+
+    def open(self):
+        self.ctx = zmq.Context.instance()
+        self.sock = self.ctx.socket(zmq.SUB)
+        self.sock.setsockopt(zmq.SUBSCRIBE, b"")
+        self.sock.connect(self.port)
+        return self.sock
+
+    def close(self):
+        if self._poller is not None:
+            self.sock.close()
+        super().close()
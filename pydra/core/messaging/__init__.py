@@ -1,9 +1,10 @@
 import numpy as np
 
 from .serializers import *
-import time
+from pydra.utilities.clock import clock
 
-__all__ = ["PydraMessage", "EXIT", "MESSAGE", "EVENT", "DATA", "TIMESTAMPED", "INDEXED", "ARRAY", "FRAME", "LOGGED",
+__all__ = ["PydraMessage", "EXIT", "MESSAGE", "EVENT", "DATA", "TIMESTAMPED", "INDEXED", "ARRAY", "FRAME", "STREAM",
+           "BATCHED", "LOGGED",
            "EVENT_INFO", "DATA_INFO", "TRIGGER"]
 
 
@@ -99,7 +100,7 @@ class PydraMessage:
         """
         source = serialize_string(obj.name)    # the name of the object/worker sending the message
         flags = serialize_string(self.dtypes)  # flags for decoding the message
-        t = time.time()
+        t = clock.now()
         t = serialize_float(t)                 # the time at which the message was sent
         return [self.flag, source, t, flags]
 
@@ -197,7 +198,8 @@ class DataMessage(PydraMessage):
         b"t": (float, dict),
         b"i": (float, int, dict),
         b"a": (float, int, np.ndarray),
-        b"f": (float, int, np.ndarray)
+        b"f": (float, int, np.ndarray),
+        b"b": (np.ndarray, np.ndarray, dict, np.ndarray)
     }
 
     def __init__(self, data_flag):
@@ -206,16 +208,92 @@ class DataMessage(PydraMessage):
 
     def message_tags(self, obj):
         source = serialize_string(obj.name)
-        t = time.time()
+        t = clock.now()
         t = serialize_float(t)
         return [self.flag, source, t, self.data_flags]
 
 
+class FrameMessage(DataMessage):
+    """Decorator for sending frames.
+
+    Frames are sent as a header (containing the dtype and shape) followed by the raw frame buffer, which avoids
+    pickling. If the decorated method is called with track=True, the frame buffer is sent without copying and the
+    method returns a zmq.MessageTracker. The frame must not be modified until the tracker is done (see
+    pydra.modules.cameras.worker.FramePool). Otherwise, the buffer is copied into the message and the method returns
+    the result as normal.
+    """
+
+    def __init__(self):
+        super().__init__(b"f")
+
+    def encode(self, t, i, frame):
+        frame = np.ascontiguousarray(frame)
+        header = serialize_dict(dict(dtype=frame.dtype.str, shape=frame.shape))
+        return [serialize_float(t), serialize_int(i), header, frame]
+
+    def decode(self, t, i, header, buffer):
+        header = deserialize_dict(header)
+        frame = np.frombuffer(buffer, dtype=header["dtype"]).reshape(header["shape"]).copy()
+        return [deserialize_float(t), deserialize_int(i), frame]
+
+    def __call__(self, method):
+        def zmq_message(obj, *args, track=False, **kwargs):
+            result = method(obj, *args, **kwargs)
+            if track:
+                return obj.zmq_publisher.send_serialized((obj, method, result), self.serializer, copy=False, track=True)
+            obj.zmq_publisher.send_serialized((obj, method, result), self.serializer)
+            return result
+        return zmq_message
+
+
+class StreamMessage(FrameMessage):
+    """Message for sending a cropped or binned stream of frames to a single subscriber.
+
+    Each stream has its own flag (stream/<name>/), so that 0MQ only delivers it to the subscriber that requested it and
+    subscribers to DATA do not receive it. 0MQ subscriptions match prefixes, so the flag ends with a / to stop a
+    subscriber from receiving the streams of other subscribers whose names start with its own (e.g. tail and tail2). The
+    offset and binning of the stream are sent in the frame header, so that the subscriber can translate coordinates in
+    the stream back to coordinates in the full frame.
+
+    Parameters
+    ----------
+    name : str
+        Name of the subscriber that receives the stream.
+    offset : tuple
+        (x, y) position of the top left corner of the stream in the full frame (pixels).
+    binning : int
+        Number of pixels in the full frame that are binned into one pixel in each dimension of the stream.
+    """
+
+    def __init__(self, name, offset=(0, 0), binning=1):
+        super().__init__()
+        self.name = name
+        self.flag = b"stream/" + serialize_string(name) + b"/"
+        self.offset = tuple(offset)
+        self.binning = binning
+
+    def encode(self, t, i, frame):
+        frame = np.ascontiguousarray(frame)
+        header = serialize_dict(dict(dtype=frame.dtype.str, shape=frame.shape, offset=self.offset,
+                                     binning=self.binning))
+        return [serialize_float(t), serialize_int(i), header, frame]
+
+    @staticmethod
+    def decode(t, i, header, buffer):
+        """Decodes a stream frame. Returns the timestamp, index, frame and a dictionary with the offset and binning."""
+        header = deserialize_dict(header)
+        frame = np.frombuffer(buffer, dtype=header["dtype"]).reshape(header["shape"]).copy()
+        roi = dict(offset=tuple(header["offset"]), binning=header["binning"])
+        return [deserialize_float(t), deserialize_int(i), frame, roi]
+
+
 DATA = DataMessage
 TIMESTAMPED = DataMessage(b"t")
 INDEXED = DataMessage(b"i")
 ARRAY = DataMessage(b"a")
-FRAME = DataMessage(b"f")
+BATCHED = DataMessage(b"b")
+FRAME = FrameMessage()
+STREAM = StreamMessage
 
 
 class LoggedMessage(PydraMessage):
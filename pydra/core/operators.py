@@ -0,0 +1,222 @@
+"""Operators for computing derived data inside a worker.
+
+Operators compute derived channels (e.g. a smoothed angle, the tail-beat frequency or whether the fish is swimming) from
+the data that a worker publishes. They run in the worker's process and derived channels are published in the same
+message as the data they are computed from, so no extra process or serialization step is needed::
+
+    from pydra.core.operators import RollingMean, TailBeatFrequency, BoutDetector
+
+    TAIL_TRACKER["params"]["operators"] = [
+        RollingMean("angle", 5, output="angle_smooth"),
+        TailBeatFrequency("angle", 64, output="tbf"),
+        BoutDetector("angle", 10, threshold=0.05, output="bout")
+    ]
+
+Operators are applied in order, so an operator can take the output of a previous operator as its input. Each operator
+processes arrays of samples, so batches of data (see send_batched) are processed with a single vectorized call.
+"""
+from numpy.lib.stride_tricks import sliding_window_view
+import numpy as np
+
+
+class Operator:
+    """Base class for operators.
+
+    Parameters
+    ----------
+    input : str
+        Name of the input channel.
+    output : str (optional)
+        Name of the output channel. Defaults to the input name followed by the name of the operator.
+    """
+
+    name = "operator"
+
+    def __init__(self, input: str, output: str = None):
+        self.input = input
+        self.output = output or f"{input}_{self.name}"
+
+    def process(self, t: np.ndarray, x: np.ndarray) -> np.ndarray:
+        """Returns the output for each sample of input x (with timestamps t). Must be implemented in subclasses."""
+        return x
+
+    def reset(self):
+        """Clears any state kept between calls to process."""
+        return
+
+
+class WindowOperator(Operator):
+    """Base class for operators on a rolling window of samples.
+
+    The last window - 1 samples are kept between calls, so that the output for each new sample is computed from the
+    window ending at that sample. The output is NaN until the window is full.
+
+    Parameters
+    ----------
+    window : int
+        Number of samples in the window.
+    """
+
+    def __init__(self, input: str, window: int, output: str = None):
+        super().__init__(input, output)
+        self.window = int(window)
+        self.reset()
+
+    def reset(self):
+        self._t = np.full(self.window - 1, np.nan)
+        self._x = np.full(self.window - 1, np.nan)
+
+    def windows(self, t: np.ndarray, x: np.ndarray):
+        """Returns arrays of the time and input windows ending at each new sample, with shape (len(x), window)."""
+        t = np.concatenate([self._t, np.asarray(t, dtype="float64")])
+        x = np.concatenate([self._x, np.asarray(x, dtype="float64")])
+        n = len(x) - len(self._x)
+        self._t, self._x = t[len(t) - self.window + 1:], x[len(x) - self.window + 1:]
+        return sliding_window_view(t, self.window)[-n:], sliding_window_view(x, self.window)[-n:]
+
+    def process(self, t, x):
+        t_windows, x_windows = self.windows(t, x)
+        return self.reduce(t_windows, x_windows)
+
+    def reduce(self, t_windows: np.ndarray, x_windows: np.ndarray) -> np.ndarray:
+        """Returns the output for each window. Must be implemented in subclasses."""
+        return x_windows[:, -1]
+
+
+class RollingMean(WindowOperator):
+    """Mean of the input over a rolling window."""
+
+    name = "mean"
+
+    def reduce(self, t_windows, x_windows):
+        return x_windows.mean(axis=1)
+
+
+class RollingStd(WindowOperator):
+    """Standard deviation of the input over a rolling window."""
+
+    name = "std"
+
+    def reduce(self, t_windows, x_windows):
+        return x_windows.std(axis=1)
+
+
+class Threshold(Operator):
+    """Returns 1. when the input is above the threshold and 0. otherwise.
+
+    Parameters
+    ----------
+    threshold : float
+        The threshold.
+    absolute : bool
+        If True, the absolute value of the input is compared with the threshold.
+    """
+
+    name = "threshold"
+
+    def __init__(self, input: str, threshold: float, absolute: bool = False, output: str = None):
+        super().__init__(input, output)
+        self.threshold = threshold
+        self.absolute = absolute
+
+    def process(self, t, x):
+        x = np.asarray(x, dtype="float64")
+        if self.absolute:
+            x = np.abs(x)
+        return (x > self.threshold).astype("float64")
+
+
+class TailBeatFrequency(WindowOperator):
+    """Dominant frequency (Hz) of the input over a rolling window, from the peak of its Fourier transform.
+
+    The sample rate is estimated from the timestamps in each window, so the frequency is correct if frames are dropped
+    occasionally.
+
+    Parameters
+    ----------
+    min_frequency : float
+        Frequencies below this value (Hz) are ignored (e.g. slow drifts of the tail angle).
+    """
+
+    name = "frequency"
+
+    def __init__(self, input: str, window: int, min_frequency: float = 0., output: str = None):
+        super().__init__(input, window, output)
+        self.min_frequency = min_frequency
+
+    def reduce(self, t_windows, x_windows):
+        dt = np.median(np.diff(t_windows, axis=1), axis=1)
+        power = np.abs(np.fft.rfft(x_windows - x_windows.mean(axis=1, keepdims=True), axis=1))
+        k = np.arange(power.shape[1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frequencies = k[np.newaxis, :] / (self.window * dt[:, np.newaxis])
+        power[:, 0] = 0
+        power[frequencies < self.min_frequency] = 0
+        peak = np.argmax(power, axis=1)
+        out = frequencies[np.arange(len(peak)), peak]
+        out[np.isnan(power).any(axis=1) | ~(dt > 0)] = np.nan
+        return out
+
+
+class BoutDetector(WindowOperator):
+    """Returns 1. during bouts of movement and 0. otherwise. A bout is detected when the standard deviation of the
+    change in the input over a rolling window exceeds the threshold.
+
+    Parameters
+    ----------
+    threshold : float
+        Threshold for the rolling standard deviation of the change in the input between samples.
+    """
+
+    name = "bout"
+
+    def __init__(self, input: str, window: int, threshold: float, output: str = None):
+        super().__init__(input, window, output)
+        self.threshold = threshold
+
+    def reduce(self, t_windows, x_windows):
+        std = np.diff(x_windows, axis=1).std(axis=1)
+        out = (std > self.threshold).astype("float64")
+        out[np.isnan(std)] = np.nan
+        return out
+
+
+class OperatorGraph:
+    """Applies a sequence of operators to data.
+
+    Parameters
+    ----------
+    operators : iterable
+        Operator objects. Operators are applied in order, and each can use the inputs and the outputs of previous
+        operators.
+    """
+
+    def __init__(self, operators):
+        self.operators = list(operators)
+
+    def __len__(self):
+        return len(self.operators)
+
+    def reset(self):
+        for operator in self.operators:
+            operator.reset()
+
+    def update(self, t: float, data: dict) -> dict:
+        """Returns the derived channels for a single sample of data."""
+        derived = self.update_batch([t], dict([(key, [val]) for key, val in data.items()]))
+        return dict([(key, vals[0]) for key, vals in derived.items()])
+
+    def update_batch(self, t, data: dict) -> dict:
+        """Returns the derived channels for a batch of data (a dictionary of lists with one value for each time in t).
+        Operators whose input is not in the data are skipped."""
+        t = np.asarray(t, dtype="float64")
+        channels = dict(data)
+        derived = {}
+        for operator in self.operators:
+            if operator.input not in channels:
+                continue
+            x = np.asarray(channels[operator.input], dtype="float64")
+            out = operator.process(t, x)
+            channels[operator.output] = out
+            derived[operator.output] = [float(val) for val in out]
+        return derived
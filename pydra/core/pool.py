@@ -0,0 +1,219 @@
+from pydra.core.workers import Worker
+from pydra.core.process import ProcessMixIn
+from pydra.core.messaging import LOGGED, FRAME
+from pydra.core.messaging.serializers import *
+from collections import OrderedDict
+import zmq
+
+
+class TaggedPublisher:
+    """Stands in for the zmq_publisher of a pool member. Messages are pushed to the collector of the pool, prefixed
+    with the sequence number of the frame that is being processed (-1 for messages sent outside recv_frame)."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.seq = -1
+
+    def send_serialized(self, msg, serialize, flags=0, copy=True, **kwargs):
+        parts = serialize(msg)
+        return self.sock.send_multipart([serialize_int(self.seq)] + parts, flags=flags, copy=copy, **kwargs)
+
+
+class PoolMember(ProcessMixIn):
+    """Runs one instance of a worker in a pool (see WorkerPool).
+
+    The worker receives frames from the dispatcher of the pool instead of subscribing to cameras, and everything it
+    publishes is pushed to the collector of the pool. Events are received directly from pydra.
+
+    Parameters
+    ----------
+    worker_type : type
+        The Worker class.
+    connections : dict
+        Connections of the worker, containing only the subscription to pydra.
+    frames_port : str
+        Port of the dispatcher.
+    results_port : str
+        Port of the collector.
+    """
+
+    def __init__(self, worker_type, connections, frames_port, results_port, **kwargs):
+        super().__init__()
+        self.worker = worker_type(connections=connections, **kwargs)
+        context = self.worker.zmq_context
+        self.frames = context.socket(zmq.PULL)
+        self.frames.connect(frames_port)
+        results = context.socket(zmq.PUSH)
+        results.connect(results_port)
+        self.publisher = TaggedPublisher(results)
+        self.worker.zmq_publisher = self.publisher
+
+    def setup(self):
+        self.worker.setup()
+
+    def _process(self):
+        self.worker.poll()
+        if self.worker.exit_flag:
+            self.close()
+            return
+        if self.frames.poll(1):
+            seq, t, i, header, buffer, kw = self.frames.recv_multipart()
+            t, i, frame = FRAME.decode(t, i, header, buffer)
+            self.publisher.seq = deserialize_int(seq)
+            self.worker.recv_frame(t, i, frame, **deserialize_dict(kw))
+            self.publisher.seq = -1
+            self.publisher.sock.send_multipart([seq, b"done"])
+
+    def cleanup(self):
+        self.worker.cleanup()
+
+
+class WorkerPool(Worker):
+    """Runs several copies of a worker in parallel and publishes their results in frame order.
+
+    The pool takes the place of the worker in the network. It subscribes to the same workers, and distributes frames
+    round-robin to n_workers PoolMember processes (fan-out). Messages published by the members are collected, grouped by
+    the frame that produced them and published in the order that frames were received (fan-in). If the results of a
+    frame have not arrived by the time window later frames are waiting, the frame is skipped and its results are
+    discarded if they arrive later, so the latency of the pool is bounded.
+
+    The worker must implement a pure per-frame recv_frame, i.e. results must depend only on the frame and on state that
+    is set by events (each member receives all events from pydra). Messages sent by members outside recv_frame (e.g.
+    logged events) are published immediately. Since consecutive frames are processed by different members, operators
+    that keep state between frames (see pydra.core.operators) should not be used with workers in a pool.
+
+    To use a pool, subclass it and set the worker class attribute. The name, subscriptions and pipeline are taken from
+    the worker. Subclasses must be defined at the top level of a module so they can be started in a new process::
+
+        class TailTrackerPool(WorkerPool):
+            worker = TailTrackingWorker
+
+        TAIL_TRACKER["worker"] = TailTrackerPool
+        TAIL_TRACKER["params"]["n_workers"] = 4
+
+    Parameters
+    ----------
+    n_workers : int
+        Number of worker processes.
+    window : int
+        Maximum number of frames waiting for results before the oldest frame is skipped.
+
+    Other Parameters
+    ----------------
+        Keyword arguments passed to the constructor of each worker.
+
+    Attributes
+    ----------
+    dispatched : int
+        Number of frames sent to members.
+    skipped : int
+        Number of frames whose results were not published because they did not arrive within the window.
+    dropped : int
+        Number of frames that could not be sent because all members were busy.
+    """
+
+    worker = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.worker is not None:
+            for attr in ("name", "subscriptions", "pipeline"):
+                if attr not in cls.__dict__:
+                    setattr(cls, attr, getattr(cls.worker, attr))
+
+    def __init__(self, connections, n_workers: int = 4, window: int = 64, *args, **kwargs):
+        super().__init__(connections=connections, *args)
+        self.n_workers = n_workers
+        self.window = window
+        self.worker_kwargs = kwargs
+        # Members only subscribe to pydra
+        subscriptions = [sub for sub in connections[self.name]["subscriptions"] if sub[0] == "pydra"]
+        self.member_connections = {self.name: {"subscriptions": subscriptions}}
+        self.members = []
+        self._member_events = set()
+        self._members_connected = 0
+        # Reordering
+        self._seq = 0
+        self._pending = OrderedDict()  # sequence number -> list of messages
+        self._done = set()
+        self.dispatched = 0
+        self.skipped = 0
+        self.dropped = 0
+
+    def setup(self):
+        self.frames = self.zmq_context.socket(zmq.PUSH)
+        self.frames.setsockopt(zmq.SNDHWM, self.window)
+        frames_port = self.frames.bind_to_random_port("tcp://127.0.0.1")
+        self.results = self.zmq_context.socket(zmq.PULL)
+        results_port = self.results.bind_to_random_port("tcp://127.0.0.1")
+        for n in range(self.n_workers):
+            process = PoolMember.start(self.worker, self.member_connections, f"tcp://127.0.0.1:{frames_port}",
+                                       f"tcp://127.0.0.1:{results_port}", **self.worker_kwargs)
+            self.members.append(process)
+
+    def _check_connection(self, **kwargs):
+        """Only reports that the pool is connected once all members are connected."""
+        if self._members_connected >= self.n_workers:
+            super()._check_connection(**kwargs)
+
+    @LOGGED
+    def connected(self):
+        """Advertises the events implemented by the pool and its members."""
+        events = [key for key in self.events if not key.startswith("_")]
+        return dict(events=events + sorted(self._member_events.difference(events)))
+
+    def _process(self):
+        super()._process()
+        self.collect()
+
+    def recv_frame(self, t, i, frame, **kwargs):
+        """Sends the frame to the next available member."""
+        kw = dict([(key, kwargs[key]) for key in ("source", "timestamp", "roi") if key in kwargs])
+        parts = [serialize_int(self._seq)] + FRAME.encode(t, i, frame) + [serialize_dict(kw)]
+        try:
+            self.frames.send_multipart(parts, zmq.NOBLOCK)
+        except zmq.Again:
+            self.dropped += 1
+            return
+        self._pending[self._seq] = []
+        self._seq += 1
+        self.dispatched += 1
+
+    def collect(self):
+        """Receives messages from members and publishes the results of frames in order."""
+        while self.results.poll(0):
+            seq, *parts = self.results.recv_multipart()
+            seq = deserialize_int(seq)
+            if seq < 0:
+                self._forward(parts)
+            elif seq in self._pending:
+                if parts == [b"done"]:
+                    self._done.add(seq)
+                else:
+                    self._pending[seq].append(parts)
+        while len(self._pending):
+            seq = next(iter(self._pending))
+            if seq in self._done:
+                for parts in self._pending.pop(seq):
+                    self.zmq_publisher.send_multipart(parts)
+                self._done.discard(seq)
+            elif len(self._pending) > self.window:
+                self._pending.pop(seq)
+                self.skipped += 1
+            else:
+                break
+
+    def _forward(self, parts):
+        """Publishes messages sent by members outside recv_frame. Connection messages are handled by the pool."""
+        if (parts[0] == LOGGED.flag) and (deserialize_string(parts[4]) == "connected"):
+            name, data = LOGGED.decode(*parts[4:])
+            self._member_events.update(data.get("events", []))
+            self._members_connected += 1
+            return
+        self.zmq_publisher.send_multipart(parts)
+
+    def cleanup(self):
+        """Waits for members to exit (they receive the exit signal from pydra directly)."""
+        for process in self.members:
+            process.join(timeout=5.)
+        print(f"{self.name} pool: {self.dispatched} frames dispatched, {self.skipped} skipped, {self.dropped} dropped")
@@ -1,5 +1,7 @@
 from PyQt5 import QtCore
 from .trigger import Trigger, FreeRunningMode
+from .scheduler import Timeline, sleep_until, SPIN
+from pydra.utilities.clock import clock
 
 
 class Queued(QtCore.QObject):
@@ -21,6 +23,23 @@ class Queued(QtCore.QObject):
         self.finished.emit()
 
 
+class Broadcast(Queued):
+    """Class for queueing events that are broadcast to workers in a Protocol. Broadcast events are tagged with the
+    protocol step and repetition when the protocol runs, so that workers can log when they were received.
+
+    Parameters
+    ----------
+    send : callable
+        The method used to broadcast the event (e.g. send_event).
+    event_name : str
+        The name of the event.
+    """
+
+    def __init__(self, send, event_name, **kwargs):
+        super().__init__(send, event_name, **kwargs)
+        self.event_name = event_name
+
+
 class Timer(QtCore.QObject):
     """Class for introducing waits in a Protocol."""
 
@@ -80,6 +99,12 @@ class Protocol(QtCore.QObject):
 
     Protocols may be repeated any number of times with a time gap in between repetitions.
 
+    When a protocol is run, the event queue is compiled into a Timeline (see pydra.core.scheduler), in which every event
+    has an offset from the start of the repetition (or from the last trigger). Events are then executed against absolute
+    deadlines on the network clock: a precise single-shot QTimer wakes the main thread shortly before each deadline and
+    the remaining time is spun, so timer errors and event loop delays do not accumulate over the protocol. The planned
+    and actual time of each step are recorded in the log of the timeline and emitted with the stepped signal.
+
     Parameters
     ----------
     name : str
@@ -99,17 +124,21 @@ class Protocol(QtCore.QObject):
         Timer for controlling interval between repetitions.
     flag : bool
         Internal flag for whether the protocol is currently running (includes repetitions and inter-rep intervals).
+    timeline : Timeline
+        The compiled event queue of the running (or last run) protocol.
+    spin : float
+        Time before each deadline at which the timer hands over to a spin wait (seconds).
 
     Notes
     -----
-    The event queue is a list of Queued, Timer and TriggerContainer objects. These objects all implement a __call__
-    method and contain a "finished" Qt signal. The finished signal of each object connect to the __call__ method of
-    the next object in the event queue.
-        * For Queued object, the finished signal emits as soon as the queued method returns.
-        * For Timer objects, the finished signal emits after a predefined elapsed time.
-        * For TriggerContainer objects, the finished signal emits when the Trigger object emits its triggered signal.
+    The event queue is a list of Queued, Timer and TriggerContainer objects, which are compiled into a timeline when the
+    protocol is run.
+        * Queued objects become events at the current offset.
+        * Timer objects add their interval to the current offset.
+        * TriggerContainer objects pause the protocol until the Trigger object emits its triggered signal. Subsequent
+          offsets are measured from the time the trigger was received.
     The free-running mode implements a special case of a TriggerContainer, whereby a trigger is never received and so
-    a finished signal is never emitted.
+    the protocol never continues.
     """
 
     # Qt signal emitted when all repetitions of the protocol are completed
@@ -120,6 +149,8 @@ class Protocol(QtCore.QObject):
     started = QtCore.pyqtSignal(int)
     # Qt signal emitted if the protocol is interrupted by an external or internal event (e.g. a trigger timing out)
     interrupted = QtCore.pyqtSignal()
+    # Qt signal emitted with the log entry (planned and actual time) of each step of the protocol
+    stepped = QtCore.pyqtSignal(dict)
 
     @classmethod
     def build(cls, name: str, reps: int, interval: int, events: list,
@@ -133,6 +164,8 @@ class Protocol(QtCore.QObject):
                 args, kwargs = (), {}
             if isinstance(event, Trigger):
                 protocol.addTrigger(event)
+            elif isinstance(event, Queued):
+                protocol._add(event)
             elif callable(event):
                 protocol.addEvent(event, *args, **kwargs)
             elif isinstance(event, int):
@@ -150,10 +183,19 @@ class Protocol(QtCore.QObject):
         self.interval = interval
         self.event_queue = []
         self.rep = 0
-        # Inter-protocol timer
+        # Timeline
+        self.timeline = None
+        self.spin = SPIN
+        self._step = 0
+        self._anchor = 0.
+        self._armed = 0.
+        self._deadline = 0.
+        self._callback = None
+        # Deadline timer
         self.timer = QtCore.QTimer()
-        self.timer.setInterval(int(self.interval * 1000))
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
         self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._fire)
         # Running attribute
         self.flag = False
         self.started.connect(self.setFlag)
@@ -195,6 +237,7 @@ class Protocol(QtCore.QObject):
         """
         container = TriggerContainer(trigger)
         container.timeout.connect(self.interrupt)
+        container.finished.connect(self._triggered)
         self._add(container)
 
     def freeRunningMode(self):
@@ -204,27 +247,93 @@ class Protocol(QtCore.QObject):
 
     def _add(self, queued):
         """Private method to add events, timers and triggers to the event queue."""
-        if len(self.event_queue):
-            self.event_queue[-1].finished.connect(queued.__call__)
         self.event_queue.append(queued)
 
+    def compile(self) -> Timeline:
+        """Compiles the event queue into a timeline."""
+        timeline = Timeline(callback=self.stepped.emit)
+        for queued in self.event_queue:
+            if isinstance(queued, Broadcast):
+                timeline.add_broadcast(queued.method, queued.event_name, **queued.kwargs)
+            elif isinstance(queued, Queued):
+                timeline.add_event(queued.method, *queued.args, **queued.kwargs)
+            elif isinstance(queued, Timer):
+                timeline.add_wait(queued.timer.interval() / 1000.)
+            elif isinstance(queued, TriggerContainer):
+                timeline.add_trigger(queued)
+        return timeline
+
+    def _schedule(self, deadline, callback):
+        """Calls the callback at the deadline (network clock)."""
+        self._deadline = deadline
+        self._callback = callback
+        remaining = deadline - clock.now() - self.spin
+        if remaining > 0:
+            self.timer.start(int(remaining * 1000))
+        else:
+            self._fire()
+
+    def _fire(self):
+        """Spins until the deadline and then calls the scheduled callback."""
+        callback, self._callback = self._callback, None
+        if callback is not None:
+            sleep_until(self._deadline, self.spin)
+            callback()
+
+    def _next(self):
+        """Schedules the next step of the timeline, or the end of the repetition."""
+        if self._step >= len(self.timeline):
+            self._schedule(self._anchor + self.timeline.duration, self.end)
+            return
+        step = self.timeline[self._step]
+        if step.trigger is not None:
+            self._armed = clock.now()
+            step.trigger()
+        else:
+            self._schedule(self._anchor + step.offset, self._dispatch)
+
+    def _dispatch(self):
+        """Executes the current step of the timeline."""
+        step = self.timeline[self._step]
+        planned = self._anchor + step.offset
+        self.timeline.record(self.rep, step, planned, clock.now())
+        step(self.rep)
+        self._step += 1
+        self._next()
+
+    def _triggered(self):
+        """Re-anchors the timeline at the time the trigger was received and continues the protocol."""
+        if (not self.flag) or (self.timeline is None) or (self._step >= len(self.timeline)):
+            return
+        step = self.timeline[self._step]
+        if step.trigger is not self.sender():
+            return
+        self._anchor = getattr(step.trigger.trigger, "t_received", None) or clock.now()
+        self.timeline.record(self.rep, step, self._armed, self._anchor)
+        self._step += 1
+        self._next()
+
     def start(self):
         """Called to start one repetition of the protocol."""
         self.rep += 1
+        self._step = 0
         self.started.emit(self.rep)
-        self.event_queue[0]()
+        self._next()
 
     def end(self):
         """Called at the end of a repetition of the protocol."""
+        self._anchor += self.timeline.duration
         self.finished.emit(self.rep)
         if self.rep < self.repetitions:
-            self.timer.start()
+            self._anchor += self.interval
+            self._schedule(self._anchor, self.start)
         else:
             self.completed.emit()
 
     def interrupt(self):
         """Interrupts the protocol."""
         self.timer.stop()
+        self._callback = None
         for event in self.event_queue:
             event.interrupt()
         self.interrupted.emit()
@@ -234,8 +343,8 @@ class Protocol(QtCore.QObject):
     def __call__(self, *args, **kwargs):
         self.rep = 0
         if len(self.event_queue):
-            self.timer.timeout.connect(self.start)
-            self.event_queue[-1].finished.connect(self.end)
+            self.timeline = self.compile()
+            self._anchor = clock.now()
             self.start()
 
     def setFlag(self):
@@ -254,7 +363,6 @@ class Protocol(QtCore.QObject):
         """Can be used to reset the interval."""
         if not self.running():
             self.interval = sec
-            self.timer.setInterval(int(self.interval * 1000))
         else:
             raise UserWarning("Cannot set the interval for a running protocol.")
 
@@ -0,0 +1,108 @@
+from collections import deque
+import numpy as np
+
+
+class FrameMatcher:
+    """Incrementally matches frames from multiple cameras by timestamp.
+
+    Each frame from the reference source is matched to the frame with the nearest timestamp from every other source,
+    provided the difference is within the tolerance. Matching is done as frames arrive: a reference frame is resolved
+    once every other source has received a frame later than the reference time plus the tolerance (so no closer frame
+    can arrive), and frames that can no longer be the nearest match to any reference frame are discarded. Matching N
+    reference frames to M frames therefore takes O(N + M) time and memory proportional to the lag between sources.
+
+    Timestamps must come from the same clock (i.e. the network clock, see pydra.utilities.clock) and frames from each
+    source must arrive in time order.
+
+    Parameters
+    ----------
+    reference : str
+        Name of the worker whose frames define the rows of the table.
+    sources : iterable (optional)
+        Names of the workers to match to the reference. If not given, any other source that sends frames is matched.
+    tolerance : float
+        Maximum time difference between matched frames (seconds).
+    max_lag : float
+        Maximum time that a reference frame waits for frames from other sources (seconds). Prevents frames from
+        accumulating if a source stops sending frames.
+
+    Attributes
+    ----------
+    columns : dict
+        Lists of matched data for each column of the table. Each source has an index column and a time column. Frames
+        that could not be matched have an index of -1 and a time of NaN.
+    """
+
+    def __init__(self, reference: str, sources=None, tolerance: float = 0.001, max_lag: float = 1.0):
+        self.reference = reference
+        self.tolerance = tolerance
+        self.max_lag = max_lag
+        self.dynamic = sources is None
+        self.sources = []
+        self.buffers = {}
+        self.pending = deque()
+        self.columns = {}
+        self._add_source(reference)
+        for source in (sources or ()):
+            if source != reference:
+                self._add_source(source)
+
+    def __len__(self):
+        return len(self.columns[self.reference + ".index"])
+
+    def _add_source(self, source):
+        self.sources.append(source)
+        self.columns[source + ".index"] = []
+        self.columns[source + ".time"] = []
+        if source != self.reference:
+            self.buffers[source] = deque()
+            # rows that have already been resolved were not matched to this source
+            n = len(self.columns[self.reference + ".index"])
+            self.columns[source + ".index"].extend([-1] * n)
+            self.columns[source + ".time"].extend([np.nan] * n)
+
+    def update(self, source, t, i):
+        """Adds a frame and resolves any reference frames that can be matched."""
+        if source == self.reference:
+            self.pending.append((t, i))
+        elif source in self.buffers:
+            self.buffers[source].append((t, i))
+        elif self.dynamic:
+            self._add_source(source)
+            self.buffers[source].append((t, i))
+        else:
+            return
+        self._resolve()
+
+    def flush(self):
+        """Resolves all remaining reference frames (e.g. at the end of a recording)."""
+        self._resolve(final=True)
+
+    def _resolve(self, final=False):
+        while len(self.pending):
+            t, i = self.pending[0]
+            if not (final or (self.pending[-1][0] - t > self.max_lag)):
+                for buffer in self.buffers.values():
+                    if (not len(buffer)) or (buffer[-1][0] < t + self.tolerance):
+                        return  # a closer frame may still arrive
+            self.pending.popleft()
+            self.columns[self.reference + ".index"].append(i)
+            self.columns[self.reference + ".time"].append(t)
+            for source, buffer in self.buffers.items():
+                # discard frames that are further from this reference frame than the next frame
+                while (len(buffer) > 1) and (abs(buffer[1][0] - t) <= abs(buffer[0][0] - t)):
+                    buffer.popleft()
+                if len(buffer) and (abs(buffer[0][0] - t) <= self.tolerance):
+                    match_t, match_i = buffer[0]
+                else:
+                    match_t, match_i = np.nan, -1
+                self.columns[source + ".index"].append(match_i)
+                self.columns[source + ".time"].append(match_t)
+
+    def table(self) -> dict:
+        """Returns the matched frames as a dictionary of arrays."""
+        table = {}
+        for source in self.sources:
+            table[source + ".index"] = np.array(self.columns[source + ".index"], dtype="int64")
+            table[source + ".time"] = np.array(self.columns[source + ".time"], dtype="float64")
+        return table
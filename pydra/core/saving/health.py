@@ -0,0 +1,89 @@
+from pathlib import Path
+import json
+
+
+class HealthLog:
+    """Accumulates the frame_health messages logged by cameras over a recording.
+
+    Each frame_health message summarizes a short interval of acquisition (see
+    pydra.modules.cameras.worker.FrameHealth). The HealthLog sums the counts and histograms of all messages received
+    from each camera during a recording, so that a summary of the whole recording can be saved alongside the data.
+
+    The maximum depth of the queues of each pipeline saver is also kept (see update_queues), which shows whether
+    saving keeps up with acquisition.
+
+    Attributes
+    ----------
+    workers : dict
+        Accumulated summary for each camera.
+    queues : dict
+        Maximum depth of the frame, indexed and timestamped queues of each pipeline.
+    """
+
+    def __init__(self):
+        self.workers = {}
+        self.queues = {}
+
+    def __len__(self):
+        return len(self.workers)
+
+    def add(self, worker: str, data: dict):
+        """Adds a frame_health message logged by a worker."""
+        if worker not in self.workers:
+            self.workers[worker] = dict(frames=0, empty=0, missed=0, late=0, intervals=0, duration=0.,
+                                        interval_max=0., expected_fps=None, bins=data.get("bins", []),
+                                        histogram=[0] * len(data.get("histogram", [])))
+        summary = self.workers[worker]
+        for key in ("frames", "empty", "missed", "late", "intervals", "duration"):
+            summary[key] += data.get(key, 0)
+        summary["interval_max"] = max(summary["interval_max"], data.get("interval_max", 0.))
+        summary["expected_fps"] = data.get("expected_fps", summary["expected_fps"])
+        histogram = data.get("histogram", [])
+        if len(histogram) == len(summary["histogram"]):
+            summary["histogram"] = [a + b for a, b in zip(summary["histogram"], histogram)]
+
+    def update_queues(self, pipeline: str, depths: dict):
+        """Updates the maximum depth of the saver queues of a pipeline."""
+        maximum = self.queues.setdefault(pipeline, dict([(key, 0) for key in depths]))
+        for key, depth in depths.items():
+            maximum[key] = max(maximum.get(key, 0), depth)
+
+    def clear(self):
+        self.workers = {}
+        self.queues = {}
+
+    def summary(self) -> dict:
+        """Returns the summary of the recording for each camera, including the effective frame rate. The maximum depths
+        of the saver queues are under the saver_queues key."""
+        out = {}
+        for worker, summary in self.workers.items():
+            fps = (summary["intervals"] / summary["duration"]) if summary["duration"] > 0 else 0.
+            out[worker] = dict(summary, fps=fps)
+        if len(self.queues):
+            out["saver_queues"] = self.queues
+        return out
+
+    @staticmethod
+    def report(summary: dict) -> str:
+        """Formats a summary (see summary) as a string."""
+        lines = ["Frame health"]
+        for worker, s in summary.items():
+            if worker == "saver_queues":
+                for pipeline, depths in s.items():
+                    depths = ", ".join([f"{key}={val}" for key, val in depths.items()])
+                    lines.append(f"saver queues ({pipeline or 'default'} pipeline): max {depths}")
+                continue
+            expected = f"{s['expected_fps']:.1f}" if s["expected_fps"] else "?"
+            lines.append(f"{worker}: {s['frames']} frames, {s['fps']:.1f}/{expected} fps, {s['empty']} empty, "
+                         f"{s['missed']} missed, {s['late']} late, max interval={s['interval_max']:.3f} ms")
+        return "\n".join(lines)
+
+    def save(self, directory, filename):
+        """Saves the summary of the recording as a json file. Clears the log."""
+        if not (len(self) or len(self.queues)):
+            return
+        summary = self.summary()
+        with open(Path(directory).joinpath(filename + "_health.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        print(self.report(summary))
+        self.clear()
@@ -0,0 +1,97 @@
+from .protocol_log import percentiles
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import json
+
+
+class LatencyLog:
+    """Collects latency traces logged by workers (see pydra.core.workers.Worker.trace) for saving alongside pipeline
+    data.
+
+    Each trace contains a list of (stage, time) points, starting from the capture of a frame. The latency of each stage
+    is the time between consecutive points, and the total latency is the time between the first and last point.
+
+    Parameters
+    ----------
+    bin_width : float
+        Width of the bins of the latency histograms (ms).
+
+    Attributes
+    ----------
+    traces : list
+        Logged traces.
+    """
+
+    def __init__(self, bin_width: float = 0.5):
+        self.bin_width = bin_width
+        self.traces = []
+
+    def __len__(self):
+        return len(self.traces)
+
+    def add(self, trace: dict):
+        """Adds a trace logged by a worker."""
+        self.traces.append(trace)
+
+    def clear(self):
+        self.traces = []
+
+    def table(self) -> pd.DataFrame:
+        """Returns the traces as a DataFrame with one row per trace and the time of each point in a column (seconds on
+        the network clock). Traces that followed different paths through the network have missing values."""
+        rows = []
+        for trace in self.traces:
+            row = dict(i=trace["i"])
+            for stage, t in trace["points"]:
+                row[stage] = t
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def histogram(self, values) -> dict:
+        """Returns a histogram of latencies (seconds) with bins of bin_width (ms)."""
+        values = np.asarray(values, dtype="float64") * 1000
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return dict(edges=[], counts=[])
+        edges = np.arange(0, values.max() + self.bin_width, self.bin_width)
+        if len(edges) < 2:
+            edges = np.array([0, self.bin_width])
+        counts, edges = np.histogram(values, bins=edges)
+        return dict(edges=[float(x) for x in edges], counts=[int(x) for x in counts])
+
+    def summarize(self, table: pd.DataFrame) -> dict:
+        """Returns percentiles (ms) and histograms of the latency of each stage and the total latency."""
+        stages = [column for column in table.columns if column != "i"]
+        summary = {}
+        for start, end in zip(stages[:-1], stages[1:]):
+            latency = table[end] - table[start]
+            summary[f"{start} -> {end}"] = dict(percentiles(latency), histogram=self.histogram(latency))
+        total = table[stages[-1]] - table[stages[0]]
+        summary["total"] = dict(percentiles(total), histogram=self.histogram(total))
+        return summary
+
+    @staticmethod
+    def report(summary: dict) -> str:
+        """Formats a summary (see summarize) as a string."""
+        lines = ["Latency (ms)"]
+        for stage, p in summary.items():
+            if "n" not in p:
+                lines.append(f"{stage}: no data")
+                continue
+            lines.append(f"{stage}: p50={p['p50']:.3f}, p90={p['p90']:.3f}, p99={p['p99']:.3f}, max={p['max']:.3f}, "
+                         f"n={p['n']}")
+        return "\n".join(lines)
+
+    def save(self, directory, filename):
+        """Saves the traces as a csv file and a summary of latencies as a json file. Clears the log."""
+        if not len(self):
+            return
+        table = self.table()
+        summary = self.summarize(table)
+        directory = Path(directory)
+        table.to_csv(directory.joinpath(filename + "_latency.csv"), index=False)
+        with open(directory.joinpath(filename + "_latency_summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        print(self.report(summary))
+        self.clear()
@@ -0,0 +1,113 @@
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import json
+
+
+def percentiles(values, q=(50, 90, 99)) -> dict:
+    """Returns percentiles and the maximum of an array of values (converted to milliseconds)."""
+    values = np.asarray(values, dtype="float64") * 1000
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {}
+    summary = dict([(f"p{p}", float(np.percentile(values, p))) for p in q])
+    summary["max"] = float(np.max(values))
+    summary["n"] = int(len(values))
+    return summary
+
+
+class ProtocolLog:
+    """Collects the execution log of protocols for saving alongside pipeline data.
+
+    Pydra logs every step of a protocol (protocol_step) with the time it was scheduled (planned) and the time it was
+    dispatched (actual). Workers log the time that each event sent by a protocol was received (event_received). The
+    ProtocolLog combines these into a table with one row for every step and receiving worker.
+
+    Attributes
+    ----------
+    steps : list
+        Dictionaries of logged protocol steps.
+    receipts : list
+        Dictionaries of logged event receipts.
+    """
+
+    columns = ["rep", "step", "name", "kind", "planned", "dispatched", "worker", "received"]
+
+    def __init__(self):
+        self.steps = []
+        self.receipts = []
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add_step(self, data: dict):
+        """Adds a protocol_step logged by pydra."""
+        self.steps.append(data)
+
+    def add_receipt(self, worker: str, data: dict):
+        """Adds an event_received message logged by a worker."""
+        self.receipts.append(dict(data, worker=worker))
+
+    def clear_receipts(self):
+        """Discards receipts (e.g. receipts of the last events of a previous recording that arrived late)."""
+        self.receipts = []
+
+    def clear(self):
+        self.steps = []
+        self.receipts = []
+
+    def table(self) -> pd.DataFrame:
+        """Returns the log as a DataFrame. Times are given in seconds on the network clock."""
+        steps = pd.DataFrame(self.steps, columns=["rep", "step", "name", "kind", "planned", "actual"])
+        steps.rename(columns={"actual": "dispatched"}, inplace=True)
+        receipts = pd.DataFrame(self.receipts, columns=["rep", "step", "worker", "received"])
+        table = pd.merge(steps, receipts, how="left", on=["rep", "step"])
+        table.sort_values(by=["rep", "step", "worker"], inplace=True)
+        return table[self.columns]
+
+    @staticmethod
+    def summarize(table: pd.DataFrame) -> dict:
+        """Returns percentiles (ms) of the jitter of a protocol log.
+
+        * dispatch: the time between when an event was scheduled and when it was dispatched.
+        * latency: the time between when an event was dispatched and when it was received (for each worker).
+        * total: the time between when an event was scheduled and when it was received (for each worker).
+        """
+        events = table[table["kind"] == "event"]
+        steps = events.drop_duplicates(subset=["rep", "step"])
+        summary = dict(dispatch=percentiles(steps["dispatched"] - steps["planned"]))
+        received = events.dropna(subset=["received"])
+        for worker, worker_events in received.groupby("worker"):
+            summary[worker] = dict(
+                latency=percentiles(worker_events["received"] - worker_events["dispatched"]),
+                total=percentiles(worker_events["received"] - worker_events["planned"])
+            )
+        return summary
+
+    @staticmethod
+    def report(summary: dict) -> str:
+        """Formats a summary (see summarize) as a string."""
+        def fmt(name, p):
+            if not p:
+                return f"{name}: no data"
+            return f"{name}: " + ", ".join([f"{k}={v:.3f}" if k != "n" else f"n={v}" for k, v in p.items()])
+        lines = ["Protocol timing (ms)", fmt("dispatch jitter", summary.get("dispatch", {}))]
+        for worker, worker_summary in summary.items():
+            if worker == "dispatch":
+                continue
+            lines.append(fmt(f"{worker} latency", worker_summary["latency"]))
+            lines.append(fmt(f"{worker} total", worker_summary["total"]))
+        return "\n".join(lines)
+
+    def save(self, directory, filename):
+        """Saves the log as a csv file and a summary of jitter percentiles as a json file. Clears the log."""
+        if not len(self):
+            return
+        table = self.table()
+        summary = self.summarize(table)
+        directory = Path(directory)
+        table.to_csv(directory.joinpath(filename + "_protocol.csv"), index=False)
+        with open(directory.joinpath(filename + "_protocol_summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        print(self.report(summary))
+        self.clear()
@@ -2,11 +2,17 @@ from pydra.core.base import PydraObject
 from pydra.core.process import ProcessMixIn
 from pydra.core.messaging import *
 from .threading import *
+from .protocol_log import ProtocolLog
+from .health import HealthLog
+from .latency import LatencyLog
+from .alignment import FrameMatcher
+from pydra.utilities import clock
 import zmq
 import queue
 from pathlib import Path
 from collections import deque
 import numpy as np
+import json
 
 
 class PydraSaver(PydraObject, ProcessMixIn):
@@ -17,13 +23,25 @@ class PydraSaver(PydraObject, ProcessMixIn):
     pipelines : dict
         Dictionary of workers (as a list of names) assigned to each pipeline (keys). Passed from pydra pipelines
         property.
+    frame_alignment : dict (optional)
+        Keyword arguments for a FrameMatcher (reference, sources, tolerance). If given, frames from different cameras
+        are matched by timestamp while recording and the table of matched frames is saved as {filename}_frames.hdf5.
 
     Attributes
     ----------
     event_log : list
         Logged messages from pydra objects.
+    stats : dict
+        The latest of each periodic log message (see periodic_logs) from each source, by (source, name).
     messages : list
         List of string-type messages received from pydra objects.
+    protocol_log : ProtocolLog
+        Protocol steps logged by pydra and receipts of protocol events logged by workers. Saved when recording stops.
+    health_log : HealthLog
+        Frame health logged by cameras during a recording, and the maximum depth of the queues of each pipeline saver
+        (sampled every queue_interval seconds). Saved as {filename}_health.json when recording stops.
+    latency_log : LatencyLog
+        Latency traces logged by workers during a recording. Saved when recording stops.
     recording : bool
         Stores whether data are currently being saved.
     savers : list
@@ -33,14 +51,22 @@ class PydraSaver(PydraObject, ProcessMixIn):
     """
 
     name = "saver"
+    queue_interval = 0.1
+    periodic_logs = ("frame_health", "capture_stats")  # only the latest is kept until queried
 
-    def __init__(self, pipelines: dict, *args, **kwargs):
+    def __init__(self, pipelines: dict, frame_alignment: dict = None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Add log message handling
         self.msg_handlers["log"] = self.handle_log
         # Create caches for storing worker messages and events
         self.event_log = []
+        self.stats = {}
         self.messages = []
+        self.protocol_log = ProtocolLog()
+        self.health_log = HealthLog()
+        self.latency_log = LatencyLog()
+        self.directory = None
+        self.filename = None
         # Add query events for direct communication with pydra
         self.events["query"] = self._query
         self.events["query_messages"] = self.query_messages
@@ -50,6 +76,11 @@ class PydraSaver(PydraObject, ProcessMixIn):
         self.events["start_recording"] = self.start_recording
         self.events["stop_recording"] = self.stop_recording
         self.recording = False
+        self._t_queues = 0.
+        # Frame alignment
+        self.frame_alignment = frame_alignment
+        self.alignment_q = queue.Queue()
+        self.alignment_thread = None
         # Create pipelines for handling data
         self.savers = []
         self.targets = {}
@@ -66,6 +97,10 @@ class PydraSaver(PydraObject, ProcessMixIn):
     def _process(self):
         """Receive messages from workers."""
         self.poll()
+        if self.recording and (clock.now() - self._t_queues >= self.queue_interval):
+            for pipeline in self.savers:
+                self.health_log.update_queues(pipeline.name, pipeline.queue_depths())
+            self._t_queues = clock.now()
 
     def exit(self, *args, **kwargs):
         """Terminates the process loop."""
@@ -78,11 +113,25 @@ class PydraSaver(PydraObject, ProcessMixIn):
 
         The log is a list of messages sent within the pydra network. Each item in the log contains a timestamp when the
         message was sent, the source of the message, the name of the message, and the data contained within the message.
+        Periodic messages (e.g. frame_health) are not added to the log: only the latest from each source is kept.
         """
         name, data = LOGGED.decode(name, data)
         timestamp = kwargs["timestamp"]
         source = kwargs["source"]
-        self.event_log.append((timestamp, source, name, data))
+        if name == "protocol_step":
+            self.protocol_log.add_step(data)
+        elif name == "event_received":
+            self.protocol_log.add_receipt(source, data)
+        elif name == "record_trace":
+            if self.recording:
+                self.latency_log.add(data)
+        else:
+            if (name == "frame_health") and self.recording:
+                self.health_log.add(source, data)
+            if name in self.periodic_logs:
+                self.stats[(source, name)] = (timestamp, source, name, data)
+            else:
+                self.event_log.append((timestamp, source, name, data))
 
     def _query(self, query_type, **kwargs):
         """Handles any query events received from pydra."""
@@ -99,12 +148,13 @@ class PydraSaver(PydraObject, ProcessMixIn):
         self.zmq_sender.send(b"")
 
     def query_events(self):
-        """Fulfills a request from pydra for logged events."""
-        for event in self.event_log:
+        """Fulfills a request from pydra for logged events and the latest periodic log messages."""
+        for event in self.event_log + list(self.stats.values()):
             serialized = EVENT_INFO.encode(*event)
             self.zmq_sender.send_multipart(serialized, zmq.SNDMORE)
         self.zmq_sender.send(b"")
         self.event_log = []
+        self.stats = {}
 
     def query_data(self):
         """Fulfills a request from pydra for data."""
@@ -135,21 +185,49 @@ class PydraSaver(PydraObject, ProcessMixIn):
     def recv_frame(self, t, i, frame, **kwargs):
         """Sends frame data messages to the appropriate saver."""
         self.targets[kwargs["source"]].update(kwargs["source"], "frame", t, i, frame)
+        if self.alignment_thread is not None:
+            self.alignment_q.put((kwargs["source"], t, i))
 
     def start_recording(self, directory: str = None, filename: str = None, **kwargs):
-        """Implements a start_recording event. Starts saving data."""
+        """Implements a start_recording event. Starts saving data. If the timebase of the network clock is sent with the
+        event, it is saved alongside the data (see save_timebase)."""
         print("START RECORDING")
         if not self.recording:
             for pipeline in self.savers:
                 pipeline.start(directory, filename)
+            if "timebase" in kwargs:
+                self.save_timebase(directory, filename, kwargs["timebase"])
+            self.protocol_log.clear_receipts()
+            self.health_log.clear()
+            self.latency_log.clear()
+            self.directory, self.filename = directory, filename
+            if self.frame_alignment:
+                path = Path(directory).joinpath(filename + "_frames.hdf5")
+                self.alignment_thread = AlignmentThread(path, self.alignment_q, FrameMatcher(**self.frame_alignment))
+                self.alignment_thread.start()
             self.recording = True
 
+    @staticmethod
+    def save_timebase(directory, filename, timebase: dict):
+        """Saves the timebase of the network clock for a recording as a json file. Timestamps in all data files from the
+        recording can be converted to wall-clock time with: epoch + (t - time)."""
+        path = Path(directory).joinpath(filename + "_timebase.json")
+        with open(path, "w") as f:
+            json.dump(timebase, f, indent=2)
+
     def stop_recording(self, **kwargs):
         """Implements a stop_recording event. Stops saving data."""
         print("STOP RECORDING")
         if self.recording:
             for pipeline in self.savers:
                 pipeline.stop()
+            self.protocol_log.save(self.directory, self.filename)
+            self.health_log.save(self.directory, self.filename)
+            self.latency_log.save(self.directory, self.filename)
+            if self.alignment_thread is not None:
+                self.alignment_q.put(None)
+                self.alignment_thread.join()
+                self.alignment_thread = None
             self.recording = False
 
 
@@ -227,7 +305,7 @@ class Saver:
             return
         elif dtype == "timestamped":
             t, data = args
-            self.data_cache[source]["timestamped"] = [(t, data)]
+            self.data_cache[source]["timestamped"].append((t, data))
             return
         else:
             return
@@ -265,6 +343,10 @@ class Saver:
         """Puts timestamped data into appropriate queue for saving."""
         self.timestamped_q.put((source, t, data))
 
+    def queue_depths(self) -> dict:
+        """Returns the number of items waiting in each queue."""
+        return dict(frame=self.frame_q.qsize(), indexed=self.indexed_q.qsize(), timestamped=self.timestamped_q.qsize())
+
     def start(self, directory, filename):
         """Starts threads for saving incoming data."""
         # Create filepath from directory and pipeline
@@ -181,9 +181,48 @@ class IndexedThread(Thread):
                         worker_dset.create_dataset(param, data=np.array(vals))
 
 
+class AlignmentThread(Thread):
+    """Thread for matching frames from multiple cameras by timestamp.
+
+    Parameters
+    ----------
+    path : str
+        Hdf5 file path where the table of matched frames is to be saved.
+    q : queue.Queue
+        Queue that contains the source, time and index of frames.
+    matcher : FrameMatcher
+        Object that matches frames from different sources (see pydra.core.saving.alignment).
+    """
+
+    def __init__(self, path, q, matcher, *args, **kwargs):
+        super().__init__(path, q, *args, **kwargs)
+        self.matcher = matcher
+
+    def dump(self, source, t, i):
+        self.matcher.update(source, t, i)
+
+    def cleanup(self):
+        """Resolves remaining frames and saves the table to an hdf5 file, with a dataset for each column."""
+        self.matcher.flush()
+        if len(self.matcher):
+            with h5py.File(self.path, "w") as f:
+                for column, vals in self.matcher.table().items():
+                    f.create_dataset(column, data=vals)
+                f.attrs["reference"] = self.matcher.reference
+                f.attrs["tolerance"] = self.matcher.tolerance
+
+
 class TimestampedThread(Thread):
     """Thread for saving timestamped data.
 
+    Values are saved in a csv file with a time column and a column for each parameter. Values that are dictionaries
+    containing a "columns" dictionary (e.g. the records of a StimulusLog) are saved as tables in an hdf5 file with the
+    same name: the columns of all values with the same parameter name are concatenated into one dataset each, with a
+    record column giving the index of the value each row came from, and the other entries of each value are saved in a
+    records group (with the time of each value). If the values do not have the same columns, or the shapes of a column
+    differ beyond the first dimension (e.g. positions of a different number of objects), the columns of each value are
+    saved in their own group instead (record0, record1, ...).
+
     Parameters
     ----------
     path : str
@@ -195,15 +234,19 @@ class TimestampedThread(Thread):
     ----------
     data : dict
         Dictionary where incoming data are stored.
+    tables : dict
+        Dictionary where incoming tables are stored.
     """
 
     def __init__(self, path, q, *args, **kwargs):
         super().__init__(path, q, *args, **kwargs)
         self.data = None
+        self.tables = None
 
     def setup(self):
-        """Initializes the data attribute."""
+        """Initializes the data and tables attributes."""
         self.data = {}
+        self.tables = {}
 
     def dump(self, source, t, data):
         """Sorts and places data into the data dictionary.
@@ -217,7 +260,12 @@ class TimestampedThread(Thread):
         """
         for param, val in data.items():
             k = ".".join([source, param])
-            if k in self.data:
+            if isinstance(val, dict) and ("columns" in val):
+                try:
+                    self.tables[k].append((t, val))
+                except KeyError:
+                    self.tables[k] = [(t, val)]
+            elif k in self.data:
                 self.data[k].append((t, val))
             else:
                 self.data[k] = [(t, val)]
@@ -237,3 +285,37 @@ class TimestampedThread(Thread):
             df = pd.concat(dfs, axis=0, ignore_index=True)
             df.sort_values(by=["time"], inplace=True)
             df.to_csv(self.path, index=False)
+        if self.tables:
+            with h5py.File(self.path[:-3] + "hdf5", "w") as f:
+                for param, records in self.tables.items():
+                    self.save_table(f.create_group(param), records)
+
+    @staticmethod
+    def save_table(group, records):
+        """Saves a list of (time, value) records to an hdf5 group."""
+        records = sorted(records, key=lambda record: record[0])
+        t, vals = zip(*records)
+        info = group.create_group("records")
+        info.create_dataset("time", data=np.array(t))
+        for key in vals[0]:
+            if key == "columns":
+                continue
+            values = [val.get(key) for val in vals]
+            if any([value is None for value in values]):
+                continue
+            if isinstance(values[0], str):
+                values = np.array(values, dtype=h5py.string_dtype())
+            info.create_dataset(key, data=values)
+        columns = [dict([(key, np.asarray(col)) for key, col in val["columns"].items()]) for val in vals]
+        keys = list(columns[0])
+        if all([(set(cols) == set(keys)) and all([cols[key].shape[1:] == columns[0][key].shape[1:] for key in keys])
+                for cols in columns]):
+            n_rows = [len(cols[keys[0]]) if len(keys) else 0 for cols in columns]
+            group.create_dataset("record", data=np.repeat(np.arange(len(vals)), n_rows))
+            for key in keys:
+                group.create_dataset(key, data=np.concatenate([cols[key] for cols in columns]))
+        else:
+            for n, cols in enumerate(columns):
+                record = group.create_group(f"record{n}")
+                for key, col in cols.items():
+                    record.create_dataset(key, data=col)
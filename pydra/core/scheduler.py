@@ -0,0 +1,210 @@
+from pydra.utilities.clock import clock
+import time
+
+
+SPIN = 0.002  # time before a deadline at which to stop sleeping and start spinning (seconds)
+
+
+def sleep_until(deadline: float, spin: float = SPIN, interrupt=None) -> bool:
+    """Waits until the given time on the network clock.
+
+    Sleeps until shortly before the deadline, then spins on the clock for the remaining time. The sleep is not precise
+    (it may overshoot by the resolution of the OS scheduler), so the spin time should be larger than the typical
+    overshoot.
+
+    Parameters
+    ----------
+    deadline : float
+        Time to wait until (network clock).
+    spin : float
+        Time before the deadline to start spinning (seconds).
+    interrupt : threading.Event (optional)
+        If given, the wait returns early if the event is set.
+
+    Returns
+    -------
+    bool
+        False if the wait was interrupted, otherwise True.
+    """
+    remaining = deadline - clock.now() - spin
+    if remaining > 0:
+        if interrupt is None:
+            time.sleep(remaining)
+        elif interrupt.wait(remaining):
+            return False
+    while clock.now() < deadline:
+        pass
+    return (interrupt is None) or (not interrupt.is_set())
+
+
+class Step:
+    """A step in a Timeline.
+
+    Parameters
+    ----------
+    index : int
+        Position of the step in the timeline.
+    offset : float
+        Time of the step relative to the start of its segment (seconds).
+    segment : int
+        Index of the segment. Each trigger starts a new segment.
+    name : str
+        Name of the step, used for logging.
+    method : callable
+        The method called by the step (None for triggers).
+    args : tuple
+        Arguments passed to method.
+    kwargs : dict
+        Keyword arguments passed to method.
+    trigger : optional
+        The trigger that the step waits for (None for events).
+    tagged : bool
+        Whether the step is an event broadcast to workers. Tagged steps are called with the protocol_step and
+        protocol_rep keyword arguments, which allows workers to log when they received the event.
+    """
+
+    def __init__(self, index, offset, segment, name, method=None, args=(), kwargs=None, trigger=None, tagged=False):
+        self.index = index
+        self.offset = offset
+        self.segment = segment
+        self.name = name
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.trigger = trigger
+        self.tagged = tagged
+
+    @property
+    def kind(self):
+        return "event" if self.trigger is None else "trigger"
+
+    def __repr__(self):
+        return f"Step({self.index}, {self.name!r}, segment={self.segment}, offset={self.offset:.6f})"
+
+    def __call__(self, rep=0):
+        if self.tagged:
+            return self.method(*self.args, protocol_step=self.index, protocol_rep=rep, **self.kwargs)
+        return self.method(*self.args, **self.kwargs)
+
+
+class Timeline:
+    """A protocol compiled into absolute offsets.
+
+    Waits in a protocol are accumulated into the offset of each event from the start of the repetition, so events are
+    executed against deadlines rather than chained timers and errors do not accumulate across the protocol. Triggers
+    start a new segment, with offsets measured from the time the trigger was received.
+
+    Parameters
+    ----------
+    callback : callable (optional)
+        Called with each entry added to the log (e.g. to broadcast the log over the network).
+
+    Attributes
+    ----------
+    steps : list
+        The events and triggers in the timeline.
+    duration : float
+        The duration of the last segment (including any waits after the last event).
+    log : list
+        A list of dictionaries recording the planned and actual time of every step that has been executed.
+    """
+
+    def __init__(self, callback: callable = None):
+        self.steps = []
+        self.duration = 0.
+        self.segment = 0
+        self.log = []
+        self.callback = callback
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, item):
+        return self.steps[item]
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def add_event(self, method: callable, *args, **kwargs):
+        """Adds an event at the current offset."""
+        name = getattr(method, "__name__", str(method))
+        self.steps.append(Step(len(self.steps), self.duration, self.segment, name, method, args, kwargs))
+
+    def add_broadcast(self, send: callable, event_name: str, **kwargs):
+        """Adds an event that is broadcast to workers with the send method (e.g. send_event) at the current offset. The
+        event is tagged with the protocol step and repetition (see Step)."""
+        self.steps.append(Step(len(self.steps), self.duration, self.segment, event_name, send, (event_name,), kwargs,
+                               tagged=True))
+
+    def add_wait(self, seconds: float):
+        """Adds a wait (seconds)."""
+        self.duration += seconds
+
+    def add_trigger(self, trigger):
+        """Adds a trigger, which starts a new segment."""
+        self.segment += 1
+        self.duration = 0.
+        self.steps.append(Step(len(self.steps), 0., self.segment, "trigger", trigger=trigger))
+
+    def record(self, rep: int, step: Step, planned: float, actual: float) -> dict:
+        """Records the planned and actual time of a step. For events, actual is the time the event was dispatched. For
+        triggers, planned is the time the trigger was armed and actual is the time it was received."""
+        entry = dict(rep=rep, step=step.index, name=step.name, kind=step.kind, planned=planned, actual=actual)
+        self.log.append(entry)
+        if self.callback:
+            self.callback(entry)
+        return entry
+
+
+class Scheduler:
+    """Runs a Timeline in the calling thread (without Qt).
+
+    Triggers in the timeline must implement a blocking receive(timeout) method (e.g. a TriggerListener). If the trigger
+    has a t_received attribute, the following segment is anchored to the time the trigger was received at the source.
+
+    Parameters
+    ----------
+    timeline : Timeline
+        The compiled protocol.
+    repetitions : int
+        Number of times to repeat the timeline.
+    interval : float
+        Time between the end of one repetition and the start of the next (seconds).
+    spin : float
+        Spin time passed to sleep_until (seconds).
+    """
+
+    def __init__(self, timeline: Timeline, repetitions: int = 1, interval: float = 0., spin: float = SPIN):
+        self.timeline = timeline
+        self.repetitions = repetitions
+        self.interval = interval
+        self.spin = spin
+
+    def run(self, interrupt=None) -> bool:
+        """Runs all repetitions of the timeline. Returns False if interrupted (by setting the interrupt event)."""
+        anchor = clock.now()
+        for rep in range(1, self.repetitions + 1):
+            if rep > 1:
+                anchor += self.interval
+                if not sleep_until(anchor, self.spin, interrupt):
+                    return False
+            print(f"Protocol repetition {rep} of {self.repetitions}")
+            for step in self.timeline:
+                if step.trigger is not None:
+                    armed = clock.now()
+                    if not step.trigger.receive(None):
+                        return False
+                    anchor = getattr(step.trigger, "t_received", None) or clock.now()
+                    self.timeline.record(rep, step, armed, anchor)
+                else:
+                    planned = anchor + step.offset
+                    if not sleep_until(planned, self.spin, interrupt):
+                        return False
+                    self.timeline.record(rep, step, planned, clock.now())
+                    step(rep)
+                if (interrupt is not None) and interrupt.is_set():
+                    return False
+            anchor += self.timeline.duration
+            if not sleep_until(anchor, self.spin, interrupt):
+                return False
+        return True
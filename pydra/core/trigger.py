@@ -1,4 +1,5 @@
 from PyQt5 import QtCore
+from .listener import TriggerListener, ZMQListener
 import zmq
 
 
@@ -113,3 +114,67 @@ class ZMQTrigger(Trigger):
     def interrupt(self):
         self.sock.close()
         super().interrupt()
+
+
+class BlockingTrigger(Trigger):
+    """Trigger that blocks on its source instead of polling it from a timer.
+
+    The thread waits directly on a TriggerListener (see pydra.core.listener), so the triggered signal is emitted as soon
+    as the trigger arrives instead of at the next tick of the 1 ms polling timer. The receive time is recorded at the
+    source with the network clock and is emitted with the received signal.
+
+    Parameters
+    ----------
+    listener : TriggerListener
+        The listener that receives triggers.
+    timeout : int (optional)
+        The timeout time of the trigger (in milliseconds).
+
+    Attributes
+    ----------
+    t_received : float
+        Time at which the last trigger was received (network clock).
+    """
+
+    received = QtCore.pyqtSignal(float)
+
+    def __init__(self, listener: TriggerListener, timeout=None):
+        super().__init__(timeout)
+        self.listener = listener
+        self.t_received = None
+
+    def __call__(self):
+        self.listener.reset()
+        self.start()
+
+    def run(self) -> None:
+        self.setup()
+        timeout = self._timeout / 1000. if self._timeout else None
+        try:
+            ret = self.listener.receive(timeout)
+        finally:
+            self.listener.close()
+        if ret:
+            self.t_received = self.listener.t_received
+            self.triggered.emit()
+            self.received.emit(self.t_received)
+        elif self._timeout and not self.isInterruptionRequested():
+            self.timeout.emit()
+
+    def interrupt(self):
+        self.requestInterruption()
+        self.listener.interrupt()
+
+
+class ZMQBlockingTrigger(BlockingTrigger):
+    """Class for receiving triggers over 0MQ with low latency.
+
+    Parameters
+    ----------
+    port : str
+        The port over which to listen for triggers in a PUB/SUB pattern.
+    """
+
+    def __init__(self, port, timeout=None):
+        super().__init__(ZMQListener(port), timeout)
+        self.port = port
@@ -1,11 +1,20 @@
 from pydra.core.base import PydraObject
 from pydra.core.process import ProcessMixIn
-from pydra.core.messaging import LOGGED
+from pydra.core.messaging import LOGGED, EVENT, INDEXED, BATCHED
+from pydra.core.operators import OperatorGraph
+from pydra.utilities.clock import clock, monotonic
+import numpy as np
 
 
 class Worker(PydraObject, ProcessMixIn):
     """Base worker class. Receives and handles messages. Runs in a separate process.
 
+    Parameters
+    ----------
+    operators : iterable (optional)
+        Operators (see pydra.core.operators) that compute derived channels from the indexed data sent by the worker.
+        Derived channels are added to the data before it is sent.
+
     Attributes
     ----------
     name : str
@@ -15,17 +24,21 @@ class Worker(PydraObject, ProcessMixIn):
     pipeline : str
         The name of the pipeline to which this worker belongs. Only necessary if there are multiple data streams that
         need to be saved separately.
+    operators : OperatorGraph
+        Operators applied to indexed data sent by the worker (None if no operators are given).
     """
 
     name = "worker"
     subscriptions = ()
     pipeline = ""
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, operators=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.operators = OperatorGraph(operators) if operators else None
         self.events["_test_connection"] = self._check_connection  # private event to test zmq connections
         self.events["_events_info"] = self._events_info  # private event to log implemented events
         self._connected = 0
+        self._t_received = None  # time at which the last event or data message was received
 
     def _process(self):
         """Handles all messages received over network from ZeroMQ."""
@@ -33,15 +46,105 @@ class Worker(PydraObject, ProcessMixIn):
 
     def _check_connection(self, **kwargs):
         """Called by the 'test_connection' event. Informs pydra that 0MQ connections have been established and worker is
-        receiving messages."""
+        receiving messages. Also synchronizes the worker's clock with the network clock using the time at which the
+        event was sent by pydra (test_connection events are sent repeatedly until all workers are connected, which
+        refines the estimate)."""
+        if "timestamp" in kwargs:
+            clock.synchronize(kwargs["timestamp"], monotonic())
         if not self._connected:
             self._connected = 1
             self.connected()
 
+    def handle_event(self, event_name, event_kw, **kwargs):
+        """Handles EVENT messages received from other objects. Events broadcast by a protocol (which are tagged with a
+        protocol_step) are logged with the time they were received before they are handled."""
+        t = clock.now()
+        self._t_received = t
+        event_name, event_kw = EVENT.decode(event_name, event_kw)
+        if event_name in self.events:
+            if "protocol_step" in event_kw:
+                self.event_received(event_name, event_kw, kwargs["timestamp"], t)
+            event_kw.update(**kwargs)
+            self.events[event_name](**event_kw)
+
+    @INDEXED
+    def send_indexed(self, t, i, data):
+        """Sends indexed data, with any channels derived by the operators of the worker."""
+        if self.operators:
+            data = dict(data, **self.operators.update(t, data))
+        return t, i, data
+
+    @BATCHED
+    def send_batched(self, t, i, data, a):
+        """Sends a batch of indexed data, with any channels derived by the operators of the worker."""
+        if self.operators:
+            data = dict(data, **self.operators.update_batch(t, data))
+        return np.asarray(t, dtype="float64"), np.asarray(i, dtype="int64"), data, np.asarray(a)
+
+    def handle_data(self, *data, **kwargs):
+        """Handles data messages. Records the time at which the message was received (see trace)."""
+        self._t_received = clock.now()
+        super().handle_data(*data, **kwargs)
+
+    def handle_stream(self, *data, **kwargs):
+        """Handles STREAM messages. Records the time at which the message was received (see trace)."""
+        self._t_received = clock.now()
+        super().handle_stream(*data, **kwargs)
+
+    def trace(self, t=None, i=None, **kwargs) -> dict:
+        """Returns a latency trace for the message that is currently being handled.
+
+        A trace follows a frame through the network. It contains the timestamp (t) and index (i) of the frame that it
+        originates from, and a list of (stage, time) points. Traces are started from data derived from a frame (e.g. in
+        recv_indexed, where t and i are the timestamp and index of the frame), and are propagated through events by
+        passing them as the _trace keyword argument of send_event. Each worker that calls trace adds the time at which
+        the message was sent by its source and the time at which it was received. The final worker calls
+        record_trace once the frame has had its effect (e.g. when an actuator has been set).
+
+        Parameters
+        ----------
+        t : float
+            Timestamp of the originating frame (ignored if the message contains a trace).
+        i : int
+            Index of the originating frame (ignored if the message contains a trace).
+
+        Other Parameters
+        ----------------
+        _trace : dict
+            The trace received with an event.
+        source : str
+            Name of the source of the message.
+        timestamp : float
+            Time at which the message was sent.
+        """
+        if "_trace" in kwargs:
+            trace = dict(kwargs["_trace"])
+            trace["points"] = list(trace["points"])
+        else:
+            trace = dict(t=t, i=i, points=[["capture", t]])
+        if "timestamp" in kwargs:
+            trace["points"].append([kwargs.get("source", "unknown") + ".sent", kwargs["timestamp"]])
+        trace["points"].append([self.name + ".received", self._t_received])
+        return trace
+
+    @LOGGED
+    def record_trace(self, trace: dict, stage: str = "done") -> dict:
+        """Completes a latency trace (see trace) with the current time and logs it. Traces are collected by the saver
+        while recording and summarized as latency histograms for each stage."""
+        trace = dict(trace, points=list(trace["points"]) + [[self.name + "." + stage, clock.now()]])
+        return trace
+
+    @LOGGED
+    def event_received(self, event_name, event_kw, sent, received):
+        """Logs the time at which an event sent by a protocol was received."""
+        return dict(event=event_name, rep=event_kw.get("protocol_rep", 0), step=event_kw["protocol_step"], sent=sent,
+                    received=received)
+
     @LOGGED
     def connected(self):
-        """Logs that worker has received the 'test_connection' event."""
-        return dict()
+        """Logs that worker has received the 'test_connection' event. Also advertises the events implemented by the
+        worker, so that pydra can register them without querying workers separately."""
+        return dict(events=[key for key in self.events if not key.startswith("_")])
 
     @LOGGED
     def _events_info(self, **kwargs):
@@ -1,14 +1,100 @@
 from collections import deque
+from bisect import bisect_left, bisect_right
 import numpy as np
 
 
+class EventStore:
+    """Bounded store of timestamped events, keyed by parameter name.
+
+    Each parameter keeps its own time-sorted lists of times and values, so that events within a time window can be
+    found with a binary search. When a parameter exceeds maxlen events, the oldest events are discarded.
+
+    Parameters
+    ----------
+    maxlen : int
+        Maximum number of events stored for each parameter.
+    """
+
+    def __init__(self, maxlen=10000):
+        self.maxlen = maxlen
+        self._times = {}
+        self._values = {}
+
+    def add(self, t, data):
+        """Adds a timestamped data dictionary to the store, splitting it by parameter."""
+        for param, val in data.items():
+            try:
+                times, values = self._times[param], self._values[param]
+            except KeyError:
+                times, values = self._times[param], self._values[param] = [], []
+            if not len(times) or t >= times[-1]:  # events almost always arrive in order
+                times.append(t)
+                values.append(val)
+            else:
+                idx = bisect_right(times, t)
+                times.insert(idx, t)
+                values.insert(idx, val)
+            if len(times) > self.maxlen:
+                n = len(times) - self.maxlen
+                del times[:n]
+                del values[:n]
+
+    def between(self, param, t0=None, t1=None):
+        """Returns times and values of events for the given parameter with t0 <= t <= t1.
+
+        Parameters
+        ----------
+        param : str
+            The name of the parameter (e.g. "laser" in the cache of the optogenetics worker).
+        t0, t1 : float (optional)
+            Start and end of the time window. If None, the window is unbounded on that side.
+
+        Returns
+        -------
+        tuple (np.ndarray, list)
+            Times and values of events within the window.
+        """
+        times = self._times.get(param, [])
+        values = self._values.get(param, [])
+        i0 = 0 if t0 is None else bisect_left(times, t0)
+        i1 = len(times) if t1 is None else bisect_right(times, t1)
+        return np.array(times[i0:i1]), values[i0:i1]
+
+    def last(self, param, t=None):
+        """Returns the (time, value) of the last event for the given parameter at or before time t (or None)."""
+        times = self._times.get(param, [])
+        idx = len(times) if t is None else bisect_right(times, t)
+        if idx:
+            return times[idx - 1], self._values[param][idx - 1]
+        return None
+
+    def keys(self):
+        return self._times.keys()
+
+    def clear(self):
+        self._times = {}
+        self._values = {}
+
+    def __contains__(self, param):
+        return param in self._times
+
+    def __len__(self):
+        return sum([len(times) for times in self._times.values()])
+
+
 class WorkerCache:
+    """Cache of data received from a worker for plotting in the GUI.
+
+    Indexed data are stored in bounded deques. Timestamped data are stored in an EventStore (with times relative to the
+    same t0 as the indexed data), and the most recent events are also available as a list through the events property.
+    """
 
     def __init__(self, cachesize=50000, **kwargs):
         self.cachesize = cachesize
         self.array = np.empty([])
         self._caches = {}
-        self._events = []
+        self._events = deque(maxlen=self.cachesize)
+        self.event_store = EventStore(self.cachesize)
         self._index_cache = deque(maxlen=self.cachesize)
         self._time_cache = deque(maxlen=self.cachesize)
 
@@ -23,7 +109,9 @@ class WorkerCache:
             except KeyError:
                 self._caches[param] = deque(maxlen=self.cachesize)
                 self._caches[param].extend(vals)
-        self._events.extend(data.get("timestamped", []))
+        for (t, event) in data.get("timestamped", []):
+            self._events.append((t, event))
+            self.event_store.add(t - t0, event)
         if len(frame.shape):
             self.array = frame
 
@@ -32,7 +120,8 @@ class WorkerCache:
         self._time_cache.clear()
         for param, cache in self._caches.items():
             cache.clear()
-        self._events = []
+        self._events.clear()
+        self.event_store.clear()
 
     def set_cachesize(self, size):
         self.cachesize = size
@@ -40,6 +129,8 @@ class WorkerCache:
         self._time_cache = deque(maxlen=self.cachesize)
         for param in self._caches.keys():
             self._caches[param] = deque(maxlen=self.cachesize)
+        self._events = deque(self._events, maxlen=self.cachesize)
+        self.event_store.maxlen = self.cachesize
 
     @property
     def index(self):
@@ -53,6 +144,11 @@ class WorkerCache:
     def events(self):
         return self._events
 
+    def events_between(self, param, t0=None, t1=None):
+        """Returns times and values of timestamped events for a parameter between t0 and t1 (relative to t0 of the
+        last update). See EventStore.between."""
+        return self.event_store.between(param, t0, t1)
+
     def __getitem__(self, item):
         try:
             return np.array(self._caches[item], dtype=np.float)
@@ -32,9 +32,9 @@ class MainWindow(QtWidgets.QMainWindow, StateEnabled):
         self.setMenuBar(QtWidgets.QMenuBar())
         self.windowMenu = self.menuWidget().addMenu("Window")
 
-        # Get worker events for building protocols
-        self.worker_events = self.pydra.worker_events
-        self.protocol_window = ProtocolWindow(self.worker_events, self.pydra.protocols, parent=self)
+        # Get worker events for building protocols (workers that register late are added when they connect)
+        self.protocol_window = ProtocolWindow(self.pydra.worker_events, self.pydra.protocols, parent=self)
+        self.pydra.events_registered.connect(self.protocol_window.addWorkerEvents)
         self.addDockWidget(QtCore.Qt.LeftDockWidgetArea, self.protocol_window)
 
         # Add toolbar for recording
@@ -71,8 +71,9 @@ class MainWindow(QtWidgets.QMainWindow, StateEnabled):
 
         # Send any missed events to widgets
         for worker, log in self.pydra._event_log.items():
-            for (t, event_name, event_kw) in log:
-                self.controllers[worker].receiveLogged(event_name, event_kw)
+            if worker in self.controllers:
+                for (t, event_name, event_kw) in log:
+                    self.controllers[worker].receiveLogged(event_name, event_kw)
 
         # Plotting update timer
         self.update_interval = 30
@@ -80,6 +81,11 @@ class MainWindow(QtWidgets.QMainWindow, StateEnabled):
         self.update_timer.setInterval(self.update_interval)
         self.update_timer.timeout.connect(self.update_plots)
         self.update_timer.start()
+        # Connection timer for late workers
+        self.connection_timer = QtCore.QTimer()
+        self.connection_timer.setInterval(1000)
+        self.connection_timer.timeout.connect(self.pydra.check_connections)
+        self.connection_timer.start()
 
         # =======================
         # Start the state machine
@@ -131,7 +137,8 @@ class MainWindow(QtWidgets.QMainWindow, StateEnabled):
         ret, log = self.pydra.request_events()
         if ret:
             for (t, worker, event_name, event_kw) in log:
-                self.controllers[worker].receiveLogged(event_name, event_kw)
+                if worker in self.controllers:
+                    self.controllers[worker].receiveLogged(event_name, event_kw)
 
     def enterRunning(self):
         for worker, cache in self.caches.items():
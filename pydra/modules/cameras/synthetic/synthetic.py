@@ -0,0 +1,171 @@
+from pydra.modules.cameras.worker import CameraAcquisition, setter
+from pydra.core.scheduler import sleep_until
+from pydra.utilities import clock
+import numpy as np
+
+
+def generate_frames(frame_size: tuple, n_frames: int, pattern: str = "noise", seed: int = 0) -> np.ndarray:
+    """Generates synthetic frames.
+
+    Parameters
+    ----------
+    frame_size : tuple
+        (Width, height) of the frames in pixels.
+    n_frames : int
+        Number of frames to generate.
+    pattern : str
+        "noise" (uniform random noise), "gradient" (a horizontal gradient that scrolls across the frame) or "dot" (a
+        bright dot that moves in a circle on a dark background).
+    seed : int
+        Seed for the random number generator.
+
+    Returns
+    -------
+    np.ndarray
+        Array of uint8 frames with shape (n_frames, height, width).
+    """
+    width, height = frame_size
+    if pattern == "noise":
+        rng = np.random.default_rng(seed)
+        return rng.integers(0, 256, (n_frames, height, width), dtype="uint8")
+    frames = np.zeros((n_frames, height, width), dtype="uint8")
+    if pattern == "gradient":
+        x = np.arange(width)
+        for i in range(n_frames):
+            frames[i] = ((x + (i * width) // n_frames) % width * 255 // max(width - 1, 1)).astype("uint8")
+    elif pattern == "dot":
+        yy, xx = np.mgrid[:height, :width]
+        r = min(width, height) / 4.
+        for i in range(n_frames):
+            theta = 2 * np.pi * i / n_frames
+            cx, cy = width / 2. + r * np.cos(theta), height / 2. + r * np.sin(theta)
+            frames[i][(xx - cx) ** 2 + (yy - cy) ** 2 < (r / 4.) ** 2] = 255
+    else:
+        raise ValueError(f"Unknown pattern: {pattern}")
+    return frames
+
+
+def load_frames(filepath: str, n_frames: int = None) -> np.ndarray:
+    """Decodes a video file into memory as an array of grayscale frames with shape (n_frames, height, width)."""
+    import cv2
+    cap = cv2.VideoCapture(str(filepath))
+    frames = []
+    while (n_frames is None) or (len(frames) < n_frames):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+    if not len(frames):
+        raise IOError(f"Could not read frames from {filepath}")
+    return np.array(frames)
+
+
+class SyntheticCamera(CameraAcquisition):
+    """Camera that produces frames at a precise rate without hardware, for testing and benchmarking pipelines.
+
+    Frames are generated (or decoded from a video) once and held in memory, and are looped during acquisition. Frames
+    are paced against deadlines on the network clock (a coarse sleep followed by a spin), so frame rates of several kHz
+    can be produced without timing drift. If acquisition falls behind by more than one frame, the deadline is reset
+    and the number of late frames is counted. Deadlines that were skipped are counted by the frame counter, so they are
+    reported as missed frames in the frame health (like frames dropped by a hardware camera).
+
+    Parameters
+    ----------
+    pattern : str
+        Pattern of generated frames (see generate_frames). Ignored if filepath is given.
+    n_frames : int
+        Number of frames to generate (or maximum number of frames to decode from filepath).
+    filepath : str (optional)
+        Path to a video file. If given, frames are decoded from the video instead of generated, and the frame size is
+        taken from the video.
+
+    Attributes
+    ----------
+    frames : np.ndarray
+        The frames that are looped during acquisition, with shape (n_frames, height, width).
+    late : int
+        Number of frames that could not be produced on time.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, *args, pattern="noise", n_frames=100, filepath=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pattern = pattern
+        self.n_frames = n_frames
+        self.filepath = filepath
+        self.frames = None
+        self.late = 0
+        self._k = 0
+        self._period = 0.
+        self._deadline = None
+        self._counter = -1
+
+    def setup(self):
+        self.set_params(self.params)
+
+    @setter
+    def frame_rate(self, fps: float):
+        if fps is None:
+            fps = 100.
+        self._period = 1. / fps
+        self._deadline = None
+        return fps
+
+    @setter
+    def frame_size(self, wh: tuple):
+        if self.filepath is not None:  # frame size is determined by the video
+            if self.frames is None:
+                self.frames = load_frames(self.filepath, self.n_frames)
+            return self.frames.shape[1:][::-1]
+        if wh is None:
+            wh = (640, 480)
+        wh = tuple(int(x) for x in wh)
+        if (self.frames is None) or (self.frames.shape[1:][::-1] != wh):
+            self.frames = generate_frames(wh, self.n_frames, self.pattern)
+            self._k = 0
+        return wh
+
+    @setter
+    def offsets(self, xy: tuple):
+        return xy
+
+    @setter
+    def exposure(self, u: float):
+        return u
+
+    @setter
+    def gain(self, val: float):
+        return val
+
+    def _wait(self):
+        """Waits until the deadline of the next frame."""
+        now = clock.now()
+        if (self._deadline is None) or (now - self._deadline > self._period):
+            if self._deadline is not None:
+                self.late += 1
+                self._counter += int((now - self._deadline) / self._period)
+            self._deadline = now
+        sleep_until(self._deadline, spin=min(0.002, self._period))
+        self._deadline += self._period
+        self._counter += 1
+
+    def frame_counter(self):
+        """Returns the number of frame deadlines (including skipped deadlines) before the last frame."""
+        return self._counter
+
+    def read(self):
+        self._wait()
+        frame = self.frames[self._k]
+        self._k = (self._k + 1) % len(self.frames)
+        return frame
+
+    def read_into(self, buffer):
+        self._wait()
+        frame = self.frames[self._k]
+        self._k = (self._k + 1) % len(self.frames)
+        if frame.shape == buffer.shape:
+            buffer[:] = frame
+            return buffer
+        return frame.copy()
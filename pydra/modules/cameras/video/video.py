@@ -1,14 +1,108 @@
 from pydra.modules.cameras.worker import CameraAcquisition, setter
+from pydra.core.scheduler import sleep_until
+from pydra.utilities import clock
+from pathlib import Path
+import numpy as np
+import hashlib
+import json
 import cv2
 
 
+CACHE_DIR = Path.home().joinpath(".pydra", "video_cache")
+
+
+def file_hash(filepath, chunk_size: int = 2 ** 20) -> str:
+    """Returns the sha1 hash of the contents of a file (read in chunks, so large videos are not loaded into memory)."""
+    h = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def video_cache(filepath, cache_dir=None) -> np.memmap:
+    """Returns the frames of a video as a read-only memory-mapped array of grayscale frames.
+
+    The first time a video is opened, every frame is decoded, converted to grayscale and written to a raw file in the
+    cache directory, alongside a json file recording the shape of the array. The cache is keyed by the hash of the video
+    file, so it is reused across runs (and if the video is moved or renamed) and is rebuilt if the video changes.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the video file.
+    cache_dir : str (optional)
+        Directory in which to store cached videos. Defaults to ~/.pydra/video_cache.
+
+    Returns
+    -------
+    np.memmap
+        Array of uint8 frames with shape (n_frames, height, width).
+    """
+    cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = file_hash(filepath)
+    raw_path = cache_dir.joinpath(key + ".raw")
+    info_path = cache_dir.joinpath(key + ".json")
+    if not info_path.exists():
+        print(f"Caching {filepath} in {cache_dir}")
+        cap = cv2.VideoCapture(str(filepath))
+        n_frames = 0
+        shape = None
+        tmp_path = raw_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                shape = frame.shape
+                f.write(np.ascontiguousarray(frame).tobytes())
+                n_frames += 1
+        cap.release()
+        if not n_frames:
+            tmp_path.unlink()
+            raise IOError(f"Could not read frames from {filepath}")
+        tmp_path.replace(raw_path)
+        # the json file is written last, so an interrupted decode is never mistaken for a complete cache
+        with open(info_path, "w") as f:
+            json.dump(dict(source=str(filepath), shape=[n_frames, *shape], dtype="uint8"), f)
+    with open(info_path, "r") as f:
+        info = json.load(f)
+    return np.memmap(raw_path, dtype=info["dtype"], mode="r", shape=tuple(info["shape"]))
+
+
 class VideoWorker(CameraAcquisition):
+    """Camera that plays back frames from a video file.
+
+    Parameters
+    ----------
+    filepath : str
+        Path to the video file.
+    cached : bool
+        If True, the video is decoded once into a memory-mapped grayscale cache on disk (see video_cache) and frames
+        are read from the cache. Otherwise, frames are decoded during playback, which limits the frame rate to the
+        speed of the codec.
+    cache_dir : str (optional)
+        Directory in which to store cached videos.
+
+    Notes
+    -----
+    In cached mode, frames are paced against deadlines on the network clock at the frame rate. Setting the frame rate
+    to None (or zero) plays frames back as fast as possible.
+    """
 
     name = "video"
 
-    def __init__(self, filepath, *args, **kwargs):
+    def __init__(self, filepath, cached=False, cache_dir=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.filepath = str(filepath)
+        self.cached = cached
+        self.cache_dir = cache_dir
+        self.frames = None
+        self._k = 0
+        self._period = 0.
+        self._deadline = None
 
     @property
     def t(self):
@@ -20,13 +114,40 @@ class VideoWorker(CameraAcquisition):
 
     @setter
     def frame_rate(self, val):
-        self._frame_rate = val
-        self._t = max(1, int(1000 / val))
+        self._period = (1. / val) if val else 0.
+        self._deadline = None
+        self._t = max(1, int(1000 * self._period))
+        return val
 
     def setup(self):
-        self.cap = cv2.VideoCapture(self.filepath)
+        if self.cached:
+            self.frames = video_cache(self.filepath, self.cache_dir)
+            self.frame_rate = self.params["frame_rate"]
+        else:
+            self.cap = cv2.VideoCapture(self.filepath)
+
+    def _wait(self):
+        """Waits until the deadline of the next frame (cached mode)."""
+        if not self._period:
+            return
+        now = clock.now()
+        if (self._deadline is None) or (now - self._deadline > self._period):
+            self._deadline = now
+        sleep_until(self._deadline, spin=min(0.002, self._period))
+        self._deadline += self._period
+
+    def _next_cached(self):
+        if self._k >= len(self.frames):
+            self._k = 0
+            self.reset_frame_number()
+        self._wait()
+        frame = self.frames[self._k]
+        self._k += 1
+        return frame
 
     def read(self):
+        if self.cached:
+            return np.array(self._next_cached())
         if self.cap.get(cv2.CAP_PROP_POS_FRAMES) >= self.frame_count:
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
             self.reset_frame_number()
@@ -35,6 +156,17 @@ class VideoWorker(CameraAcquisition):
         cv2.waitKey(self.t)
         return frame
 
+    def read_into(self, buffer):
+        if not self.cached:
+            return super().read_into(buffer)
+        frame = self._next_cached()
+        if frame.shape == buffer.shape:
+            np.copyto(buffer, frame)
+            return buffer
+        return np.array(frame)
+
     @property
     def frame_count(self):
+        if self.cached:
+            return len(self.frames)
         return self.cap.get(cv2.CAP_PROP_FRAME_COUNT)
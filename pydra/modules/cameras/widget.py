@@ -101,6 +101,30 @@ class ExposureWidget(ParameterGroupBox):
         return {"exposure": exposure, "gain": gain}
 
 
+class FrameHealthWidget(QtWidgets.QGroupBox):
+    """Displays the frame_health logged by a camera: the effective frame rate, counts of empty, missed and late frames,
+    and the histogram of frame intervals."""
+
+    def __init__(self, **kwargs):
+        super().__init__("Frame health")
+        self.setLayout(QtWidgets.QVBoxLayout())
+        self.rate_label = QtWidgets.QLabel("-")
+        self.counts_label = QtWidgets.QLabel("-")
+        self.histogram_label = QtWidgets.QLabel("-")
+        for label in (self.rate_label, self.counts_label, self.histogram_label):
+            self.layout().addWidget(label)
+
+    def update_health(self, fps=0., expected_fps=None, empty=0, missed=0, late=0, interval_max=0., bins=(),
+                      histogram=(), **kwargs):
+        expected = f"{expected_fps:.1f}" if expected_fps else "?"
+        self.rate_label.setText(f"{fps:.1f} / {expected} fps (max interval {interval_max:.1f} ms)")
+        self.counts_label.setText(f"empty: {empty}  missed: {missed}  late: {late}")
+        self.histogram_label.setText("  ".join([f"\u2265{b:g}T: {n}" for b, n in zip(bins, histogram)]))
+        # Highlight problems
+        ok = not (empty or missed or late)
+        self.counts_label.setStyleSheet("" if ok else "color: red")
+
+
 class CameraWidget(ControlWidget):
 
     def __init__(self, *args, **kwargs):
@@ -119,6 +143,9 @@ class CameraWidget(ControlWidget):
         self.exposure_widget = ExposureWidget(**kwargs.get("params", {}))
         self.exposure_widget.param_changed.connect(self.param_changed)
         self.layout().addWidget(self.exposure_widget, alignment=QtCore.Qt.AlignTop)
+        # Frame health
+        self.health_widget = FrameHealthWidget()
+        self.layout().addWidget(self.health_widget, alignment=QtCore.Qt.AlignTop)
 
     def set_params(self, **kwargs):
         if "frame_size" in kwargs:
@@ -134,6 +161,9 @@ class CameraWidget(ControlWidget):
         if (exposure is not None) or (gain is not None):
             self.exposure_widget.set_values(exposure, gain)
 
+    def frame_health(self, **kwargs):
+        self.health_widget.update_health(**kwargs)
+
     @QtCore.pyqtSlot(dict)
     def param_changed(self, new_params):
         self.send_event("set_params", params=new_params)
@@ -152,10 +182,20 @@ class CameraWidget(ControlWidget):
 
 
 class FramePlotter(Plotter):
+    """Plotter for displaying frames from a camera.
+
+    Setting "fast_preview" to True in the params dictionary of the module displays frames with fixed levels (set with
+    "preview_levels", default is (0, 255)) using a PreviewImageItem, which is much cheaper than pg.ImageItem for
+    high-resolution uint8 frames.
+    """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.addImagePlot("frame", pen=None, symbol='o')
+        params = kwargs.get("params", {})
+        if params.get("fast_preview", False):
+            self.addPreviewPlot("frame", levels=params.get("preview_levels", (0, 255)))
+        else:
+            self.addImagePlot("frame", pen=None, symbol='o')
 
     def updatePlots(self, data_cache, **kwargs):
         self.updateImage("frame", data_cache.array)
@@ -1,7 +1,9 @@
 from pydra.core import Acquisition
-from pydra.core.messaging import LOGGED
-import time
+from pydra.core.messaging import LOGGED, STREAM
+from pydra.utilities import clock
 import numpy as np
+import threading
+import queue
 
 
 class setter:
@@ -23,9 +25,186 @@ class setter:
         return getattr(instance, self.private_name)
 
 
+class FramePool:
+    """Pool of preallocated frame buffers.
+
+    Buffers are taken from the pool when a frame is captured and returned once the frame has been sent. The pool never
+    allocates more than size buffers: if all buffers are in use, acquire returns None. If the shape or dtype of frames
+    changes (e.g. when the frame size is set), buffers with the old shape are discarded as they are returned.
+
+    Parameters
+    ----------
+    size : int
+        Maximum number of buffers.
+
+    Attributes
+    ----------
+    shape : tuple
+        Shape of buffers in the pool.
+    dtype : np.dtype
+        Dtype of buffers in the pool.
+    allocated : int
+        Number of buffers currently allocated.
+    """
+
+    def __init__(self, size: int = 8):
+        self.size = size
+        self.shape = None
+        self.dtype = None
+        self.allocated = 0
+        self._free = []
+        self._lock = threading.Lock()
+
+    @property
+    def occupancy(self) -> int:
+        """Returns the number of buffers that are currently in use."""
+        return self.allocated - len(self._free)
+
+    def acquire(self, shape: tuple, dtype="uint8"):
+        """Returns a buffer with the given shape and dtype, or None if all buffers are in use."""
+        dtype = np.dtype(dtype)
+        with self._lock:
+            if (shape != self.shape) or (dtype != self.dtype):
+                self.shape, self.dtype = shape, dtype
+                self.allocated -= len(self._free)
+                self._free = []
+            if len(self._free):
+                return self._free.pop()
+            if self.allocated < self.size:
+                self.allocated += 1
+                return np.empty(shape, dtype=dtype)
+        return None
+
+    def release(self, buffer: np.ndarray):
+        """Returns a buffer to the pool."""
+        with self._lock:
+            if (buffer.shape == self.shape) and (buffer.dtype == self.dtype):
+                self._free.append(buffer)
+            else:
+                self.allocated -= 1
+
+
+class FrameHealth:
+    """Monitors the timing of frames acquired by a camera.
+
+    Counts frames, empty frames (e.g. frames that the camera failed to deliver) and gaps in the hardware frame counter
+    (frames dropped by the camera or driver), and collects the intervals between consecutive frames. The intervals are
+    summarized as the effective frame rate and a histogram of intervals relative to the expected interval.
+
+    Parameters
+    ----------
+    bins : tuple
+        Lower edges of the histogram bins, as multiples of the expected frame interval. The last bin has no upper edge.
+    """
+
+    bins = (0., 0.5, 0.9, 1.1, 1.5, 2.5)
+
+    def __init__(self, bins: tuple = None):
+        if bins is not None:
+            self.bins = tuple(bins)
+        self.t_last = None
+        self.counter_last = None
+        self.reset()
+
+    def reset(self):
+        """Resets the counts (the last frame time and counter are kept, so intervals are continuous across resets)."""
+        self.frames = 0
+        self.empty = 0
+        self.missed = 0
+        self.intervals = []
+
+    def update(self, t: float, empty: bool = False, counter: int = None):
+        """Adds a frame acquired at time t, with the value of the hardware frame counter (if available)."""
+        if empty:
+            self.empty += 1
+            return
+        self.frames += 1
+        if self.t_last is not None:
+            self.intervals.append(t - self.t_last)
+        self.t_last = t
+        if counter is not None:
+            if (self.counter_last is not None) and (counter > self.counter_last + 1):
+                self.missed += counter - self.counter_last - 1
+            self.counter_last = counter
+
+    def summary(self, frame_rate: float = None) -> dict:
+        """Returns a summary of frames since the last reset.
+
+        The histogram is computed relative to the expected interval (1 / frame_rate), or the median interval if the
+        frame rate is not given. Intervals are given in milliseconds.
+        """
+        intervals = np.array(self.intervals, dtype="float64")
+        duration = float(intervals.sum())
+        summary = dict(frames=self.frames, empty=self.empty, missed=self.missed, intervals=len(intervals),
+                       duration=duration, fps=(len(intervals) / duration) if duration > 0 else 0.,
+                       expected_fps=float(frame_rate) if frame_rate else None, bins=list(self.bins))
+        if len(intervals):
+            period = (1. / frame_rate) if frame_rate else float(np.median(intervals))
+            ratios = intervals / period if period > 0 else np.zeros(len(intervals))
+            counts, _ = np.histogram(ratios, bins=list(self.bins) + [np.inf])
+            summary.update(interval_mean=float(intervals.mean() * 1000), interval_max=float(intervals.max() * 1000),
+                           late=int(np.sum(ratios >= 1.5)), histogram=[int(c) for c in counts])
+        else:
+            summary.update(interval_mean=0., interval_max=0., late=0, histogram=[0] * len(self.bins))
+        return summary
+
+
+class FrameStream:
+    """Crops and bins frames for a single subscriber.
+
+    Parameters
+    ----------
+    name : str
+        Name of the subscriber that receives the stream.
+    roi : tuple (optional)
+        (x, y, width, height) of the region of the full frame to send. If not given, the full frame is binned.
+    binning : int
+        Number of pixels that are averaged into one pixel in each dimension. The region is truncated to a multiple of
+        the binning.
+
+    Attributes
+    ----------
+    message : StreamMessage
+        The message used to send the stream.
+    """
+
+    def __init__(self, name: str, roi: tuple = None, binning: int = 1):
+        self.name = name
+        self.roi = tuple(int(x) for x in roi) if roi is not None else None
+        self.binning = max(1, int(binning))
+        offset = self.roi[:2] if self.roi is not None else (0, 0)
+        self.message = STREAM(name, offset, self.binning)
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        """Returns the cropped and binned frame."""
+        if self.roi is not None:
+            x, y, w, h = self.roi
+            frame = frame[y:y + h, x:x + w]
+        if self.binning > 1:
+            b = self.binning
+            h, w = frame.shape[0] // b, frame.shape[1] // b
+            binned = frame[:h * b, :w * b].reshape((h, b, w, b) + frame.shape[2:])
+            frame = binned.mean(axis=(1, 3), dtype="float32").astype(frame.dtype)
+        return frame
+
+
 class CameraAcquisition(Acquisition):
     """Base class for cameras.
 
+    Parameters
+    ----------
+    threaded : bool
+        If True, frames are captured in a separate thread and copied into a FramePool, and frames are published from
+        the main loop (which also handles events). Otherwise, frames are captured and published serially in the main
+        loop.
+    pool_size : int
+        Number of buffers in the frame pool.
+    stats_interval : float
+        Interval between capture_stats log messages (seconds).
+    streams : dict (optional)
+        Dictionary mapping the names of subscribers onto stream specifications (dictionaries of keyword arguments for
+        FrameStream). Usually assigned by Pydra.configure from the "streams" key of subscribing modules.
+
     Attributes
     ----------
     frame_size : tuple
@@ -42,6 +221,27 @@ class CameraAcquisition(Acquisition):
         Camera object from API.
     frame_number : int
         The current frame number of the acquisition.
+    pool : FramePool
+        Reusable buffers for frames that have been captured but not yet published and sent.
+    health : FrameHealth
+        Monitors the timing of frames, which is logged every stats_interval with the frame_health message.
+    streams : list
+        FrameStream objects. Each stream is sent to a single subscriber after the full frame is published.
+
+    Notes
+    -----
+    Frames are read into buffers from the pool with the read_into method, and are sent over 0MQ without copying. A
+    buffer returns to the pool only once 0MQ has finished sending it, so frames are never overwritten while they are
+    being sent.
+
+    In threaded mode, the capture thread only reads frames into the pool, so slow serialization or a burst of events
+    does not delay the next read from the camera. Access to the camera from set_params is serialized with the capture
+    thread by a lock. Frames are dropped if the main loop falls behind by more than pool_size frames. The capture_stats
+    log message reports the capture-to-publish latency, the pool occupancy and the number of dropped frames.
+
+    Empty frames (returned when the camera fails to deliver a frame) are not published, but are counted by the health
+    monitor. Subclasses can implement frame_counter to report the hardware frame counter, so that frames dropped by the
+    camera are also counted.
     """
 
     def __init__(
@@ -51,6 +251,10 @@ class CameraAcquisition(Acquisition):
             offsets: tuple = None,
             exposure: int = None,
             gain: float = None,
+            threaded: bool = False,
+            pool_size: int = 8,
+            stats_interval: float = 1.,
+            streams: dict = None,
             *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.params = dict(
@@ -64,33 +268,206 @@ class CameraAcquisition(Acquisition):
         self.events["start_recording"] = self.reset_frame_number
         self.camera = None
         self.frame_number = 0
+        # Threaded capture
+        self.threaded = threaded
+        self.pool = FramePool(pool_size)
+        self.stats_interval = stats_interval
+        self._camera_lock = threading.Lock()
+        self._captured = queue.Queue()
+        self._in_flight = []
+        self._capture_thread = None
+        self._capture_stop = threading.Event()
+        self.health = FrameHealth()
+        self._reset_stats()
+        # Cropped or binned streams for subscribers
+        self.streams = [FrameStream(name, **spec) for name, spec in (streams or {}).items()]
 
     def acquire(self):
         """Implements the acquire method for an acquisition object.
 
-        Retrieves a frame with the read method, computes the timestamp, publishes the frame data over 0MQ and then
-        increments the frame number.
+        Retrieves a frame into a buffer from the pool, computes the timestamp, publishes the frame data over 0MQ and
+        then increments the frame number. In threaded mode, publishes frames that have been captured by the capture
+        thread.
         """
-        frame = self.read()
-        t = time.time()
-        self.send_frame(t, self.frame_number, frame)
+        if self.threaded:
+            self._publish()
+            return
+        frame, pooled = self._grab()
+        counter = self.frame_counter()
+        t = clock.now()
+        self._send(t, frame, pooled, counter)
+        self._update_stats(0., self.pool.occupancy)
+
+    def _grab(self):
+        """Reads the next frame into a buffer from the pool. Returns the frame and whether it is a pool buffer.
+
+        The shape of buffers is taken from the last frame. If all buffers are in use (e.g. because frames are still
+        being sent to slow subscribers), the frame is read into a new array instead.
+        """
+        if self.pool.shape is not None:
+            buffer = self.pool.acquire(self.pool.shape, self.pool.dtype)
+            if buffer is None:
+                self._unpooled += 1
+                return self.read(), False
+            frame = self.read_into(buffer)
+            if frame is buffer:
+                return buffer, True
+            self.pool.release(buffer)
+        else:
+            frame = self.read()
+        if not frame.size:  # empty frames are not copied into the pool
+            return frame, False
+        buffer = self.pool.acquire(frame.shape, frame.dtype)  # frame shape has changed
+        if buffer is None:
+            self._unpooled += 1
+            return frame, False
+        np.copyto(buffer, frame)
+        return buffer, True
+
+    def _send(self, t, frame, pooled, counter=None):
+        """Publishes a frame. Pool buffers are sent without copying and are returned to the pool once sent. Empty frames
+        are only counted by the health monitor."""
+        self.health.update(t, not frame.size, counter)
+        if not frame.size:
+            self._recycle()
+            return
+        if pooled:
+            tracker = self.send_frame(t, self.frame_number, frame, track=True)
+            self._in_flight.append((tracker, frame))
+        else:
+            self.send_frame(t, self.frame_number, frame)
+        for stream in self.streams:
+            self.send_stream(stream, t, self.frame_number, frame)
         self.frame_number += 1
+        self._recycle()
+
+    def send_stream(self, stream: FrameStream, t: float, i: int, frame: np.ndarray):
+        """Sends a cropped or binned frame to the subscriber of a stream."""
+        self.zmq_publisher.send_serialized((self, self.send_stream, (t, i, stream(frame))), stream.message.serializer)
+
+    def _recycle(self):
+        """Returns buffers to the pool once 0MQ has finished sending them."""
+        in_flight = []
+        for tracker, buffer in self._in_flight:
+            if tracker.done:
+                self.pool.release(buffer)
+            else:
+                in_flight.append((tracker, buffer))
+        self._in_flight = in_flight
+
+    def _capture(self):
+        """Capture thread. Reads frames from the camera into buffers from the pool."""
+        while not self._capture_stop.is_set():
+            with self._camera_lock:
+                frame, pooled = self._grab()
+                counter = self.frame_counter()
+            t = clock.now()
+            if self._captured.qsize() >= self.pool.size:  # main loop has fallen behind
+                self._dropped += 1
+                if pooled:
+                    self.pool.release(frame)
+                continue
+            self._captured.put((t, frame, pooled, counter))
+
+    def _publish(self):
+        """Publishes frames that have been captured by the capture thread."""
+        if self._capture_thread is None:
+            self._capture_thread = threading.Thread(target=self._capture, daemon=True)
+            self._capture_thread.start()
+        try:
+            t, frame, pooled, counter = self._captured.get(timeout=0.001)
+        except queue.Empty:
+            self._recycle()
+            return
+        while True:
+            occupancy = self.pool.occupancy
+            self._send(t, frame, pooled, counter)
+            self._update_stats(clock.now() - t, occupancy)
+            try:
+                t, frame, pooled, counter = self._captured.get_nowait()
+            except queue.Empty:
+                break
+
+    def _reset_stats(self):
+        self._latencies = []
+        self._max_occupancy = 0
+        self._dropped = 0
+        self._unpooled = 0
+        self._t_stats = clock.now()
+
+    def _update_stats(self, latency, occupancy):
+        self._latencies.append(latency)
+        self._max_occupancy = max(self._max_occupancy, occupancy)
+        if clock.now() - self._t_stats >= self.stats_interval:
+            self.capture_stats()
+            self.frame_health()
+            self._reset_stats()
+
+    @LOGGED
+    def capture_stats(self):
+        """Logs statistics of frame capture since the last log: the number of frames published, the mean and maximum
+        capture-to-publish latency (ms, threaded capture only), the maximum number of pool buffers in use, the number
+        of frames that could not use a pool buffer and the number of dropped frames."""
+        latencies = np.array(self._latencies) * 1000
+        return dict(frames=len(latencies),
+                    latency_mean=float(latencies.mean()) if len(latencies) else 0.,
+                    latency_max=float(latencies.max()) if len(latencies) else 0.,
+                    pool_occupancy=self._max_occupancy,
+                    pool_size=self.pool.size,
+                    unpooled=self._unpooled,
+                    dropped=self._dropped)
+
+    @LOGGED
+    def frame_health(self):
+        """Logs the health of the acquisition since the last log (see FrameHealth.summary): the effective and expected
+        frame rate, the number of frames, empty frames and frames missed by the camera, and a histogram of frame
+        intervals."""
+        summary = self.health.summary(self.params.get("frame_rate"))
+        self.health.reset()
+        return summary
+
+    def close(self):
+        """Stops the capture thread (if running) before the process terminates."""
+        if self._capture_thread is not None:
+            self._capture_stop.set()
+            self._capture_thread.join()
+            self._capture_thread = None
+        super().close()
 
     def read(self) -> np.ndarray:
         """Read method for acquiring frames from the camera."""
         return self.empty()
 
+    def frame_counter(self):
+        """Returns the hardware frame counter of the last frame that was read, or None if the camera does not provide
+        one. May be re-implemented in subclasses."""
+        return None
+
+    def read_into(self, buffer: np.ndarray) -> np.ndarray:
+        """Reads the next frame into a preallocated buffer.
+
+        Returns the buffer if the frame was written into it, otherwise returns the frame (e.g. if the frame is empty or
+        its shape has changed). The default implementation copies the output of the read method, and should be
+        re-implemented in subclasses that can write frames from the camera directly into the buffer.
+        """
+        frame = self.read()
+        if (frame.shape == buffer.shape) and (frame.dtype == buffer.dtype):
+            np.copyto(buffer, frame)
+            return buffer
+        return frame
+
     @LOGGED
     def set_params(self, params, **kwargs):
         new_params = {}
         if ("target" in kwargs) and (kwargs["target"] != self.name):
             pass
         else:
-            for param, val in params.items():
-                setattr(self, param, val)
-                newval = getattr(self, param)
-                new_params[param] = newval
-                print(param, "set to", newval)
+            with self._camera_lock:
+                for param, val in params.items():
+                    setattr(self, param, val)
+                    newval = getattr(self, param)
+                    new_params[param] = newval
+                    print(param, "set to", newval)
         self.params.update(new_params)
         return new_params
 
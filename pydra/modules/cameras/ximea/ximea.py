@@ -5,11 +5,14 @@ except NameError:
         "The xiapi package must be installed to use a Ximea camera!"
     )
 from pydra.modules.cameras.worker import CameraAcquisition, setter
+import numpy as np
+import ctypes
 
 
 class XimeaCamera(CameraAcquisition):
 
     name = "ximea"
+    formats = {"XI_MONO8": np.uint8, "XI_RAW8": np.uint8, "XI_MONO16": np.uint16, "XI_RAW16": np.uint16}
 
     def __init__(self, *args, camera_id=0, **kwargs):
         super().__init__(*args, **kwargs)
@@ -97,6 +100,35 @@ class XimeaCamera(CameraAcquisition):
             frame = self.empty()
         return frame
 
+    def read_into(self, buffer):
+        """Copies the image from the xiapi buffer directly into the preallocated buffer, avoiding the allocation of a
+        new array by get_image_data_numpy. The raw image is only copied if its shape, size and data format (see
+        formats) match the buffer exactly (e.g. MONO8 into uint8), otherwise the image is converted by xiapi."""
+        try:
+            self.camera.get_image(self.frame)
+        except xiapi.Xi_error:
+            return self.empty()
+        if (self.frame.height, self.frame.width) == buffer.shape[:2] and (self.frame.padding_x == 0) \
+                and (self.frame.bp_size == buffer.nbytes) and (self.dtype(self.frame) == buffer.dtype):
+            ctypes.memmove(buffer.ctypes.data, self.frame.bp, buffer.nbytes)
+            return buffer
+        frame = self.frame.get_image_data_numpy()
+        if (frame.shape == buffer.shape) and (frame.dtype == buffer.dtype):
+            buffer[:] = frame
+            return buffer
+        return frame
+
+    def dtype(self, image):
+        """Returns the numpy dtype of the data in a xiapi image, or None for formats that are not copied directly."""
+        for name, dtype in self.formats.items():
+            if image.frm == xiapi.XI_IMG_FORMAT.get(name):
+                return np.dtype(dtype)
+        return None
+
+    def frame_counter(self):
+        """Returns the frame number assigned to the last image by the camera."""
+        return self.frame.nframe
+
     def cleanup(self):
         self.camera.stop_acquisition()
         self.camera.close_device()
@@ -1,33 +1,89 @@
 from pydra.core import Worker
-from pydra.utilities.labjack import LabJack
-import time
+from pydra.core.scheduler import SPIN
+from pydra.utilities.labjack import LabJack, OutputScheduler, Waveform
+from pydra.utilities import clock
+import queue
 
 
 class OptogeneticsWorker(LabJack, Worker):
+    """Controls a laser through the DAC0 output of a LabJack.
+
+    The stimulation_on and stimulation_off events set the output immediately. Waveforms (e.g. pulse trains and ramps,
+    see pydra.utilities.labjack.Waveform) are sent with the schedule_output event, as a dictionary with an absolute start
+    time t0 on the network clock, and are written by an OutputScheduler thread. stimulation_off cancels any scheduled
+    output. The time of every write is published as timestamped data.
+
+    Parameters
+    ----------
+    fake : bool
+        If True, an in-memory FakeU3 is used instead of a LabJack.
+    spin : float
+        Time before each scheduled write at which the scheduler stops sleeping and starts spinning (seconds).
+    """
 
     name = "optogenetics"
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, fake=False, spin=SPIN, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.fake = fake
         self.events["connect"] = self.connect
         self.events["disconnect"] = self.stimulation_off
         self.events["stimulation_on"] = self.stimulation_on
         self.events["stimulation_off"] = self.stimulation_off
+        self.events["schedule_output"] = self.schedule_output
+        self.events["cancel_output"] = self.cancel_output
         self.laser_state = 0
+        self.scheduler = OutputScheduler(self.send_signal, spin=spin)
+
+    def connect(self, **kwargs):
+        super().connect(fake=self.fake, **kwargs)
+
+    def setup(self):
+        self.scheduler.start()
+
+    def _process(self):
+        super()._process()
+        self.publish_writes()
 
     def stimulation_off(self, **kwargs):
+        self.scheduler.cancel()
         self.send_signal('DAC0', 0)
+        if "_trace" in kwargs:  # closed-loop latency
+            self.record_trace(self.trace(**kwargs), "actuated")
         self.laser_state = 0
-        print("LASER OFF")
-        t = time.time()
+        t = clock.now()
         self.send_timestamped(t, {"laser": 0})
 
     def stimulation_on(self, **kwargs):
         self.laser_state = 1
         self.send_signal('DAC0', 3)
-        print("LASER ON")
-        t = time.time()
+        if "_trace" in kwargs:  # closed-loop latency
+            self.record_trace(self.trace(**kwargs), "actuated")
+        t = clock.now()
         self.send_timestamped(t, {"laser": 1})
 
+    def schedule_output(self, waveform: dict, t0: float = None, **kwargs):
+        """Schedules a waveform (a dictionary, see Waveform.from_dict) to start at time t0 on the network clock. If t0
+        is not given or has already passed, the waveform starts immediately."""
+        waveform = Waveform.from_dict({"register": "DAC0", **waveform})
+        self.scheduler.schedule(waveform, t0)
+
+    def cancel_output(self, **kwargs):
+        """Discards scheduled writes."""
+        self.scheduler.cancel()
+
+    def publish_writes(self):
+        """Publishes the scheduled and actual time of writes made by the scheduler."""
+        while True:
+            try:
+                t_scheduled, t, register, value = self.scheduler.writes.get_nowait()
+            except queue.Empty:
+                return
+            if register == "DAC0":
+                self.laser_state = int(value > 0)
+            self.send_timestamped(t, {"laser": self.laser_state, register: value, "scheduled": t_scheduled})
+
     def cleanup(self):
+        self.scheduler.stop()
+        self.publish_writes()
         self.stimulation_off()
@@ -1,31 +1,99 @@
 from pydra.core import Worker
 from tailtracker import TailTracker
+import numpy as np
 
 
 class TailTrackingWorker(Worker):
+    """Tracks the tail in frames received from a camera.
+
+    The worker can receive a cropped or binned stream of frames from the camera (see the "streams" key of the module in
+    pydra.core.controller.PydraController.configure). Tail points are always sent, and initialized, in the coordinates
+    of the full frame.
+
+    Parameters
+    ----------
+    batch : bool
+        If True, all frames waiting in the subscription sockets are received before tracking, and the results are
+        published as a single BATCHED message (containing the angles and stacked tail points) instead of two messages
+        per frame. This allows the worker to catch up when it falls behind the camera.
+    realtime : bool
+        If True (batch mode only), only the newest frame of each batch is tracked and older frames are skipped.
+    max_batch : int
+        Maximum number of frames in a batch.
+
+    Attributes
+    ----------
+    offset : np.ndarray
+        (x, y) position of the received frames in the full frame.
+    binning : int
+        Binning of the received frames.
+    skipped : int
+        Number of frames skipped in realtime mode.
+    """
 
     name = "tail"
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, batch: bool = False, realtime: bool = False, max_batch: int = 64, **kwargs):
         super().__init__(*args, **kwargs)
         self.events["initialize_tracker"] = self.init_tracker
         self.events["set_parameters"] = self.set_parameters
+        self.offset = np.zeros(2)
+        self.binning = 1
+        # Batching
+        self.batch = batch
+        self.realtime = realtime
+        self.max_batch = max_batch
+        self.skipped = 0
+        self._frames = []
 
     def setup(self):
         self.tracker = TailTracker(None, None, None)
 
+    def _process(self):
+        """In batch mode, receives all pending messages (up to max_batch frames) and then tracks the batch."""
+        if not self.batch:
+            return super()._process()
+        while self.poll() and (len(self._frames) < self.max_batch):
+            pass
+        if len(self._frames):
+            self.track_batch()
+
     def recv_frame(self, t, i, frame, **kwargs):
+        if "roi" in kwargs:
+            self.offset = np.array(kwargs["roi"]["offset"], dtype="float64")
+            self.binning = kwargs["roi"]["binning"]
+        if self.batch:
+            self._frames.append((t, i, frame))
+            return
         angle = self.tracker.track(frame)
         if angle is not None:
             data = {"angle": angle}
-            points = self.tracker.points_array
+            points = self.tracker.points_array * self.binning + self.offset  # full frame coordinates
             self.send_array(t, i, points)
             self.send_indexed(t, i, data)
 
+    def track_batch(self):
+        """Tracks the frames received since the last batch and publishes the results in one message."""
+        frames, self._frames = self._frames, []
+        if self.realtime:
+            self.skipped += len(frames) - 1
+            frames = frames[-1:]
+        t, i, angles, points = [], [], [], []
+        for t_k, i_k, frame in frames:
+            angle = self.tracker.track(frame)
+            if angle is not None:
+                t.append(t_k)
+                i.append(i_k)
+                angles.append(float(angle))
+                points.append(self.tracker.points_array * self.binning + self.offset)
+        if len(t):
+            self.send_batched(t, i, {"angle": angles}, np.array(points))
+
     def init_tracker(self, points, n, **kwargs):
         background = kwargs.get("background", self.tracker.background)
         ksize = kwargs.get("ksize", self.tracker.ksize)
         n_tip_points = kwargs.get("n_tip_points", self.tracker.n_tip_points)
+        points = (np.asarray(points, dtype="float64") - self.offset) / self.binning  # stream coordinates
         self.tracker = TailTracker.from_points(points, n, background=background, ksize=ksize, n_tip_points=n_tip_points)
 
     def set_parameters(self, **kwargs):
@@ -1,7 +1,7 @@
 from .worker import VisualStimulationWorker
 from .widget import VisualStimulationWidget
 from .screengrabber import ScreenGrabber
-from .stimulus import Stimulus, Wait
+from .stimulus import Stimulus, PreparedStimulus, Wait
 
 
 PSYCHOPY = {
@@ -1,10 +1,35 @@
+from pydra.utilities import clock
+import numpy as np
 import importlib.util
-import time
 
 
 class ProtocolRunner:
     """Class for running protocols (i.e. lists of Stimulus objects).
 
+    Stimuli are timed in display frames. After each flip of the window, the time of the flip is taken from the network
+    clock and compared with the previous flip to detect missed frames (intervals longer than 1.5 frames). The frame
+    counter of the current stimulus is advanced by the number of display frames that have elapsed (including missed
+    frames), so stimulus durations are not affected by frames that are dropped.
+
+    The time of every flip and the parameters of the current stimulus on each frame are recorded in a StimulusLog. Logs
+    are only converted and passed to on_log when the protocol finishes or is stopped, so that recording adds no work to
+    transitions between stimuli.
+
+    Parameters
+    ----------
+    window
+        Psychopy window for drawing stimuli. The window should wait for the vertical blank when flipping
+        (waitBlanking=True, the default), so that the time after the flip is the time the frame was displayed.
+    stimulus_list : list (optional)
+        List of Stimulus objects.
+    frame_rate : float (optional)
+        Refresh rate of the display (Hz). If not given, stimuli are timed with the clock instead of frames.
+    on_flip : callable (optional)
+        Called after every flip while a protocol is running with the time of the flip, the display frame number, the
+        index of the current stimulus and the number of frames missed before the flip.
+    on_log : callable (optional)
+        Called with a list of records (see StimulusLog.flush) when a protocol finishes or is stopped.
+
     Attributes
     ----------
     stimulus_list : list
@@ -13,6 +38,14 @@ class ProtocolRunner:
         Psychopy window for drawing stimuli.
     current_stimulus : Stimulus
         The current stimulus.
+    frame : int
+        Number of display frames since the protocol was started.
+    missed : int
+        Number of frames missed since the protocol was started.
+    prepared : bool
+        Whether the stimuli have been prepared since the stimulus list was loaded (see prepare).
+    stimulus_log : StimulusLog
+        Log of the stimuli displayed since the protocol was started.
     """
 
     @classmethod
@@ -22,13 +55,22 @@ class ProtocolRunner:
         protocol_runner.load_protocol(filepath)
         return protocol_runner
 
-    def __init__(self, window, stimulus_list: list = None):
+    def __init__(self, window, stimulus_list: list = None, frame_rate: float = None, on_flip: callable = None,
+                 on_log: callable = None):
         self.stimulus_list = stimulus_list or []
+        self.frame_rate = frame_rate
+        self.on_flip = on_flip
+        self.on_log = on_log
+        self.stimulus_log = StimulusLog()
         self.set_window(window)
         self.current_stimulus = None
         self._current_idx = 0
         self._completed_stimuli = []
         self.running = False
+        self.frame = 0
+        self.missed = 0
+        self._t_flip = None
+        self.prepared = False
 
     @property
     def running(self):
@@ -41,47 +83,91 @@ class ProtocolRunner:
     def start(self, idx=0):
         """Initializes the stimulus list.
 
-        Sets the starting index, resets all stimuli in the stimulus list and sets the running property to True.
+        Sets the starting index, resets all stimuli in the stimulus list and sets the running property to True. Stimuli
+        are prepared first if they have not been prepared since the stimulus list was loaded.
         """
+        if not self.prepared:
+            self.prepare()
         self._current_idx = idx
         for stimulus in self.stimulus_list:
             stimulus.reset()
+        self.frame = 0
+        self.missed = 0
+        self._t_flip = None
+        self.stimulus_log.clear()
         try:
             self.current_stimulus = self.stimulus_list[self._current_idx]
             self._completed_stimuli = []
+            self.stimulus_log.begin(self._current_idx, self.current_stimulus)
             self.running = True
         except IndexError:
             print("Cannot start protocol without stimulus list!")
 
     def __call__(self, *args, **kwargs):
-        """Calls the current stimulus if the running property is True."""
+        """Calls the current stimulus if the running property is True, then flips the window and advances the frame
+        counters.
+
+        If the current stimulus finishes, the next stimulus is started in the same call, so every flip shows a frame of
+        a stimulus and a stimulus lasting n frames is displayed for exactly n flips. The window is not flipped after the
+        last stimulus has finished.
+        """
         if self.running:
-            ret = self.current_stimulus(*args, **kwargs)
-            self.window.flip()
-            if ret:
+            while self.current_stimulus(*args, **kwargs):
                 self.next()
+                if not self.running:
+                    return
+            self.window.flip()
+            t = clock.now()
+            missed = self._missed_frames(t)
+            self.stimulus_log.update(t, self.current_stimulus.frame, self.current_stimulus.log())
+            self.frame += 1 + missed
+            self.missed += missed
+            self.current_stimulus.frame += 1 + missed
+            if self.on_flip:
+                self.on_flip(t, self.frame, self._current_idx, missed)
+
+    def _missed_frames(self, t) -> int:
+        """Returns the number of frames missed between the last flip and a flip at time t."""
+        t_last, self._t_flip = self._t_flip, t
+        if (t_last is None) or (not self.frame_rate):
+            return 0
+        intervals = (t - t_last) * self.frame_rate
+        return int(round(intervals)) - 1 if intervals > 1.5 else 0
 
     def next(self):
         """Sets the next stimulus in the stimulus list as the current stimulus."""
         self._completed_stimuli.append(self.current_stimulus)
+        self.stimulus_log.end()
         self._current_idx += 1
         try:
             self.current_stimulus = self.stimulus_list[self._current_idx]
+            self.stimulus_log.begin(self._current_idx, self.current_stimulus)
         except IndexError:
             self.current_stimulus = None
             self.running = False
+            self.flush_log()
 
     def stop(self):
         """Stops a running protocol. Flips the window and sets the running property to False."""
         self.window.flip()
+        if self.running:
+            self.stimulus_log.end()
+            self.flush_log()
         self.running = False
 
+    def flush_log(self):
+        """Passes the records of the stimulus log to on_log."""
+        records = self.stimulus_log.flush()
+        if self.on_log and len(records):
+            self.on_log(records)
+
     def set_window(self, win=None):
         """Sets the window for drawing stimuli."""
         if win:
             self.window = win
         for stimulus in self.stimulus_list:
             stimulus.window = self.window
+            stimulus.frame_rate = self.frame_rate
 
     def load_protocol(self, filepath):
         """Loads a stimulus list from a given file."""
@@ -103,17 +189,148 @@ class ProtocolRunner:
         except TypeError:
             print("`stimulus_list` must be a list of Stimulus objects")
         self.set_window()
+        self.prepared = False
         print(f"Stimulus loaded from: {filepath}")
 
-    def logging_info(self):
-        info = {}
-        for stimulus in self.stimulus_list:
+    def prepare(self, n_samples: int = 10) -> list:
+        """Prepares every stimulus in the stimulus list and measures the cost of drawing them.
+
+        Calls the prepare method of each stimulus once (stimuli that appear more than once in the list are only
+        prepared once), so that textures are loaded and trajectories are computed before the protocol runs. The draw
+        method of stimuli that implement one is then timed for up to n_samples frames, and the buffer is cleared
+        without flipping.
+
+        Returns
+        -------
+        list
+            A dictionary for each stimulus in the list containing the index and type of the stimulus, the time taken to
+            prepare it (ms), the number of frames it lasts (if known), the number of draw calls per frame and the mean
+            time to draw a frame (ms).
+        """
+        report = []
+        prepared = {}
+        for idx, stimulus in enumerate(self.stimulus_list):
+            if id(stimulus) not in prepared:
+                t0 = clock.now()
+                stimulus.prepare()
+                prepare_time = (clock.now() - t0) * 1000
+                draw_calls, frame_time = self._measure(stimulus, n_samples)
+                prepared[id(stimulus)] = dict(prepare_ms=prepare_time, n_frames=getattr(stimulus, "n_frames", None),
+                                              draws_per_frame=draw_calls, frame_ms=frame_time)
+            report.append(dict(stimulus=idx, type=type(stimulus).__name__, **prepared[id(stimulus)]))
+        self.prepared = True
+        self.print_report(report)
+        return report
+
+    def _measure(self, stimulus, n_samples):
+        """Returns the number of draw calls and the mean time (ms) to draw a frame of a stimulus."""
+        draw = getattr(stimulus, "draw", None)
+        n_frames = getattr(stimulus, "n_frames", 0)
+        if (draw is None) or (not n_frames):
+            return 0, 0.
+        frames = range(0, n_frames, max(1, n_frames // n_samples))
+        t0 = clock.now()
+        for frame in frames:
+            draw(frame)
+        frame_time = (clock.now() - t0) * 1000 / len(frames)
+        if hasattr(self.window, "clearBuffer"):
+            self.window.clearBuffer()
+        return len(stimulus.objects), frame_time
+
+    @staticmethod
+    def print_report(report):
+        print("Prepared stimuli:")
+        for entry in report:
+            n_frames = entry["n_frames"] if entry["n_frames"] is not None else "-"
+            print(f"  {entry['stimulus']}: {entry['type']} prepared in {entry['prepare_ms']:.1f} ms, {n_frames} frames, "
+                  f"{entry['draws_per_frame']} draws/frame, {entry['frame_ms']:.3f} ms/frame")
+
+    def logging_info(self) -> list:
+        """Returns a dictionary for each stimulus in the stimulus list containing its index, type and public attributes
+        that are numbers, strings or sequences of numbers."""
+        info = []
+        for idx, stimulus in enumerate(self.stimulus_list):
+            params = dict(stimulus=idx, type=type(stimulus).__name__)
             for key, val in stimulus.__dict__.items():
-                if not key.startswith("_"):
-                    info[key] = val
+                if (not key.startswith("_")) and _is_loggable(val):
+                    params[key] = list(val) if isinstance(val, tuple) else val
+            info.append(params)
         return info
 
 
+def _is_loggable(val) -> bool:
+    if isinstance(val, (bool, int, float, str)) or (val is None):
+        return True
+    if isinstance(val, (list, tuple)):
+        return all([isinstance(x, (bool, int, float)) for x in val])
+    return False
+
+
+class StimulusLog:
+    """Records when each stimulus of a protocol was displayed and its parameters on each frame.
+
+    A record is kept for every stimulus that is displayed, containing the time of each flip of the window and the
+    stimulus frame that was drawn before the flip. Per-frame parameters come from the log method of the stimulus (called
+    after every flip) and from its params method (called once with all the frames that were displayed, e.g. to look up
+    precomputed arrays). Values are only appended to lists while the protocol runs and are converted into columns when
+    the log is flushed.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._current = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def clear(self):
+        self.records = []
+        self._current = None
+
+    def begin(self, idx: int, stimulus):
+        """Starts the record of a stimulus."""
+        self._current = dict(stimulus=stimulus, index=idx, time=[], frame=[], params={})
+
+    def update(self, t: float, frame: int, params: dict = None):
+        """Adds a flip of the window to the current record."""
+        record = self._current
+        record["time"].append(t)
+        record["frame"].append(frame)
+        if params:
+            for key, val in params.items():
+                try:
+                    record["params"][key].append(val)
+                except KeyError:
+                    record["params"][key] = [val]
+
+    def end(self):
+        """Ends the record of the current stimulus."""
+        if self._current and len(self._current["time"]):
+            self.records.append(self._current)
+        self._current = None
+
+    def flush(self) -> list:
+        """Returns the completed records and clears them.
+
+        Each record is a dictionary containing the index and type of the stimulus, the times of the first and last
+        flip (t_start and t_stop), the number of flips and a dictionary of columns, with one value per flip: time,
+        frame and the parameters of the stimulus. Values are converted to lists so that they can be serialized.
+        """
+        out = []
+        for record in self.records:
+            stimulus = record["stimulus"]
+            columns = dict(time=record["time"], frame=record["frame"])
+            columns.update(record["params"])
+            params = stimulus.params(np.array(record["frame"]))
+            if params:
+                for key, vals in params.items():
+                    columns[key] = np.asarray(vals).tolist()
+            out.append(dict(stimulus=record["index"], type=type(stimulus).__name__, t_start=record["time"][0],
+                            t_stop=record["time"][-1], n=len(record["time"]), columns=columns))
+        self.records = []
+        return out
+
+
 class Stimulus:
     """Base class for creating stimuli.
 
@@ -121,6 +338,10 @@ class Stimulus:
     ----------
     window
         The Psychopy window where stimuli can be drawn.
+    frame_rate : float
+        Refresh rate of the display (Hz), set by the ProtocolRunner. None if the refresh rate is not known.
+    frame : int
+        Number of display frames since the stimulus started (including missed frames), set by the ProtocolRunner.
     started : bool
         Property, True if the stimulus has started, otherwise False.
     finished : bool
@@ -133,9 +354,11 @@ class Stimulus:
     Stimulus objects are designed to be called repeatedly in a loop. Their behavior is dictated by a number of internal
     flags (public and private) that are stored as properties/attributes. The first time the object is called, the
     `on_start` method is executed once. Thereafter, the `update` method is run on each call until the finished flag is
-    set to True. Once the finished flag is True, the next call of the object with execute the `on_stop` method once.
-    Calling the object will return False as long as it is running. Once the finished flag is set and the `on_stop`
-    method has returned, the object will return True, indicating the stimulus has completed successfully.
+    set to True. The `on_stop` method is executed once in the same call in which the finished flag is set (by
+    `on_start` or `update`). Calling the object will return False as long as it is running. Once the finished flag is
+    set and the `on_stop` method has returned, the object will return True, indicating the stimulus has completed
+    successfully. A stimulus should therefore set the finished flag instead of drawing on the first call after its last
+    frame (e.g. when frame >= n_frames), and the ProtocolRunner starts the next stimulus without flipping the window.
 
     The reset method can be used to reset the internal flags, allowing the stimulus to be run again.
     """
@@ -143,20 +366,22 @@ class Stimulus:
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.window = None
+        self.frame_rate = None
+        self.frame = 0
         self.started = False
         self.finished = False
         self._exit_flag = False
 
     def __call__(self, *args, **kwargs) -> bool:
         if not self._exit_flag:
-            if self.finished:
-                self.on_stop(*args, **kwargs)
-                self._exit_flag = True
-            elif self.started:
+            if self.started:
                 self.update(*args, **kwargs)
             else:
                 self.on_start(*args, **kwargs)
                 self.started = True
+            if self.finished:
+                self.on_stop(*args, **kwargs)
+                self._exit_flag = True
         return self._exit_flag
 
     @property
@@ -187,9 +412,29 @@ class Stimulus:
         self.started = False
         self.finished = False
         self._exit_flag = False
+        self.frame = 0
+
+    def frames(self, seconds: float):
+        """Returns the number of display frames in the given time, or None if the frame rate is not known."""
+        if not self.frame_rate:
+            return None
+        return int(round(seconds * self.frame_rate))
 
     def log(self):
-        pass
+        """Returns a dictionary of parameters of the stimulus for the current frame, or None. Called after every flip of
+        the window while the stimulus runs. May be re-implemented in subclasses, and should return the same keys on
+        every frame."""
+        return
+
+    def params(self, frames):
+        """Returns a dictionary of parameter arrays for the given frames (an array of stimulus frame numbers), or None.
+        Called once after the stimulus has finished. May be re-implemented in subclasses."""
+        return
+
+    def prepare(self):
+        """Called once before a protocol runs (see ProtocolRunner.prepare). May be re-implemented in subclasses to
+        create resources that would otherwise be created in on_start."""
+        return
 
     def on_start(self, *args, **kwargs):
         return
@@ -202,15 +447,107 @@ class Stimulus:
 
 
 class Wait(Stimulus):
+    """Waits for a given time (or number of display frames).
 
-    def __init__(self, t, *args, **kwargs):
+    Parameters
+    ----------
+    t : float
+        Time to wait (seconds). Rounded to the nearest number of display frames if the frame rate is known.
+    n_frames : int (optional)
+        Number of display frames to wait. Overrides t.
+    """
+
+    def __init__(self, t=0., *args, n_frames: int = None, **kwargs):
         super().__init__(*args, **kwargs)
         self.t = t
+        self.n_frames = n_frames
         self.t0 = -1
 
     def on_start(self, *args, **kwargs):
-        self.t0 = time.time()
+        self.t0 = clock.now()
+
+    def update(self, *args, **kwargs):
+        n_frames = self.n_frames if self.n_frames is not None else self.frames(self.t)
+        if n_frames is not None:
+            if self.frame >= n_frames:
+                self.finished = True
+        elif clock.now() - self.t0 >= self.t:
+            self.finished = True
+
+
+class PreparedStimulus(Stimulus):
+    """Stimulus whose resources and per-frame parameters are computed before the protocol runs.
+
+    Visual objects are created by the create method and per-frame parameters (e.g. trajectories) are computed as arrays
+    by the precompute method, both during prepare. While the stimulus runs, each frame only applies a row of the
+    precomputed arrays to existing objects (set_frame) and draws them, so no objects or arrays are allocated and
+    transitions between stimuli do not cause dropped frames. The stimulus lasts for as many display frames as the
+    shortest precomputed array.
+
+    Attributes
+    ----------
+    objects : list
+        Visual objects drawn on every frame (returned by create).
+    arrays : dict
+        Per-frame parameters (returned by precompute). The first dimension of each array is the display frame.
+    n_frames : int
+        Number of display frames.
+    prepared : bool
+        Whether prepare has been called.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.objects = []
+        self.arrays = {}
+        self.n_frames = 0
+        self.prepared = False
+
+    def prepare(self):
+        self.objects = list(self.create())
+        self.arrays = dict(self.precompute())
+        self.n_frames = min([len(a) for a in self.arrays.values()]) if len(self.arrays) else 0
+        self.prepared = True
+
+    def create(self) -> list:
+        """Returns the visual objects of the stimulus. Should be re-implemented in subclasses."""
+        return []
+
+    def precompute(self) -> dict:
+        """Returns a dictionary of per-frame parameter arrays. Should be re-implemented in subclasses."""
+        return {}
+
+    def set_frame(self, frame: int):
+        """Applies the parameters of a frame to the visual objects. Should be re-implemented in subclasses."""
+        return
+
+    def params(self, frames):
+        """Returns the precomputed arrays for the given frames. Values are NaN for frames where nothing was drawn
+        (after the last frame of the stimulus)."""
+        if not self.n_frames:
+            return
+        frames = np.asarray(frames)
+        drawn = frames < self.n_frames
+        params = {}
+        for key, a in self.arrays.items():
+            vals = np.asarray(a)[np.clip(frames, 0, self.n_frames - 1)].astype("float64")
+            vals[~drawn] = np.nan
+            params[key] = vals
+        return params
+
+    def draw(self, frame: int):
+        """Draws a frame of the stimulus."""
+        self.set_frame(frame)
+        for obj in self.objects:
+            obj.draw()
+
+    def on_start(self, *args, **kwargs):
+        if not self.prepared:
+            self.prepare()
+        self.draw(0)
 
     def update(self, *args, **kwargs):
-        if time.time() - self.t0 >= self.t:
+        if self.frame >= self.n_frames:
             self.finished = True
+        else:
+            self.draw(self.frame)
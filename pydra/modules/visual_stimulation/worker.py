@@ -1,16 +1,36 @@
 from pydra.core import Acquisition
+from pydra.core.messaging import TIMESTAMPED, LOGGED
 from .stimulus import ProtocolRunner, Stimulus, Wait
 from psychopy import visual
 
 
 class VisualStimulationWorker(Acquisition):
+    """Runs visual stimulus protocols in a Psychopy window.
+
+    The time of every flip of the window while a protocol is running is published as timestamped data, containing the
+    display frame number, the index of the current stimulus and the number of frames missed before the flip. When a
+    protocol finishes or is stopped, a record of each stimulus that was displayed (see StimulusLog) is published as
+    timestamped data with the key stimuli.<stimulus type>, which the saver writes as a table of columns for each
+    stimulus type. The parameters of each stimulus in a protocol are logged when the protocol starts.
+
+    Stimuli are prepared when a protocol is loaded (see ProtocolRunner.prepare), so that resources are created before
+    the protocol runs, and the expected cost of each stimulus is logged.
+
+    Parameters
+    ----------
+    stimulus_file : str (optional)
+        Path to a file containing a stimulus_list.
+    frame_rate : float (optional)
+        Refresh rate of the display (Hz). If not given, the refresh rate is measured when the window is created.
+    """
 
     name = "visual_stimulation"
     window_params = {}
 
-    def __init__(self, stimulus_file=None, *args, **kwargs):
+    def __init__(self, stimulus_file=None, frame_rate=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.stimulus_file = stimulus_file
+        self.frame_rate = frame_rate
         self.protocol_runner = None
         self.events["load"] = self.load_protocol
         self.events["run"] = self.run_protocol
@@ -19,14 +39,48 @@ class VisualStimulationWorker(Acquisition):
 
     def setup(self):
         self.window = visual.Window(**self.window_params)
+        if not self.frame_rate:
+            self.frame_rate = self.window.getActualFrameRate()
+            print(f"Display refresh rate: {self.frame_rate} Hz")
         # ProtocolRunner.window = self.window
         if self.stimulus_file:
-            self.protocol_runner = ProtocolRunner.from_protocol(self.window, self.stimulus_file)
+            self.protocol_runner = self.create_runner(self.stimulus_file)
         else:
-            self.protocol_runner = ProtocolRunner(self.window)
+            self.protocol_runner = ProtocolRunner(self.window, frame_rate=self.frame_rate, on_flip=self.flipped,
+                                                  on_log=self.stimuli_logged)
+
+    def create_runner(self, stimulus_file):
+        runner = ProtocolRunner(self.window, frame_rate=self.frame_rate, on_flip=self.flipped,
+                                on_log=self.stimuli_logged)
+        runner.load_protocol(stimulus_file)
+        self.protocol_prepared(runner.prepare())
+        return runner
+
+    @LOGGED
+    def protocol_prepared(self, report):
+        """Logs the preparation time and the expected per-frame cost of each stimulus in the protocol."""
+        return dict(stimuli=report)
+
+    @TIMESTAMPED
+    def flipped(self, t, frame, stimulus, missed):
+        """Publishes the time of a flip of the window."""
+        return t, dict(frame=frame, stimulus=stimulus, missed=missed)
+
+    def stimuli_logged(self, records):
+        """Publishes the record of each stimulus in a protocol, timestamped with the first flip of the stimulus."""
+        for record in records:
+            self.send_timestamped(record["t_start"], {f"stimuli.{record['type']}": record})
+
+    @LOGGED
+    def protocol_started(self, stimuli):
+        """Logs the parameters of each stimulus in the protocol."""
+        return dict(stimuli=stimuli)
 
     def acquire(self):
+        running = self.protocol_runner.running
         self.protocol_runner()
+        if running and not self.protocol_runner.running:
+            self.window.flip()  # clear the last frame of the protocol
 
     def cleanup(self):
         self.window.close()
@@ -35,10 +89,10 @@ class VisualStimulationWorker(Acquisition):
         if "stimulus_file" in kwargs:
             self.stimulus_file = kwargs["stimulus_file"]
             print(f"Loading stimulus file: {self.stimulus_file}")
-        self.protocol_runner = ProtocolRunner.from_protocol(self.window, self.stimulus_file)
+        self.protocol_runner = self.create_runner(self.stimulus_file)
 
     def run_protocol(self, **kwargs):
-        print(self.protocol_runner.logging_info())
+        self.protocol_started(self.protocol_runner.logging_info())
         self.protocol_runner.start()
 
     def interrupt_protocol(self, **kwargs):
@@ -1,19 +1,16 @@
-from pydra.core import PydraObject, PydraSaver, Protocol, Trigger
-from pydra.core.messaging import *
-from pydra.utilities.string_formatting import *
+from pydra.core import Protocol, Trigger
+from pydra.core.protocol import Broadcast
+from pydra.core.controller import PydraController
 from pydra.utilities import clock
 from pydra.gui import *
 
 from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
 from PyQt5.QtWidgets import QApplication
 
-import time
-from pathlib import Path
-import os
 import sys
 
 
-class Pydra(PydraObject, QObject):
+class Pydra(PydraController, QObject):
     """Main pydra class.
 
     Parameters
@@ -28,20 +25,20 @@ class Pydra(PydraObject, QObject):
 
     Attributes
     ----------
-    saver : Saver
-        Process containing the saver object.
-    working_dir : Path
-        Path to the working directory where data are saved.
-    filename : str
-        Basename for naming files.
     trigger : Trigger
     protocols : dict
+
+    See Also
+    --------
+    pydra.core.controller.PydraController
+    pydra.headless.HeadlessPydra
     """
 
     name = "pydra"
 
     _cmd = pyqtSignal()  # signal emitted to receive command line inputs
     _exiting = pyqtSignal()  # signal emitted just before exit
+    events_registered = pyqtSignal(str, list)  # signal emitted when a worker advertises its events
 
     @staticmethod
     def run(gui=True, **config):
@@ -58,55 +55,13 @@ class Pydra(PydraObject, QObject):
         sys.exit(app.exec())
 
     def __init__(self, connections: dict, modules: list = None, gui: bool = True, *args, **kwargs):
-        self.connections = connections
-        self.modules = modules
-        super().__init__(connections=connections, *args, **kwargs)
-        # Start saver and wait for it to respond
-        self.saver = PydraSaver.start(self.pipelines, connections=connections)
-        self.zmq_receiver.recv_multipart()
-        # Start module workers
-        print("Saver ready. Starting modules...", end=" ")
-        self._workers = []
-        self._event_log = {}
-        for module in self.modules:
-            self._event_log[module["worker"].name] = []  # create an event log for worker
-            process = module["worker"].start(connections=connections, **module.get("params", dict()))
-            self._workers.append(process)
-        print("done.")
-        # Test connections to workers
-        self.test_connections()
-        # Set working directory and filename
-        working_dir = kwargs.get("working_dir", os.getcwd())
-        self.working_dir = Path(working_dir)
-        filename = kwargs.get("filename", "default_filename")
-        self.filename = filename
+        super().__init__(connections, modules, *args, **kwargs)
         # Get trigger
         self.trigger = kwargs.get("trigger", None)
         # Get protocols
         self.protocols = kwargs.get("protocols", self.working_dir)
         self.freerunning_mode()
 
-    def __str__(self):
-        return format_zmq_connections(self.connections)
-
-    @property
-    def pipelines(self):
-        """Returns a dictionary that maps pipeline names to a list of workers."""
-        pipelines = {}
-        for module in self.modules:
-            worker = module["worker"]
-            pipeline = module["worker"].pipeline
-            if pipeline in pipelines:
-                pipelines[pipeline].append(worker)
-            else:
-                pipelines[pipeline] = [worker]
-        return pipelines
-
-    @EXIT
-    def exit(self):
-        """Broadcasts an exit signal."""
-        return ()
-
     def startUI(self):
         """Starts up the user interface."""
         self.window = MainWindow(self)
@@ -118,143 +73,17 @@ class Pydra(PydraObject, QObject):
         self._cmd.emit()
 
     def shutdown(self):
-        """Ends and joins worker process for proper exiting."""
-        print("Exiting...")
-        self.exit()
-        print("Cleaning up connections...")
-        for process in self._workers:
-            process.join()
-            print(f"Module {process.worker_type.name} joined")
-        self.saver.join()
-        print("Saver joined.")
+        """Ends and joins worker process for proper exiting, then quits the Qt event loop."""
+        super().shutdown()
         self._exiting.emit()
 
-    @EVENT
-    def start_recording(self):
-        """Broadcasts a start_recording event."""
-        return "start_recording", dict(directory=str(self.working_dir), filename=str(self.filename))
-
-    @EVENT
-    def stop_recording(self):
-        """Broadcasts a start_recording event."""
-        return "stop_recording", {}
-
-    def set_working_directory(self, directory):
-        """Sets the working directory and broadcasts a set_working_directory event."""
-        self.working_dir = Path(directory)
-        if not self.working_dir.exists():
-            self.working_dir.mkdir(parents=True)
-        self.send_event("set_working_directory", directory=str(self.working_dir))
-
-    def set_filename(self, filename):
-        """Sets the filename and broadcasts a set_filename event."""
-        self.filename = filename
-        self.send_event("set_filename", filename=str(self.filename))
-
-    def _query(self, query_type: str):
-        """General method for sending any request to the saver.
-
-        Parameters
-        ----------
-        query_type : str
-            A specific query that can be fulfilled by the saver.
-
-        See Also
-        --------
-        pydra.core.saving.Saver
-        """
-        self.send_event("query", query_type=query_type)
-        result = self.zmq_receiver.recv_multipart()
-        return result[:-1]
-
-    @staticmethod
-    def decode_message(msg, msg_type):
-        """Decode INFO messages from saver."""
-        if msg_type is EVENT_INFO:
-            return [EVENT_INFO.decode(*msg[(4 * i):(4 * i) + 4]) for i in range(len(msg) // 4)]
-        elif msg_type is DATA_INFO:
-            return [DATA_INFO.decode(*msg[(3 * i):(3 * i) + 3]) for i in range(len(msg) // 3)]
-        else:
-            return msg
-
-    def request_events(self):
-        """Request info from saver about worker events."""
-        events = self._query("events")
-        if len(events):
-            log = self.decode_message(events, EVENT_INFO)
-            for (t, worker, event_name, event_kw) in log:
-                self._event_log[worker].append((t, event_name, event_kw))
-            return True, log
-        return False, events
-
-    def request_data(self):
-        """Request data from saver."""
-        data = self._query("data")
-        worker_data = self.decode_message(data, DATA_INFO)
-        for (name, data, frame) in worker_data:
-            yield name, data, frame
-
-    def request_messages(self):
-        """Request messages from saver."""
-        messages = self._query("messages")
-        if len(messages):
-            message_data = self.decode_message(messages, EVENT_INFO)
-            message_data = [message[:3] for message in message_data]
-            return True, message_data
-        return False, messages
-
-    def test_connections(self, timeout=10.):
-        """Checks that all workers in the network are receiving messages from pydra.
-
-        Parameters
-        ----------
-        timeout : float
-            Maximum time to wait for workers to respond (seconds).
-        """
-        print("Testing connections...")
-        # Get the current time and timeout time
-        t0 = time.time()
-        t_timeout = t0 + timeout
-        # Create a dictionary with the connection status of each worker
-        connected = dict([(module["worker"].name, False) for module in self.modules])
-        # loop as long as workers are not connected or until the timeout has passed
-        while (time.time() < t_timeout) and (not all(connected.values())):
-            time.sleep(0.1)
-            self.send_event("_test_connection")  # send a test_connection event
-            ret, events = self.request_events()  # receive logged events
-            if ret:
-                # check for "connected" events from unconnected workers
-                for module in filter(lambda x: not connected[x], connected):
-                    module_events = list(filter(lambda x: x[1] == module, events))
-                    if len(module_events):
-                        event_times, event_names = zip(*[(item[0], item[2]) for item in module_events])
-                        if "connected" in event_names:
-                            idx = event_names.index("connected")
-                            event_time = event_times[idx]
-                            print(f"Module {module} responded after {event_time - t0} seconds.")
-                            connected[module] = True
-        if all(connected.values()):
-            print("All modules connected!")
-        else:
-            for module in filter(lambda x: not connected[x], connected):  # provide diagnostic info for user
-                print(f"Module {module} did not respond within {timeout} seconds. Check connections in config.")
-
-    @property
-    def worker_events(self):
-        """Returns a dictionary of events implemented by workers in the network."""
-        self.send_event("_events_info")
-        time.sleep(1.0)
-        ret, workers = self.request_events()
-        events = {}
-        if ret:
-            for (t, worker, _, events_dict) in workers:
-                worker_events = events_dict["events"]
-                for event in worker_events:
-                    if event in events:
-                        events[event].append(worker)
-                    else:
-                        events[event] = [worker]
-        return events
+    def register_events(self, worker, events) -> bool:
+        """Adds the events advertised by a worker to the registry. Emits the events_registered signal the first time a
+        worker is registered."""
+        if super().register_events(worker, events):
+            self.events_registered.emit(worker, list(events))
+            return True
+        return False
 
     def freerunning_mode(self):
         """Returns a free-running protocol."""
@@ -263,6 +92,7 @@ class Pydra(PydraObject, QObject):
             events.append(self.trigger)
         events.append(self.start_recording)
         self.protocol = Protocol.build("no protocol", 0, 0, events, freerun=True, interrupt=self.stop_recording)
+        self.protocol.stepped.connect(self.protocol_step)
 
     def build_protocol(self, name, n_reps, interval, events):
         """Builds a pre-existing protocol for running with the given repetitions and interval."""
@@ -273,11 +103,12 @@ class Pydra(PydraObject, QObject):
             protocol.append(self.start_recording)
             for event in events:
                 if isinstance(event, str):
-                    protocol.append((self.send_event, (event,), {}))
+                    protocol.append(Broadcast(self.send_event, event))
                 elif isinstance(event, int):
                     protocol.append(int(event * 1000))
             protocol.append(self.stop_recording)
             self.protocol = Protocol.build(name, n_reps, interval, protocol, interrupt=self.stop_recording)
+            self.protocol.stepped.connect(self.protocol_step)
         except KeyError:
             self.freerunning_mode()
             print(f"Protocol {name} is not defined. Entering free-running mode.")
@@ -310,36 +141,9 @@ class Pydra(PydraObject, QObject):
 
     @staticmethod
     def configure(config, ports, manual=False):
-        # Add modules
-        modules = config["modules"]
-        # Connect saver to pydra
-        pydra_port = config["connections"]["pydra"]["port"]
-        config["connections"]["saver"]["subscriptions"].append(("pydra", pydra_port, (EXIT, EVENT, LOGGED)))
-        # Assign ports to workers
-        for module in modules:
-            worker = module["worker"]
-            worker_config = {}
-            pub, sub = ports.pop(0)
-            worker_config["publisher"] = pub
-            worker_config["port"] = sub
-            config["connections"][worker.name] = worker_config
-            # Add saver subscription
-            config["connections"]["saver"]["subscriptions"].append((worker.name,
-                                                                    worker_config["port"],
-                                                                    (MESSAGE, LOGGED, DATA)))
-        # Add connections for subscriptions
-        for module in modules:
-            worker = module["worker"]
-            # Add subscription to pydra
-            config["connections"][worker.name]["subscriptions"] = [("pydra",
-                                                                    pydra_port,
-                                                                    (EXIT, EVENT))]
-            # Add subscriptions to other workers
-            for sub in worker.subscriptions:
-                port = config["connections"][sub]["port"]
-                config["connections"][worker.name]["subscriptions"].append((sub,
-                                                                            port,
-                                                                            (EVENT, DATA, TRIGGER)))
+        """Assigns ports and subscriptions to all modules in the config. If manual is True, opens a window for editing
+        connections."""
+        config = PydraController.configure(config, ports)
         if manual:
             connections = NetworkConfiguration.run(config["connections"])
             config["connections"] = connections
@@ -1,5 +1,6 @@
 from pydra import Pydra, config, ports
 from pydra.core.workers import Worker, Acquisition
+from pydra.utilities import clock
 import time
 
 
@@ -18,7 +19,7 @@ class SpamWorker(Acquisition):
     def acquire(self, **kwargs):
         """Acquisition workers will call their acquire method once for every pass of the event loop."""
         # Get the current time
-        now = time.time()
+        now = clock.now()
         # Broadcast a timestamped data message throughout the network
         self.send_timestamped(now, {"counter": self.counter})
         # Wait for one second
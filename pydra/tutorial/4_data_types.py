@@ -1,5 +1,6 @@
 from pydra import Pydra, config, ports
 from pydra.core.workers import Worker
+from pydra.utilities import clock
 import time
 import numpy as np
 
@@ -17,7 +18,7 @@ class DataSender(Worker):
 
     def send_data(self, data_type, **kwargs):
         # Get the current time
-        now = time.time()
+        now = clock.now()
         data = dict(hello="world", spam="eggs")
         if data_type == "timestamped":
             # Send a timestamped data message
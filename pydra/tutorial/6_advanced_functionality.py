@@ -2,6 +2,7 @@ from pydra import Pydra, ports, config
 from pydra.core import Worker, Acquisition
 from pydra.gui import ControlWidget
 from pydra.modules.cameras.widget import FramePlotter
+from pydra.utilities import clock
 from PyQt5 import QtWidgets
 import numpy as np
 import time
@@ -30,7 +31,7 @@ class AcquisitionWorker(Acquisition):
         frame *= 255
         frame = frame.astype("uint8")
         # Get the time stamp
-        t = time.time()
+        t = clock.now()
         # Broadcast frame data through the network
         self.send_frame(t, self.i, frame)
         # Increment the frame index
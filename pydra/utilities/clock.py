@@ -1,11 +1,25 @@
 import time
 
 
+def monotonic():
+    """Returns the local monotonic time in seconds (from time.perf_counter_ns)."""
+    return time.perf_counter_ns() * 1e-9
+
+
 class ClockMeta(type):
-    """Metaclass for clock used to synchronize timestamps across GUI components."""
+    """Metaclass for the network clock, used to synchronize timestamps across pydra processes and GUI components.
+
+    Time is measured with a monotonic counter (time.perf_counter_ns), so intervals are not corrupted by wall-clock
+    adjustments (e.g. from NTP). Each process applies an offset to its local counter so that timestamps share the time
+    base of the main pydra process. Workers estimate the offset from the timestamps of test_connection events sent by
+    pydra at startup (see synchronize). The wall-clock time corresponding to the network time base is available from
+    the timebase method and is saved once per recording.
+    """
 
     def __init__(cls, name, bases, dct):
-        cls._t0 = time.time()
+        cls._offset = 0.
+        cls._synchronized = False
+        cls._t0 = cls.now()
 
     @property
     def t0(cls):
@@ -13,10 +27,33 @@ class ClockMeta(type):
 
     @property
     def t(cls):
-        return time.time() - cls._t0
+        return cls.now() - cls._t0
+
+    @property
+    def offset(cls):
+        return cls._offset
+
+    def now(cls):
+        """Returns the current network time (seconds)."""
+        return monotonic() + cls._offset
 
     def reset(cls):
-        cls._t0 = time.time()
+        cls._t0 = cls.now()
+
+    def synchronize(cls, remote_t, local_t):
+        """Updates the offset from a message sent at network time remote_t and received at local monotonic time local_t.
+
+        Transit latency can only make an estimate of the offset too small, so the largest estimate is kept.
+        """
+        offset = remote_t - local_t
+        if (not cls._synchronized) or (offset > cls._offset):
+            cls._offset = offset
+            cls._synchronized = True
+
+    def timebase(cls):
+        """Returns a dictionary containing the current network time and the corresponding wall-clock time, allowing
+        network timestamps to be converted to wall-clock time."""
+        return dict(time=cls.now(), epoch=time.time())
 
 
 class clock(metaclass=ClockMeta):
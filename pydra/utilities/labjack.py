@@ -1,4 +1,14 @@
-import u3
+from pydra.utilities.clock import clock
+from pydra.core.scheduler import sleep_until, SPIN
+import threading
+import heapq
+import queue
+import sys
+import os
+try:
+    import u3
+except ImportError:
+    pass
 
 
 class LabJack:
@@ -8,10 +18,11 @@ class LabJack:
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self._write_lock = threading.Lock()  # writes may come from the output scheduler thread
 
-    def connect(self, **kwargs):
+    def connect(self, fake=False, **kwargs):
         print('Connecting to labjack...', end=' ')
-        self.u = u3.U3()
+        self.u = FakeU3() if fake else u3.U3()
         # for reg, addr in self.registers.items():
         #     self.u.writeRegister(addr, 0)
         self.u.writeRegister(self.registers["DAC0"], 0)
@@ -20,9 +31,250 @@ class LabJack:
 
     def send_signal(self, register, val):
         try:
-            self.u.writeRegister(self.registers[register], val)
+            with self._write_lock:
+                self.u.writeRegister(self.registers[register], val)
         except KeyError:
             raise Warning(f'{register} if not a valid DAC register (valid registers are: '
                           f'{[key for key in self.registers.keys()]}).')
         except AttributeError:
             pass
+
+
+class FakeU3:
+    """In-memory stand-in for a LabJack U3, for tests and running without hardware.
+
+    Attributes
+    ----------
+    registers : dict
+        The last value written to each register address.
+    writes : list
+        (time, address, value) of every write, with the time on the network clock.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.registers = {}
+        self.writes = []
+
+    def writeRegister(self, address, value):
+        self.registers[address] = value
+        self.writes.append((clock.now(), address, value))
+        return value
+
+    def readRegister(self, address):
+        return self.registers.get(address, 0)
+
+    def close(self):
+        return
+
+
+class Waveform:
+    """A sequence of values to be written to a register.
+
+    Each sample is written at its offset from the start time of the waveform, and holds until the next sample. Waveforms
+    can be joined with +, which appends the second waveform after the end of the first.
+
+    Parameters
+    ----------
+    register : str
+        Name of the register (e.g. 'DAC0').
+    offsets : iterable
+        Time of each sample relative to the start of the waveform (seconds), in increasing order.
+    values : iterable
+        Value of each sample.
+    duration : float (optional)
+        Duration of the waveform (seconds). Defaults to the offset of the last sample.
+    """
+
+    def __init__(self, register: str, offsets=(), values=(), duration: float = None):
+        self.register = register
+        self.offsets = [float(offset) for offset in offsets]
+        self.values = list(values)
+        if len(self.offsets) != len(self.values):
+            raise ValueError("offsets and values must have the same length")
+        self.duration = duration if duration is not None else (self.offsets[-1] if len(self.offsets) else 0.)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        return iter(zip(self.offsets, self.values))
+
+    def __add__(self, other: "Waveform") -> "Waveform":
+        if other.register != self.register:
+            raise ValueError("cannot join waveforms for different registers")
+        offsets = self.offsets + [self.duration + offset for offset in other.offsets]
+        return Waveform(self.register, offsets, self.values + other.values, self.duration + other.duration)
+
+    @classmethod
+    def constant(cls, register: str, value: float, duration: float = 0.):
+        """Sets the register to a value."""
+        return cls(register, [0.], [value], duration)
+
+    @classmethod
+    def pulses(cls, register: str, amplitude: float, frequency: float, width: float, n: int = None,
+               duration: float = None, baseline: float = 0.):
+        """A train of square pulses.
+
+        Parameters
+        ----------
+        amplitude : float
+            Value during each pulse.
+        frequency : float
+            Pulse frequency (Hz).
+        width : float
+            Duration of each pulse (seconds).
+        n : int (optional)
+            Number of pulses.
+        duration : float (optional)
+            Duration of the train (seconds). Used to determine the number of pulses if n is not given.
+        baseline : float
+            Value between pulses.
+        """
+        period = 1. / frequency
+        if width >= period:
+            raise ValueError("pulse width must be shorter than the period")
+        if n is None:
+            if duration is None:
+                raise ValueError("number of pulses or duration must be specified")
+            n = int(round(duration * frequency))
+        offsets, values = [], []
+        for pulse in range(n):
+            offsets.extend([pulse * period, pulse * period + width])
+            values.extend([amplitude, baseline])
+        return cls(register, offsets, values, n * period)
+
+    @classmethod
+    def ramp(cls, register: str, start: float, stop: float, duration: float, step: float = 0.001):
+        """A linear ramp from start to stop, updated every step seconds. The final value is held after the ramp."""
+        n = max(1, int(round(duration / step)))
+        offsets = [duration * k / n for k in range(n + 1)]
+        values = [start + (stop - start) * k / n for k in range(n + 1)]
+        return cls(register, offsets, values, duration)
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "Waveform":
+        """Creates a waveform from a dictionary (e.g. the keyword arguments of an event). The kind key specifies the
+        constructor ('pulses', 'ramp' or 'constant'), and a list of dictionaries under the kind 'sequence' is joined in
+        order. Samples can also be given directly with the offsets and values keys."""
+        spec = dict(spec)
+        kind = spec.pop("kind", "samples")
+        if kind == "sequence":
+            waveforms = [cls.from_dict(dict(item, register=spec.get("register", "DAC0"))) for item in spec["waveforms"]]
+            out = waveforms[0]
+            for waveform in waveforms[1:]:
+                out = out + waveform
+            return out
+        if kind == "samples":
+            return cls(**spec)
+        return getattr(cls, kind)(**spec)
+
+
+class OutputScheduler:
+    """Writes waveforms to registers at scheduled times from a dedicated thread.
+
+    Scheduled writes are kept in a queue sorted by time. The thread sleeps until shortly before the next write and then
+    spins on the network clock (see pydra.core.scheduler.sleep_until), so writes do not depend on when events arrive or
+    on the loop of the worker. The thread is given a high priority where the OS allows it. The scheduled and actual time
+    of every write are put in the writes queue.
+
+    Parameters
+    ----------
+    write : callable
+        Called with the register and value of each write.
+    spin : float
+        Time before each write at which the thread stops sleeping and starts spinning (seconds).
+
+    Attributes
+    ----------
+    writes : queue.Queue
+        (scheduled time, write time, register, value) of each write.
+    """
+
+    def __init__(self, write: callable, spin: float = SPIN):
+        self.write = write
+        self.spin = spin
+        self.writes = queue.Queue()
+        self._pending = []  # heap of (time, sequence number, register, value)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def running(self):
+        return (self._thread is not None) and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops the thread. Pending writes are discarded."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+        self.cancel()
+
+    def schedule(self, waveform: Waveform, t0: float = None):
+        """Schedules a waveform starting at time t0 on the network clock (defaults to now). If t0 has already passed
+        (e.g. the event arrived late), the waveform is delayed to start now rather than writing the samples that are
+        already due back to back."""
+        now = clock.now()
+        t0 = now if t0 is None else max(t0, now)
+        with self._lock:
+            for offset, value in waveform:
+                heapq.heappush(self._pending, (t0 + offset, self._seq, waveform.register, value))
+                self._seq += 1
+        self._wake.set()
+
+    def cancel(self, register: str = None):
+        """Discards pending writes (to a register, or all registers)."""
+        with self._lock:
+            if register is None:
+                self._pending = []
+            else:
+                self._pending = [item for item in self._pending if item[2] != register]
+                heapq.heapify(self._pending)
+        self._wake.set()
+
+    def _run(self):
+        set_high_priority()
+        while not self._stop.is_set():
+            self._wake.clear()
+            with self._lock:
+                deadline = self._pending[0][0] if len(self._pending) else None
+            if deadline is None:
+                self._wake.wait()
+                continue
+            if not sleep_until(deadline, self.spin, self._wake):
+                continue  # a waveform was scheduled or cancelled, check the next deadline again
+            with self._lock:
+                if (not len(self._pending)) or (self._pending[0][0] > deadline):
+                    continue
+                t_scheduled, seq, register, value = heapq.heappop(self._pending)
+            self.write(register, value)
+            self.writes.put((t_scheduled, clock.now(), register, value))
+
+
+def set_high_priority():
+    """Tries to give the calling thread a high (real-time) scheduling priority. Fails silently if the OS does not allow
+    it (e.g. without administrator privileges)."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            THREAD_PRIORITY_TIME_CRITICAL = 15
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_TIME_CRITICAL)
+        else:
+            priority = os.sched_get_priority_max(os.SCHED_FIFO)
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+    except (AttributeError, OSError):
+        pass
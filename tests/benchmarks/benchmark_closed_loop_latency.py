@@ -0,0 +1,74 @@
+"""Measures the closed-loop latency from frame capture to actuator output.
+
+A synthetic camera publishes frames to the tail tracker. A closed-loop worker receives the tracked tail angle and sends
+a stimulation_on or stimulation_off event (alternating on every frame) to the optogenetics worker, which writes to a
+stub LabJack. The latency of each frame is traced through the network (see pydra.core.workers.Worker.trace), and the
+saver prints the latency of each stage and the total latency when recording stops. Histograms are saved in the
+*_latency_summary.json file.
+"""
+from pydra import config, ports
+from pydra.core import Worker
+from pydra.headless import HeadlessPydra
+from pydra.modules.cameras.synthetic.synthetic import SyntheticCamera
+from pydra.modules.tracking.tail_tracker.worker import TailTrackingWorker
+from pydra.modules.optogenetics.worker import OptogeneticsWorker
+import tempfile
+
+
+DURATION = 10.
+FRAME_RATE = 200.
+FRAME_SIZE = (320, 320)
+TAIL_POINTS = [(160, 80), (160, 240)]
+
+
+class StubU3:
+    """Stands in for a LabJack U3."""
+
+    def __init__(self):
+        self.writes = 0
+
+    def writeRegister(self, address, value):
+        self.writes += 1
+
+
+class Tracker(TailTrackingWorker):
+    subscriptions = ("synthetic",)
+
+
+class ClosedLoop(Worker):
+    name = "closedloop"
+    subscriptions = ("tail",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.state = 0
+
+    def recv_indexed(self, t, i, data, **kwargs):
+        event = "stimulation_off" if self.state else "stimulation_on"
+        self.state = 1 - self.state
+        self.send_event(event, _trace=self.trace(t, i, **kwargs))
+
+
+class Optogenetics(OptogeneticsWorker):
+    subscriptions = ("closedloop",)
+
+    def connect(self, **kwargs):
+        self.u = StubU3()
+
+    def setup(self):
+        self.connect()
+
+
+if __name__ == "__main__":
+    config["modules"] = [
+        {"worker": SyntheticCamera, "params": dict(frame_size=FRAME_SIZE, frame_rate=FRAME_RATE, pattern="dot")},
+        {"worker": Tracker, "params": {}},
+        {"worker": ClosedLoop, "params": {}},
+        {"worker": Optogenetics, "params": {}}
+    ]
+    config = HeadlessPydra.configure(config, ports)
+    with tempfile.TemporaryDirectory() as directory:
+        pydra = HeadlessPydra(working_dir=directory, filename="latency", **config)
+        pydra.send_event("initialize_tracker", points=TAIL_POINTS, n=10)
+        pydra.record(DURATION)
+        pydra.shutdown()
@@ -0,0 +1,238 @@
+"""Benchmarks the messaging layer.
+
+Two sets of benchmarks are run for several payload sizes:
+
+    codec   Time to encode and decode a value of each data type in PydraMessage._serializers.
+    pubsub  Throughput and latency of MESSAGE, EVENT, TIMESTAMPED, INDEXED, ARRAY and FRAME messages sent over a PUB/SUB
+            connection to a subscriber in another process. Throughput is measured by sending messages as fast as
+            possible, and latency (from serializing the message to decoding it in the subscriber) by sending messages
+            at a fixed rate.
+
+Results are printed and saved as json. If a baseline file exists, each result is compared with the baseline and
+results that are worse by more than the tolerance are reported as regressions (and the exit code is 1).
+
+Timings depend on the machine, so no baseline is included with pydra: results are only comparable with a baseline
+recorded on the same machine. Until a baseline has been created with --update-baseline (saved to
+baselines/messaging.json next to this script by default), results are printed without being compared::
+
+    python benchmark_messaging.py --update-baseline  # save results as the baseline for this machine
+    python benchmark_messaging.py                    # compare with the baseline
+"""
+from pydra.core.messaging import *
+from pydra.core.messaging.serializers import *
+from pydra.utilities import clock
+from pathlib import Path
+import multiprocessing as mp
+import numpy as np
+import argparse
+import json
+import time
+import sys
+import zmq
+
+
+BASELINE = Path(__file__).parent.joinpath("baselines", "messaging.json")
+
+# Payloads for encoding/decoding each data type, by size
+PAYLOADS = {
+    int: {"": 123456},
+    float: {"": 1234.5678},
+    str: dict([(f"{n}B", "x" * n) for n in (16, 1024, 65536)]),
+    dict: dict([(f"{n}keys", dict([(f"param{k}", float(k)) for k in range(n)])) for n in (1, 100, 10000)]),
+    np.ndarray: dict([(f"{n}x8B", np.random.random(n)) for n in (100, 10000, 1000000)])
+}
+
+# Arguments of the method sent by each message type, by size
+MESSAGES = {
+    "MESSAGE": (MESSAGE, dict([(f"{n}B", "x" * n) for n in (16, 1024, 65536)])),  # string messages are not tuples
+    "EVENT": (EVENT, dict([(f"{n}keys", ("event", dict([(f"kw{k}", k) for k in range(n)]))) for n in (1, 100, 1000)])),
+    "TIMESTAMPED": (TIMESTAMPED, dict([(f"{n}keys", (0., dict([(f"param{k}", float(k)) for k in range(n)])))
+                                       for n in (1, 10, 100)])),
+    "INDEXED": (INDEXED, dict([(f"{n}keys", (0., 0, dict([(f"param{k}", float(k)) for k in range(n)])))
+                               for n in (1, 10, 100)])),
+    "ARRAY": (ARRAY, dict([(f"{n}x8B", (0., 0, np.random.random(n))) for n in (10, 1000, 100000)])),
+    "FRAME": (FRAME, dict([(f"{w}x{h}", (0., 0, np.random.randint(0, 256, (h, w), dtype="uint8")))
+                           for (w, h) in ((64, 64), (640, 480), (2048, 2048))]))
+}
+
+
+def timed(f, *args, min_time=0.2):
+    """Returns the mean time (us) of calls to f, repeated for at least min_time seconds."""
+    n = 0
+    t0 = time.perf_counter()
+    while True:
+        for i in range(10):
+            f(*args)
+        n += 10
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            return elapsed / n * 1e6
+
+
+def benchmark_codec():
+    results = {}
+    for dtype, (s, encoder, decoder) in PydraMessage._serializers.items():
+        for size, value in PAYLOADS[dtype].items():
+            encoded = encoder(value)
+            key = f"{dtype.__name__}/{size}" if size else dtype.__name__
+            results[key] = dict(encode_us=timed(encoder, value), decode_us=timed(decoder, encoded),
+                                bytes=len(encoded))
+    return results
+
+
+class Sender:
+    """Publishes messages with the serializer of each message type (as the decorated methods of a worker would)."""
+
+    name = "benchmark"
+
+    def __init__(self, sock):
+        self.zmq_publisher = sock
+
+    def send(self, message, args):
+        self.zmq_publisher.send_serialized((self, self.send, args), message.serializer)
+
+
+def subscribe(port, kind, n, ready, results):
+    """Subscriber process. Receives n messages (or until no message has arrived for 1 s) and puts the time each message
+    was sent and received in the results queue."""
+    sock = zmq.Context.instance().socket(zmq.SUB)
+    sock.setsockopt(zmq.RCVHWM, 0)
+    sock.connect(port)
+    sock.setsockopt(zmq.SUBSCRIBE, b"")
+    message = MESSAGES[kind][0]
+    sent, received = np.zeros(n), np.zeros(n)
+    count = 0
+    ready.set()
+    while count < n:
+        if not sock.poll(1000):
+            break
+        flag, source, t, flags, args = PydraMessage.recv(sock)
+        if flag == "exit":
+            continue
+        message.decode(*args)
+        sent[count], received[count] = t, clock.now()
+        count += 1
+    results.put((sent[:count], received[:count]))
+    sock.close()
+
+
+def run_pubsub(kind, args, n, interval=0.):
+    """Sends n messages to a subscriber process, every interval seconds (or as fast as possible if interval is 0).
+    Returns the times that each received message was sent and received."""
+    context = zmq.Context.instance()
+    sock = context.socket(zmq.PUB)
+    sock.setsockopt(zmq.SNDHWM, 0)
+    port = f"tcp://127.0.0.1:{sock.bind_to_random_port('tcp://127.0.0.1')}"
+    ready, results = mp.Event(), mp.Queue()
+    process = mp.Process(target=subscribe, args=(port, kind, n, ready, results))
+    process.start()
+    ready.wait()
+    # Wait for the subscription to reach the publisher (exit messages are ignored by the subscriber)
+    sender = Sender(sock)
+    for i in range(50):
+        sender.send(EXIT, ())
+        time.sleep(0.01)
+    message = MESSAGES[kind][0]
+    t_next = clock.now()
+    for i in range(n):
+        if interval:
+            while clock.now() < t_next:
+                pass
+            t_next += interval
+        sender.send(message, args)
+    sent, received = results.get()
+    process.join()
+    sock.close(linger=0)
+    return sent, received
+
+
+def benchmark_pubsub(n_throughput=10000, n_latency=1000, interval=0.001):
+    results = {}
+    for kind, (message, payloads) in MESSAGES.items():
+        for size, args in payloads.items():
+            sent, received = run_pubsub(kind, args, n_throughput)
+            duration = received[-1] - sent[0] if len(received) else np.nan
+            throughput = len(received) / duration if len(received) else 0.
+            sent, received = run_pubsub(kind, args, n_latency, interval)
+            latency = (received - sent) * 1e6
+            results[f"{kind}/{size}"] = dict(msgs_per_s=throughput,
+                                             received=len(received) / n_latency,
+                                             latency_p50_us=float(np.percentile(latency, 50)) if len(latency) else None,
+                                             latency_p99_us=float(np.percentile(latency, 99)) if len(latency) else None)
+    return results
+
+
+# Metrics compared with the baseline, and whether higher values are better
+METRICS = {
+    "encode_us": False,
+    "decode_us": False,
+    "msgs_per_s": True,
+    "latency_p50_us": False,
+    "latency_p99_us": False
+}
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of (benchmark, metric, baseline, result) for results that are worse than the baseline by more than
+    the tolerance (fraction)."""
+    regressions = []
+    for suite, benchmarks in results.items():
+        for key, metrics in benchmarks.items():
+            reference = baseline.get(suite, {}).get(key, {})
+            for metric, higher_is_better in METRICS.items():
+                new, old = metrics.get(metric), reference.get(metric)
+                if (new is None) or (old is None) or (old == 0):
+                    continue
+                change = (new - old) / old
+                if (-change if higher_is_better else change) > tolerance:
+                    regressions.append((f"{suite}/{key}", metric, old, new))
+    return regressions
+
+
+def report(results):
+    for key, r in results["codec"].items():
+        print(f"codec {key}: encode {r['encode_us']:.2f} us, decode {r['decode_us']:.2f} us, {r['bytes']} bytes")
+    for key, r in results["pubsub"].items():
+        p50 = f"{r['latency_p50_us']:.1f}" if r["latency_p50_us"] is not None else "-"
+        p99 = f"{r['latency_p99_us']:.1f}" if r["latency_p99_us"] is not None else "-"
+        print(f"pubsub {key}: {r['msgs_per_s']:.0f} msgs/s, latency p50={p50} us, p99={p99} us "
+              f"({r['received']:.1%} received)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the pydra messaging layer.")
+    parser.add_argument("--output", default="benchmark_messaging.json", help="Path of the json file for the results.")
+    parser.add_argument("--baseline", default=str(BASELINE), help="Path of the json file containing the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Fraction by which a result can be worse than the baseline before it is a regression.")
+    parser.add_argument("--update-baseline", action="store_true", help="Save the results as the baseline.")
+    parser.add_argument("--codec-only", action="store_true", help="Skip the PUB/SUB benchmarks.")
+    options = parser.parse_args()
+
+    results = dict(codec=benchmark_codec())
+    if not options.codec_only:
+        results["pubsub"] = benchmark_pubsub()
+    else:
+        results["pubsub"] = {}
+    report(results)
+    with open(options.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {options.output}")
+
+    baseline = Path(options.baseline)
+    if options.update_baseline:
+        baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {baseline}")
+    elif baseline.exists():
+        with open(baseline, "r") as f:
+            regressions = compare(results, json.load(f), options.tolerance)
+        for key, metric, old, new in regressions:
+            print(f"REGRESSION {key} {metric}: {old:.2f} -> {new:.2f}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions (tolerance {options.tolerance:.0%})")
+    else:
+        print(f"No baseline found at {baseline}, results were not compared (baselines are specific to each "
+              f"machine, run with --update-baseline to create one)")
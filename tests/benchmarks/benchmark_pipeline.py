@@ -0,0 +1,236 @@
+"""Measures the maximum sustainable frame rate of a two-camera pipeline like hyperion.py.
+
+The cameras of hyperion.py are replaced by synthetic cameras (the jaw camera runs at 40% of the frame rate of the tail
+camera, as in hyperion.py), the tail is tracked from the tail camera and a probe worker records the latency of every
+tracked frame. For each combination of frame size and frame rate, a headless pydra network records for a fixed
+duration in a separate process (so each run gets fresh ports) and reports:
+
+    - the achieved frame rate and the number of dropped (missed) frames of each camera (see FrameHealth)
+    - the number of frames saved and the number of frames tracked
+    - the mean CPU use and maximum resident memory of each process (requires psutil)
+    - the maximum depth of the saver queues
+    - percentiles of the latency from frame capture to the probe
+
+A configuration is sustainable if both cameras reach 99% of their frame rate without dropping frames, at least 99% of
+frames are saved and tracked (frames in flight when recording starts and stops are not counted), and the saver queues do
+not grow beyond one second of frames. Results are printed as a scaling table and saved as json::
+
+    python benchmark_pipeline.py --sizes 300x300 640x480 --rates 100 250 500 1000 --duration 10
+"""
+from pydra import config, ports
+from pydra.core import Worker
+from pydra.headless import HeadlessPydra
+from pydra.modules.cameras.synthetic.synthetic import SyntheticCamera
+from pydra.modules.tracking.tail_tracker.worker import TailTrackingWorker
+from pathlib import Path
+import subprocess
+import threading
+import tempfile
+import argparse
+import json
+import sys
+import os
+import h5py
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+JAW_RATIO = 0.4  # frame rate of the jaw camera relative to the tail camera (100 / 250 Hz in hyperion.py)
+
+
+class TailCam(SyntheticCamera):
+    name = "tailcam"
+    pipeline = "tail"
+
+
+class JawCam(SyntheticCamera):
+    name = "jawcam"
+    pipeline = "jaw"
+
+
+class Tracker(TailTrackingWorker):
+    subscriptions = ("tailcam",)
+    pipeline = "tail"
+
+
+class LatencyProbe(Worker):
+    """Records the latency of each tracked frame (see Worker.trace)."""
+
+    name = "probe"
+    subscriptions = ("tail",)
+
+    def recv_indexed(self, t, i, data, **kwargs):
+        self.record_trace(self.trace(t, i, **kwargs))
+
+
+class ProcessMonitor(threading.Thread):
+    """Samples the CPU use (%) and resident memory (MB) of processes (and their children) until stopped."""
+
+    def __init__(self, pids: dict, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.processes = dict([(name, psutil.Process(pid)) for name, pid in pids.items()])
+        self.samples = dict([(name, dict(cpu=[], rss=[])) for name in pids])
+        self._stop_event = threading.Event()
+
+    def _measure(self, process):
+        processes = [process] + process.children(recursive=True)
+        cpu, rss = 0., 0.
+        for p in processes:
+            try:
+                cpu += p.cpu_percent()
+                rss += p.memory_info().rss / 1e6
+            except psutil.Error:
+                pass
+        return cpu, rss
+
+    def run(self):
+        for process in self.processes.values():
+            self._measure(process)  # the first call to cpu_percent starts the measurement
+        while not self._stop_event.wait(self.interval):
+            for name, process in self.processes.items():
+                cpu, rss = self._measure(process)
+                self.samples[name]["cpu"].append(cpu)
+                self.samples[name]["rss"].append(rss)
+
+    def stop(self) -> dict:
+        """Stops sampling and returns the mean CPU use and maximum memory of each process."""
+        self._stop_event.set()
+        self.join()
+        out = {}
+        for name, s in self.samples.items():
+            out[name] = dict(cpu_mean=sum(s["cpu"]) / len(s["cpu"]) if len(s["cpu"]) else None,
+                             rss_max=max(s["rss"]) if len(s["rss"]) else None)
+        return out
+
+
+def count(path, worker):
+    """Returns the number of indexed samples saved by a worker in an hdf5 file."""
+    if not path.exists():
+        return 0
+    with h5py.File(path, "r") as f:
+        return len(f[worker]["index"]) if worker in f else 0
+
+
+def load_json(path):
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def run(frame_size, frame_rate, duration):
+    """Records with the given frame size (width, height) and tail camera frame rate and returns the results."""
+    width, height = frame_size
+    rates = dict(tailcam=frame_rate, jawcam=frame_rate * JAW_RATIO)
+    config["modules"] = [
+        {"worker": TailCam, "params": dict(frame_size=frame_size, frame_rate=rates["tailcam"], pattern="dot")},
+        {"worker": JawCam, "params": dict(frame_size=frame_size, frame_rate=rates["jawcam"], pattern="noise")},
+        {"worker": Tracker, "params": {}},
+        {"worker": LatencyProbe, "params": {}}
+    ]
+    network = HeadlessPydra.configure(config, ports)
+    with tempfile.TemporaryDirectory() as directory:
+        pydra = HeadlessPydra(working_dir=directory, filename="benchmark", **network)
+        pydra.send_event("initialize_tracker", points=[(width // 2, height // 4), (width // 2, 3 * height // 4)], n=10)
+        monitor = None
+        if psutil is not None:
+            pids = dict(pydra=os.getpid(), saver=pydra.saver.pid)
+            pids.update([(process.worker_type.name, process.pid) for process in pydra._workers])
+            monitor = ProcessMonitor(pids)
+            monitor.start()
+        pydra.record(duration)
+        processes = monitor.stop() if monitor else {}
+        pydra.shutdown()
+        directory = Path(directory)
+        health = load_json(directory.joinpath("benchmark_health.json"))
+        latency = load_json(directory.joinpath("benchmark_latency_summary.json")).get("total", {})
+        cameras = {}
+        for camera, pipeline in (("tailcam", "tail"), ("jawcam", "jaw")):
+            h = health.get(camera, {})
+            cameras[camera] = dict(expected_fps=rates[camera], fps=h.get("fps", 0.), missed=h.get("missed", 0),
+                                   late=h.get("late", 0), frames=h.get("frames", 0),
+                                   saved=count(directory.joinpath(f"benchmark_{pipeline}.hdf5"), camera))
+        tracked = count(directory.joinpath("benchmark_tail.hdf5"), "tail")
+    return dict(frame_size=list(frame_size), frame_rate=frame_rate, duration=duration, cameras=cameras,
+                tracked=tracked, processes=processes, saver_queues=health.get("saver_queues", {}),
+                latency=dict([(key, latency.get(key)) for key in ("p50", "p90", "p99", "max")]))
+
+
+def sustainable(result) -> bool:
+    for camera in result["cameras"].values():
+        if (camera["fps"] < 0.99 * camera["expected_fps"]) or camera["missed"]:
+            return False
+        if camera["saved"] < 0.99 * camera["frames"]:
+            return False
+    if result["tracked"] < 0.99 * result["cameras"]["tailcam"]["saved"]:
+        return False
+    for depths in result["saver_queues"].values():
+        if max(depths.values()) > result["frame_rate"]:
+            return False
+    return True
+
+
+def table(results) -> str:
+    header = (f"{'size':>10} {'rate':>6} {'tail fps':>9} {'jaw fps':>8} {'missed':>7} {'untracked':>9} "
+              f"{'queue':>6} {'p50 ms':>7} {'p99 ms':>7} {'max cpu %':>16} {'rss MB':>7}  ok")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        tail, jaw = r["cameras"]["tailcam"], r["cameras"]["jawcam"]
+        missed = tail["missed"] + jaw["missed"]
+        queue = max([max(depths.values()) for depths in r["saver_queues"].values()] or [0])
+        p50 = f"{r['latency']['p50']:.2f}" if r["latency"]["p50"] is not None else "-"
+        p99 = f"{r['latency']['p99']:.2f}" if r["latency"]["p99"] is not None else "-"
+        cpu = [(s["cpu_mean"], name) for name, s in r["processes"].items() if s["cpu_mean"] is not None]
+        cpu = f"{max(cpu)[0]:.0f} ({max(cpu)[1]})" if cpu else "-"
+        rss = [s["rss_max"] for s in r["processes"].values() if s["rss_max"] is not None]
+        rss = f"{sum(rss):.0f}" if rss else "-"
+        size = "x".join([str(x) for x in r["frame_size"]])
+        lines.append(f"{size:>10} {r['frame_rate']:>6.0f} {tail['fps']:>9.1f} {jaw['fps']:>8.1f} {missed:>7} "
+                     f"{tail['saved'] - r['tracked']:>9} {queue:>6} {p50:>7} {p99:>7} {cpu:>16} {rss:>7}  "
+                     f"{'yes' if sustainable(r) else 'no'}")
+    return "\n".join(lines)
+
+
+def parse_size(s):
+    return tuple(int(x) for x in s.lower().split("x"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the maximum sustainable frame rate of a pydra pipeline.")
+    parser.add_argument("--sizes", nargs="+", default=["300x300", "640x480", "1280x1024"], help="Frame sizes (WxH).")
+    parser.add_argument("--rates", nargs="+", type=float, default=[100., 250., 500., 1000.],
+                        help="Frame rates of the tail camera (Hz).")
+    parser.add_argument("--duration", type=float, default=10., help="Duration of each recording (seconds).")
+    parser.add_argument("--output", default="benchmark_pipeline.json", help="Path of the json file for the results.")
+    parser.add_argument("--single", nargs=2, metavar=("SIZE", "RATE"), help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.single:  # run one configuration and save its results
+        size, rate = options.single
+        result = run(parse_size(size), float(rate), options.duration)
+        with open(options.output, "w") as f:
+            json.dump(result, f, indent=2)
+        sys.exit(0)
+
+    if psutil is None:
+        print("psutil is not installed: CPU and memory use will not be measured.")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in options.sizes:
+            for rate in options.rates:
+                print(f"Running {size} at {rate:.0f} fps...")
+                output = str(Path(directory).joinpath(f"{size}_{rate:.0f}.json"))
+                subprocess.run([sys.executable, __file__, "--single", size, str(rate), "--duration",
+                                str(options.duration), "--output", output], check=True)
+                results.append(load_json(Path(output)))
+    print(table(results))
+    for size in options.sizes:
+        rates = [r["frame_rate"] for r in results if (r["frame_size"] == list(parse_size(size))) and sustainable(r)]
+        print(f"{size}: maximum sustainable frame rate {max(rates):.0f} fps" if rates else
+              f"{size}: no sustainable frame rate")
+    with open(options.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {options.output}")
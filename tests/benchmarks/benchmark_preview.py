@@ -0,0 +1,34 @@
+"""Compares the frame rate of pg.ImageItem with the PreviewImageItem used for fast camera previews.
+
+Each item receives a new 1280x1024 uint8 frame and is then painted onto an offscreen image, which approximates the cost
+of one preview update in the GUI (without the screen swap).
+"""
+from pydra.gui.plotter import PreviewImageItem
+from PyQt5 import QtWidgets, QtGui
+import pyqtgraph as pg
+import numpy as np
+import time
+
+
+def benchmark(item, frames, n=200):
+    target = QtGui.QImage(1280, 1024, QtGui.QImage.Format_ARGB32_Premultiplied)
+    painter = QtGui.QPainter(target)
+    t0 = time.perf_counter()
+    for i in range(n):
+        item.setImage(frames[i % len(frames)])
+        item.paint(painter)
+    t1 = time.perf_counter()
+    painter.end()
+    return n / (t1 - t0)
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication([])
+    pg.setConfigOption("imageAxisOrder", "row-major")
+    frames = [np.random.randint(0, 256, (1024, 1280), dtype="uint8") for i in range(10)]
+    fps = benchmark(pg.ImageItem(), frames)
+    print(f"pg.ImageItem: {fps:.1f} fps")
+    fps = benchmark(PreviewImageItem(), frames)
+    print(f"PreviewImageItem (identity levels): {fps:.1f} fps")
+    fps = benchmark(PreviewImageItem(levels=(20, 200)), frames)
+    print(f"PreviewImageItem (fixed levels): {fps:.1f} fps")
@@ -0,0 +1,56 @@
+"""Compares the throughput of per-frame and batched tail tracking.
+
+A synthetic camera publishes frames faster than the tail can be tracked frame by frame. The tail tracker runs in one of
+three modes, given on the command line:
+
+    python benchmark_tail_batching.py per-frame  # track every frame, two messages per frame
+    python benchmark_tail_batching.py batch      # drain pending frames, one batched message per batch
+    python benchmark_tail_batching.py realtime   # drain pending frames, only track the newest frame of each batch
+
+After recording, the number of frames published by the camera is compared with the number of frames tracked, and the
+tracking rate is reported. Modes are run in separate processes so that each run gets fresh ports.
+"""
+from pydra import config, ports
+from pydra.headless import HeadlessPydra
+from pydra.modules.cameras.synthetic.synthetic import SyntheticCamera
+from pydra.modules.tracking.tail_tracker.worker import TailTrackingWorker
+from pathlib import Path
+import tempfile
+import h5py
+import sys
+
+
+MODES = {
+    "per-frame": dict(batch=False),
+    "batch": dict(batch=True),
+    "realtime": dict(batch=True, realtime=True)
+}
+
+DURATION = 10.
+FRAME_RATE = 1000.
+FRAME_SIZE = (320, 320)
+# A straight line through the dot pattern of the synthetic camera
+TAIL_POINTS = [(160, 80), (160, 240)]
+
+
+class TailTracker(TailTrackingWorker):
+    subscriptions = ("synthetic",)
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "per-frame"
+    config["modules"] = [
+        {"worker": SyntheticCamera, "params": dict(frame_size=FRAME_SIZE, frame_rate=FRAME_RATE, pattern="dot")},
+        {"worker": TailTracker, "params": MODES[mode]}
+    ]
+    config = HeadlessPydra.configure(config, ports)
+    with tempfile.TemporaryDirectory() as directory:
+        pydra = HeadlessPydra(working_dir=directory, filename="benchmark", **config)
+        pydra.send_event("initialize_tracker", points=TAIL_POINTS, n=10)
+        pydra.record(DURATION)
+        pydra.shutdown()
+        with h5py.File(Path(directory).joinpath("benchmark.hdf5"), "r") as f:
+            published = len(f["synthetic/index"])
+            tracked = len(f["tail/index"]) if "tail" in f else 0
+    print(f"{mode}: {tracked} of {published} frames tracked in {DURATION:.0f} s "
+          f"({tracked / DURATION:.1f} fps tracked, camera at {published / DURATION:.1f} fps)")
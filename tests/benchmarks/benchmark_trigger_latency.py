@@ -0,0 +1,81 @@
+"""Compares the latency of the polling ZMQTrigger with the ZMQBlockingTrigger and the Qt-free ZMQListener.
+
+A local PUB socket stands in for an external trigger source. For each trial, a trigger is armed, a message is published
+after a random delay, and the latency is measured from the time the message is sent to the time the triggered signal
+is handled in the main thread (or, for the listener, the time receive returns).
+"""
+from pydra.core.trigger import ZMQTrigger, ZMQBlockingTrigger
+from pydra.core.listener import ZMQListener
+from pydra.utilities import clock
+from PyQt5 import QtCore, QtWidgets
+import numpy as np
+import threading
+import random
+import time
+import zmq
+
+
+PORT = "tcp://127.0.0.1:5990"
+
+
+class Publisher:
+    """Stand-in for an external trigger source."""
+
+    def __init__(self):
+        self.sock = zmq.Context.instance().socket(zmq.PUB)
+        self.sock.bind(PORT.replace("127.0.0.1", "*"))
+        self.t_sent = None
+
+    def send(self):
+        self.t_sent = clock.now()
+        self.sock.send(b"trigger")
+
+
+def benchmark_trigger(trigger, publisher, n=100):
+    latencies = []
+    loop = QtCore.QEventLoop()
+    received = []
+
+    def handle():
+        received.append(clock.now())
+        loop.quit()
+
+    trigger.triggered.connect(handle)
+    trigger.timeout.connect(loop.quit)
+    for i in range(n):
+        received.clear()
+        trigger()
+        QtCore.QTimer.singleShot(100 + random.randint(0, 20), publisher.send)  # wait for subscription to propagate
+        loop.exec()
+        trigger.wait()
+        if received:
+            latencies.append(received[0] - publisher.t_sent)
+    return np.array(latencies)
+
+
+def benchmark_listener(listener, publisher, n=100):
+    latencies = []
+    for i in range(n):
+        timer = threading.Timer(0.1 + random.random() * 0.02, publisher.send)
+        timer.start()
+        if listener.receive(1.):
+            latencies.append(clock.now() - publisher.t_sent)
+        timer.join()
+    listener.close()
+    return np.array(latencies)
+
+
+def report(name, latencies, n):
+    latencies = latencies * 1000
+    print(f"{name}: {len(latencies)}/{n} triggers received, latency (ms) "
+          f"median={np.median(latencies):.3f}, p95={np.percentile(latencies, 95):.3f}, max={latencies.max():.3f}")
+
+
+if __name__ == "__main__":
+    app = QtWidgets.QApplication([])
+    publisher = Publisher()
+    time.sleep(0.1)
+    n = 100
+    report("ZMQTrigger (1 ms polling)", benchmark_trigger(ZMQTrigger(PORT, timeout=1000), publisher, n), n)
+    report("ZMQBlockingTrigger", benchmark_trigger(ZMQBlockingTrigger(PORT, timeout=1000), publisher, n), n)
+    report("ZMQListener", benchmark_listener(ZMQListener(PORT), publisher, n), n)
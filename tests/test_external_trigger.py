@@ -1,6 +1,7 @@
 from pydra import Pydra, ports, config
 from pydra.core import Acquisition
 from pydra.core.trigger import ZMQTrigger
+from pydra.utilities import clock
 import numpy as np
 import time
 
@@ -17,7 +18,7 @@ class AcquisitionWorker(Acquisition):
         frame = np.random.random((250, 250))
         frame *= 255
         frame = frame.astype("uint8")
-        t = time.time()
+        t = clock.now()
         time.sleep(0.01)
         self.send_frame(t, self.i, frame)
         self.i += 1
@@ -2,6 +2,7 @@ from pydra import Pydra, ports, config
 from pydra.core import Worker, Acquisition
 from pydra.gui.module import ControlWidget, DisplayProxy
 from pydra.gui.plotter import Plotter
+from pydra.utilities import clock
 from PyQt5 import QtWidgets
 import numpy as np
 import time
@@ -25,7 +26,7 @@ class AcquisitionWorker(Acquisition):
         frame = np.random.random((250, 250))
         frame *= 255
         frame = frame.astype("uint8")
-        t = time.time()
+        t = clock.now()
         time.sleep(0.01)
         self.send_frame(t, self.i, frame)
         self.i += 1
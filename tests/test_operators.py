@@ -0,0 +1,71 @@
+from pydra import Pydra, ports, config
+from pydra.core.operators import OperatorGraph, RollingMean, TailBeatFrequency, BoutDetector
+from pydra.modules.cameras.synthetic import SYNTHETIC
+from pydra.modules.tracking.tail_tracker import TAIL_TRACKER, TailTrackingWorker
+import numpy as np
+
+
+FRAME_RATE = 200.
+
+
+class TailTracker(TailTrackingWorker):
+    subscriptions = ("synthetic",)
+
+
+def operators():
+    return [
+        RollingMean("angle", 5, output="angle_smooth"),
+        TailBeatFrequency("angle", 64, min_frequency=5., output="tbf"),
+        BoutDetector("angle", 10, threshold=0.05, output="bout")
+    ]
+
+
+def check_operators():
+    # One second without movement followed by one second of tail beats at 12.5 Hz (a frequency bin of a 64 sample
+    # window at 200 Hz)
+    t = np.arange(int(2 * FRAME_RATE)) / FRAME_RATE
+    angle = np.where(t >= 1., 0.5 * np.sin(2 * np.pi * 12.5 * t), 0.)
+    # Processing samples one at a time gives the same output as processing them in batches of any size
+    graph = OperatorGraph(operators())
+    single = [graph.update(ti, dict(angle=xi)) for ti, xi in zip(t, angle)]
+    graph.reset()
+    batched = dict(angle_smooth=[], tbf=[], bout=[])
+    start = 0
+    for size in np.tile([1, 7, 32, 3, 64], 10):
+        derived = graph.update_batch(t[start:start + size], dict(angle=angle[start:start + size]))
+        for key, vals in derived.items():
+            batched[key].extend(vals)
+        start += size
+        if start >= len(t):
+            break
+    for key in batched:
+        assert np.allclose([out[key] for out in single], batched[key], equal_nan=True), key
+    # RollingMean matches the mean over each window
+    smooth = np.array(batched["angle_smooth"])
+    assert np.allclose(smooth[4:], np.convolve(angle, np.ones(5) / 5, mode="valid"))
+    # TailBeatFrequency recovers the frequency of the tail beats once the window only contains tail beats
+    tbf = np.array(batched["tbf"])
+    assert np.allclose(tbf[t >= 1. + 64 / FRAME_RATE], 12.5), tbf[t >= 1. + 64 / FRAME_RATE]
+    # BoutDetector is NaN until its window is full, then detects bouts
+    bout = np.array(batched["bout"])
+    assert np.isnan(bout[:9]).all() and not np.isnan(bout[9:]).any()
+    assert (bout[9:int(FRAME_RATE)] == 0).all()
+    assert (bout[t >= 1. + 10 / FRAME_RATE] == 1).all()
+    print("Operators ok")
+
+
+SYNTHETIC["params"]["frame_rate"] = FRAME_RATE
+SYNTHETIC["params"]["pattern"] = "dot"
+
+
+tracker = dict(TAIL_TRACKER, worker=TailTracker,
+               params=dict(TAIL_TRACKER["params"], acquisition_worker="synthetic", operators=operators()))
+
+
+config["modules"] = [SYNTHETIC, tracker]
+
+
+if __name__ == "__main__":
+    check_operators()
+    config = Pydra.configure(config, ports)
+    pydra = Pydra.run(working_dir="D:\pydra_tests", **config)
@@ -0,0 +1,41 @@
+from pydra.utilities.labjack import LabJack, FakeU3, OutputScheduler, Waveform
+from pydra.utilities import clock
+import numpy as np
+import time
+
+
+if __name__ == "__main__":
+    labjack = LabJack()
+    labjack.u = FakeU3()
+    scheduler = OutputScheduler(labjack.send_signal)
+    scheduler.start()
+    # 20 Hz pulse train (5 ms pulses) for one second, followed by a one second ramp down
+    waveform = Waveform.pulses("DAC0", 3., 20., 0.005, duration=1.) + Waveform.ramp("DAC0", 3., 0., 1., step=0.01)
+    t0 = clock.now() + 0.5
+    scheduler.schedule(waveform, t0)
+    time.sleep(t0 + waveform.duration + 0.5 - clock.now())
+    scheduler.stop()
+    writes = []
+    while not scheduler.writes.empty():
+        writes.append(scheduler.writes.get())
+    assert len(writes) == len(waveform), (len(writes), len(waveform))
+    # Writes to the fake device are in the order of the waveform
+    assert [value for (t, address, value) in labjack.u.writes] == waveform.values
+    errors = np.array([t - t_scheduled for (t_scheduled, t, register, value) in writes]) * 1000
+    print(f"{len(writes)} writes, error (ms): mean={errors.mean():.3f}, p99={np.percentile(errors, 99):.3f}, "
+          f"max={errors.max():.3f}")
+    # A waveform scheduled in the past is delayed to start now instead of writing its overdue samples in a burst
+    labjack.u = FakeU3()
+    scheduler = OutputScheduler(labjack.send_signal)
+    scheduler.start()
+    waveform = Waveform.pulses("DAC0", 3., 20., 0.005, n=4)
+    t_schedule = clock.now()
+    scheduler.schedule(waveform, t_schedule - 1.)
+    time.sleep(waveform.duration + 0.5)
+    scheduler.stop()
+    times = np.array([t for (t, address, value) in labjack.u.writes])
+    assert len(times) == len(waveform), len(times)
+    assert times[0] >= t_schedule
+    # Samples keep their spacing in the waveform (within the timing error of the scheduler)
+    assert np.allclose(np.diff(times), np.diff(waveform.offsets), atol=0.004), np.diff(times)
+    print("Stale waveform delayed")
@@ -1,6 +1,7 @@
 from pydra import Pydra, ports, config
 from pydra.core import Worker, Acquisition
 from pydra.gui.module import ControlWidget
+from pydra.utilities import clock
 from PyQt5 import QtWidgets
 import numpy as np
 import time
@@ -17,7 +18,7 @@ class AcquisitionWorker(Acquisition):
         self.events["set_value"] = self.set_value
 
     def set_value(self, value=10, **kwargs):
-        t = time.time()
+        t = clock.now()
         self.value = value
         print(f"{self.name}.value was set to: {self.value}")
         k = np.random.choice(["a", "b"])
@@ -27,7 +28,7 @@ class AcquisitionWorker(Acquisition):
         frame = np.random.random((250, 250))
         frame *= 255
         frame = frame.astype("uint8")
-        t = time.time()
+        t = clock.now()
         time.sleep(0.01)
         self.send_frame(t, self.i, frame)
         self.i += 1
@@ -0,0 +1,18 @@
+from pydra import Pydra, ports, config
+from pydra.modules.cameras.synthetic import SYNTHETIC
+
+
+SYNTHETIC["params"] = {
+    "frame_size": (640, 480),
+    "frame_rate": 1000.,
+    "pattern": "dot",
+    "n_frames": 100
+}
+
+
+config["modules"] = [SYNTHETIC]
+
+
+if __name__ == "__main__":
+    config = Pydra.configure(config, ports)
+    pydra = Pydra.run(working_dir="D:\pydra_tests", **config)
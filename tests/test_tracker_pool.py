@@ -0,0 +1,26 @@
+from pydra import Pydra, ports, config
+from pydra.core import WorkerPool
+from pydra.modules.cameras.synthetic import SYNTHETIC
+from pydra.modules.tracking.tail_tracker import TAIL_TRACKER, TailTrackingWorker
+
+
+class TailTrackerPool(WorkerPool):
+    worker = TailTrackingWorker
+    subscriptions = ("synthetic",)
+
+
+SYNTHETIC["params"]["frame_rate"] = 500.
+SYNTHETIC["params"]["pattern"] = "dot"
+
+
+TAIL_TRACKER["worker"] = TailTrackerPool
+TAIL_TRACKER["params"]["acquisition_worker"] = "synthetic"
+TAIL_TRACKER["params"]["n_workers"] = 4
+
+
+config["modules"] = [SYNTHETIC, TAIL_TRACKER]
+
+
+if __name__ == "__main__":
+    config = Pydra.configure(config, ports)
+    pydra = Pydra.run(working_dir="D:\pydra_tests", **config)
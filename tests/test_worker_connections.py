@@ -1,6 +1,7 @@
 from pydra import Pydra, ports, config
 from pydra.core import Acquisition, Worker
 from pydra.core.messaging import MESSAGE, FRAME
+from pydra.utilities import clock
 import time
 import numpy as np
 
@@ -15,7 +16,7 @@ class TestAcquisition(Acquisition):
 
     def acquire(self):
         frame = np.zeros((200, 200))
-        t = time.time()
+        t = clock.now()
         self.send_frame(t, self.i, frame)
         self.i += 1
         time.sleep(0.01)
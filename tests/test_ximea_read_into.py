@@ -0,0 +1,68 @@
+"""Checks that XimeaCamera.read_into only copies raw images into pooled buffers of the same data format, using a fake
+xiapi image instead of a camera."""
+import numpy as np
+import ctypes
+import types
+import sys
+
+try:
+    from ximea import xiapi
+except ImportError:  # run without the xiapi package
+    xiapi = types.ModuleType("ximea.xiapi")
+    xiapi.XI_IMG_FORMAT = {"XI_MONO8": 0, "XI_MONO16": 1, "XI_RGB24": 2, "XI_RGB32": 3, "XI_RAW8": 5, "XI_RAW16": 6}
+    xiapi.Xi_error = type("Xi_error", (Exception,), {})
+    sys.modules["ximea"] = types.ModuleType("ximea")
+    sys.modules["ximea"].xiapi = xiapi
+    sys.modules["ximea.xiapi"] = xiapi
+
+from pydra.modules.cameras.ximea import XimeaCamera
+
+
+class FakeImage:
+    """Stands in for a xiapi.Image holding a raw image."""
+
+    def __init__(self, data: np.ndarray, frm: str):
+        self.data = np.ascontiguousarray(data)
+        self.frm = xiapi.XI_IMG_FORMAT[frm]
+        self.height, self.width = data.shape[:2]
+        self.padding_x = 0
+        self.bp_size = self.data.nbytes
+        self.bp = self.data.ctypes.data_as(ctypes.c_void_p)
+        self.nframe = 0
+
+    def get_image_data_numpy(self):
+        return self.data.copy()
+
+
+class FakeCamera:
+
+    def get_image(self, image):
+        return
+
+
+def read_into(image, buffer):
+    camera = XimeaCamera.__new__(XimeaCamera)  # the read only needs the camera and image
+    camera.camera = FakeCamera()
+    camera.frame = image
+    return camera.read_into(buffer)
+
+
+if __name__ == "__main__":
+    height, width = 48, 64
+    # 8-bit images are copied straight into the buffer
+    mono8 = np.random.randint(0, 256, (height, width), dtype="uint8")
+    buffer = np.zeros((height, width), dtype="uint8")
+    frame = read_into(FakeImage(mono8, "XI_MONO8"), buffer)
+    assert frame is buffer and np.array_equal(frame, mono8)
+    # 16-bit images are never copied byte for byte into a uint8 buffer (bp_size is twice the size of the buffer)
+    for frm in ("XI_MONO16", "XI_RAW16"):
+        mono16 = np.random.randint(0, 4096, (height, width), dtype="uint16")
+        buffer = np.zeros((height, width), dtype="uint8")
+        frame = read_into(FakeImage(mono16, frm), buffer)
+        assert frame is not buffer
+        assert frame.dtype == np.uint16 and np.array_equal(frame, mono16)
+        # ... but are copied into a uint16 buffer
+        buffer = np.zeros((height, width), dtype="uint16")
+        frame = read_into(FakeImage(mono16, frm), buffer)
+        assert frame is buffer and np.array_equal(frame, mono16)
+    print("read_into ok")
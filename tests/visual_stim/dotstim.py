@@ -23,11 +23,12 @@ class MovingDot(Stimulus):
         self.dot.setAutoDraw(False)
 
     def update(self):
+        if self.xpos > 10.:  # finish instead of drawing, so the next stimulus is drawn on this frame
+            self.finished = True
+            return
         self.xpos += 0.1
         self.dot.setPos((self.xpos, self.ypos))
         self.dot.draw()
-        if self.xpos > 10.:
-            self.finished = True
 
     def on_stop(self):
         self.xpos = 0
@@ -0,0 +1,117 @@
+from pydra.modules.visual_stimulation.stimulus import ProtocolRunner, PreparedStimulus, Wait
+from pydra.core.messaging import TIMESTAMPED
+from pydra.core.saving.threading import TimestampedThread
+from pathlib import Path
+import numpy as np
+import tempfile
+import queue
+import h5py
+
+
+class MockWindow:
+    """Stands in for a Psychopy window. Counts flips and the draw calls that are displayed by each flip."""
+
+    def __init__(self):
+        self.flips = 0
+        self.draws = 0
+        self.frame_draws = []  # number of draw calls displayed by each flip
+        self.pending = 0
+
+    def flip(self):
+        self.flips += 1
+        self.draws += self.pending
+        self.frame_draws.append(self.pending)
+        self.pending = 0
+
+    def clearBuffer(self):
+        self.pending = 0
+
+    def getActualFrameRate(self):
+        return 60.
+
+    def close(self):
+        return
+
+
+class MockShape:
+    """Stands in for a Psychopy visual object."""
+
+    def __init__(self, win, pos=(0, 0)):
+        self.win = win
+        self.pos = pos
+
+    def setPos(self, pos):
+        self.pos = pos
+
+    def draw(self):
+        self.win.pending += 1
+
+
+class MovingDots(PreparedStimulus):
+
+    def __init__(self, n_dots=3, duration=1., *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_dots = n_dots
+        self.duration = duration
+
+    def create(self):
+        return [MockShape(self.window) for dot in range(self.n_dots)]
+
+    def precompute(self):
+        n_frames = self.frames(self.duration)
+        x = np.linspace(0, 10, n_frames)
+        y = np.arange(self.n_dots)
+        positions = np.stack(np.broadcast_arrays(x[:, None], y[None, :]), axis=-1)
+        return dict(positions=positions)
+
+    def set_frame(self, frame):
+        for dot, pos in zip(self.objects, self.arrays["positions"][frame]):
+            dot.setPos(pos)
+
+
+if __name__ == "__main__":
+    window = MockWindow()
+    stimulus_list = [MovingDots(3, 1.), Wait(0.5), MovingDots(2, 0.5)]
+    records = []
+    flipped = []  # index of the stimulus shown by each flip
+    runner = ProtocolRunner(window, stimulus_list, frame_rate=window.getActualFrameRate(), on_log=records.extend,
+                            on_flip=lambda t, frame, stimulus, missed: flipped.append(stimulus))
+    report = runner.prepare()
+    assert [entry["draws_per_frame"] for entry in report] == [3, 0, 2]
+    assert [entry["n_frames"] for entry in report] == [60, None, 30]
+    # Running the protocol only draws precomputed frames (draws made while preparing are cleared)
+    runner.start()
+    while runner.running:
+        runner()
+    assert window.draws == 3 * 60 + 2 * 30, window.draws
+    # Each stimulus lasts exactly its number of frames, with no extra flips at transitions
+    assert window.flips == 60 + 30 + 30, window.flips
+    # Every flip of a prepared stimulus displays a frame (no blank frames at transitions)
+    for stimulus, draws in zip(flipped, window.frame_draws):
+        if isinstance(stimulus_list[stimulus], PreparedStimulus):
+            assert draws == stimulus_list[stimulus].n_dots, (stimulus, draws)
+    print(f"{window.flips} flips, {window.draws} draws")
+    # Each stimulus is logged once the protocol has finished, with the precomputed positions of each displayed frame
+    assert [record["type"] for record in records] == ["MovingDots", "Wait", "MovingDots"]
+    assert np.allclose(records[0]["columns"]["positions"][59], [[10, 0], [10, 1], [10, 2]])
+    for record in records:
+        print(f"{record['type']}: {record['n']} flips from {record['t_start']:.3f} to {record['t_stop']:.3f}")
+    # Records are sent to the saver as timestamped data and saved as tables for each stimulus type
+    q = queue.Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        thread = TimestampedThread(Path(directory).joinpath("test_events.csv"), q)
+        thread.start()
+        for record in records:
+            t, data = TIMESTAMPED.decode(*TIMESTAMPED.encode(record["t_start"], {f"stimuli.{record['type']}": record}))
+            q.put(("visual_stimulation", t, data))
+        q.put(b"")
+        thread.join()
+        with h5py.File(Path(directory).joinpath("test_events.hdf5"), "r") as f:
+            # The two MovingDots stimuli have different numbers of dots, so each record is saved in its own group
+            dots = f["visual_stimulation.stimuli.MovingDots"]
+            assert dots["record0/positions"].shape == (60, 3, 2)
+            assert dots["record1/positions"].shape == (30, 2, 2)
+            assert list(dots["records/stimulus"]) == [0, 2]
+            wait = f["visual_stimulation.stimuli.Wait"]
+            assert len(wait["record"]) == len(wait["frame"]) == 30
+    print("Stimulus log saved")